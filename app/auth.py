@@ -1,25 +1,72 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from typing import Optional, Union
+from sqlalchemy import select, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple, Union
 from datetime import datetime, timedelta
+import os
 
 from app import models, schemas, security
+from app.cache import TTLCache
 from app.db import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/token")
 
-def getUser(db: Session, email: str) -> Optional[schemas.UserDB]:
-    return db.query(models.User).filter(models.User.email == email).first()
+# Resolved principals, so most authenticated requests skip the account lookup.
+# Entries are dropped by invalidate_principal whenever an account changes.
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', '60'))
+AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '10000'))
+principal_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
 
-def getAdmin(db: Session, email: str) -> Optional[schemas.AdminDB]:
-    return db.query(models.Admin).filter(models.Admin.email == email).first()
+def principal_key(kind: str, payload: dict) -> tuple:
+    return (
+        kind,
+        payload.get("sub"),
+        bool(payload.get("is_admin", False)),
+        bool(payload.get("is_supervisor", False))
+    )
+
+def invalidate_principal(email: str):
+    """Forget cached principals for an account after it is modified or deleted."""
+    principal_cache.invalidate_where(lambda key: key[1] == email)
+
+async def getUser(db: AsyncSession, email: str) -> Optional[schemas.UserDB]:
+    return await db.scalar(select(models.User).where(models.User.email == email))
 
-def getSupervisor(db: Session, email: str) -> Optional[schemas.SupervisorDB]:
-    return db.query(models.Supervisors).filter(models.Supervisors.username == email).first()
+async def getAdmin(db: AsyncSession, email: str) -> Optional[schemas.AdminDB]:
+    return await db.scalar(select(models.Admin).where(models.Admin.email == email))
 
-async def getCurrentUser(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> schemas.UserDB:
+async def getSupervisor(db: AsyncSession, email: str) -> Optional[schemas.SupervisorDB]:
+    return await db.scalar(select(models.Supervisors).where(models.Supervisors.email == email))
+
+async def getAccount(db: AsyncSession, email: str) -> Tuple[Optional[Union[models.User, models.Admin, models.Supervisors]], Optional[str]]:
+    """
+    Resolve an email to its account and role ("user", "admin" or "supervisor")
+    in one round trip: the email is outer-joined against the unique email
+    index of each account table. Roles are checked in the order user,
+    admin, supervisor, as the login has always done.
+    """
+    probe = select(literal(email).label("email")).subquery()
+    row = (await db.execute(
+        select(models.User, models.Admin, models.Supervisors)
+        .select_from(probe)
+        .outerjoin(models.User, models.User.email == probe.c.email)
+        .outerjoin(models.Admin, models.Admin.email == probe.c.email)
+        .outerjoin(models.Supervisors, models.Supervisors.email == probe.c.email)
+    )).first()
+    if row is None:
+        return None, None
+    user, admin, supervisor = row
+    if user is not None:
+        return user, "user"
+    if admin is not None:
+        return admin, "admin"
+    if supervisor is not None:
+        return supervisor, "supervisor"
+    return None, None
+
+async def getCurrentUser(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> schemas.UserDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -34,12 +81,17 @@ async def getCurrentUser(token: str = Depends(oauth2_scheme), db: Session = Depe
     except JWTError:
         raise credentials_exception
     
-    user = getUser(db, email=token_data.email)
+    key = principal_key("user", payload)
+    user = principal_cache.get(key)
     if user is None:
-        raise credentials_exception
+        user = await getUser(db, email=token_data.email)
+        if user is None:
+            raise credentials_exception
+        user = schemas.UserDB.model_validate(user)
+        principal_cache.set(key, user)
     return user
 
-async def getCurrentAdmin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> schemas.AdminDB:
+async def getCurrentAdmin(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> schemas.AdminDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -56,12 +108,17 @@ async def getCurrentAdmin(token: str = Depends(oauth2_scheme), db: Session = Dep
     except JWTError:
         raise credentials_exception
     
-    admin = getAdmin(db, email=token_data.email)
+    key = principal_key("admin", payload)
+    admin = principal_cache.get(key)
     if admin is None:
-        raise credentials_exception
+        admin = await getAdmin(db, email=token_data.email)
+        if admin is None:
+            raise credentials_exception
+        admin = schemas.AdminDB.model_validate(admin)
+        principal_cache.set(key, admin)
     return admin
 
-async def getCurrentSupervisor(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> schemas.SupervisorDB:
+async def getCurrentSupervisor(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> schemas.SupervisorDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -77,12 +134,17 @@ async def getCurrentSupervisor(token: str = Depends(oauth2_scheme), db: Session
     except JWTError:
         raise credentials_exception
     
-    supervisor = getSupervisor(db, email=token_data.email)
+    key = principal_key("supervisor", payload)
+    supervisor = principal_cache.get(key)
     if supervisor is None:
-        raise credentials_exception
+        supervisor = await getSupervisor(db, email=token_data.email)
+        if supervisor is None:
+            raise credentials_exception
+        supervisor = schemas.SupervisorDB.model_validate(supervisor)
+        principal_cache.set(key, supervisor)
     return supervisor
 
-async def get_current_any_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Union[schemas.UserDB, schemas.AdminDB, schemas.SupervisorDB]:
+async def get_current_any_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Union[schemas.UserDB, schemas.AdminDB, schemas.SupervisorDB]:
     """
     Authenticate any user type (user, admin, or supervisor) using a JWT token.
     
@@ -110,17 +172,19 @@ async def get_current_any_user(token: str = Depends(oauth2_scheme), db: Session
     except JWTError:
         raise credentials_exception
     
-    # Check user types in order: user, admin, supervisor
-    user = getUser(db, email=token_data.email)
-    if user:
-        return user
-    
-    admin = getAdmin(db, email=token_data.email)
-    if admin:
-        return admin
-    
-    supervisor = getSupervisor(db, email=token_data.email)
-    if supervisor:
-        return supervisor
-    
-    raise credentials_exception
\ No newline at end of file
+    key = principal_key("any", payload)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    account, role = await getAccount(db, email=token_data.email)
+    if account is None:
+        raise credentials_exception
+    if role == "user":
+        principal = schemas.UserDB.model_validate(account)
+    elif role == "admin":
+        principal = schemas.AdminDB.model_validate(account)
+    else:
+        principal = schemas.SupervisorDB.model_validate(account)
+    principal_cache.set(key, principal)
+    return principal
\ No newline at end of file
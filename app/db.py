@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import urllib.parse
@@ -6,34 +8,46 @@ import os
 
 load_dotenv()
 
-db_password = urllib.parse.quote_plus(os.getenv('db_password'))
-dbURL = (
-    f"mysql+pymysql://"
-    f"{os.getenv('db_user')}:{db_password}@"
-    f"{os.getenv('db_host')}:{os.getenv('db_port', '3306')}/"
-    f"{os.getenv('db_name')}?charset=utf8mb4"
-)
-
-# MySQL specific engine configuration
-engine = create_engine(
-    dbURL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=False  # Set to True for debugging SQL queries
-)
-
-try:
-    with engine.connect() as connection:
-        print("MySQL Connection successful!")
-except Exception as e:
-    print(f"MySQL Connection failed: {e}")
-
-sessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# DATABASE_URL overrides the MySQL settings, e.g. sqlite+aiosqlite:///./test.db
+# for local runs and benchmarks
+if os.getenv('DATABASE_URL'):
+    dbURL = make_url(os.getenv('DATABASE_URL'))
+else:
+    db_password = urllib.parse.quote_plus(os.getenv('db_password'))
+    dbURL = make_url(
+        f"mysql+aiomysql://"
+        f"{os.getenv('db_user')}:{db_password}@"
+        f"{os.getenv('db_host')}:{os.getenv('db_port', '3306')}/"
+        f"{os.getenv('db_name')}?charset=utf8mb4"
+    )
+
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+SYNC_DRIVERS = {"mysql": "mysql+pymysql", "sqlite": "sqlite"}
+
+backend = dbURL.get_backend_name()
+asyncURL = dbURL.set(drivername=ASYNC_DRIVERS.get(backend, dbURL.drivername))
+syncURL = dbURL.set(drivername=SYNC_DRIVERS.get(backend, dbURL.drivername))
+
+engine_options = {"echo": False}  # Set echo to True for debugging SQL queries
+if backend != "sqlite":
+    engine_options.update(
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=int(os.getenv('DB_POOL_SIZE', '10')),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', '30')),
+    )
+
+# Async engine used by the API
+engine = create_async_engine(asyncURL, **engine_options)
+sessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+# Blocking engine for code that runs outside the event loop (similarity workers)
+sync_engine = create_engine(syncURL, **engine_options)
+syncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
 Base = declarative_base()
 
-def get_db():
-    db = sessionLocal()
-    try:
+async def get_db():
+    async with sessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3'))
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.2'))
+HTTP_BREAKER_FAILURES = int(os.getenv('HTTP_BREAKER_FAILURES', '5'))
+HTTP_BREAKER_COOLDOWN = float(os.getenv('HTTP_BREAKER_COOLDOWN', '30'))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+try:
+    import h2  # noqa: F401  (httpx negotiates HTTP/2 only when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class CircuitOpenError(httpx.RequestError):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failed requests and refuses calls for
+    `cooldown` seconds. After the cool-down one trial request is let through
+    (half open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failures: int, cooldown: float):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._trial_running or (self.opened_at is None and self.consecutive_failures >= self.failures):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+            self._trial_running = False
+
+    def release(self):
+        """Give up a trial slot that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> dict:
+        remaining = 0.0
+        if self.state == "open":
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "cooldown_remaining": round(remaining, 3),
+        }
+
+
+class OutboundClient:
+    """
+    One httpx.AsyncClient for the life of the application, so outbound calls
+    reuse pooled keep-alive (and, with h2 installed, HTTP/2) connections.
+
+    Requests are retried with full-jitter exponential backoff on transport
+    errors and 502/503/504, for idempotent methods or when the caller passes
+    idempotent=True. Each upstream host has its own circuit breaker.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.breakers = {}
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+            )
+        return self._client
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(HTTP_BREAKER_FAILURES, HTTP_BREAKER_COOLDOWN)
+        return self.breakers[host]
+
+    async def request(self, method: str, url: str, idempotent: Optional[bool] = None, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+        """
+        Send a request and return the final response. Failed statuses are
+        returned, not raised, so callers keep using raise_for_status().
+        """
+        request = self.client.build_request(method, url, **kwargs)
+        breaker = self.breaker(request.url.host)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempts = 1 + (retries if idempotent else 0)
+
+        if not breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {request.url.host}", request=request)
+
+        self.requests += 1
+        self.in_flight += 1
+        outcome_recorded = False
+        try:
+            for attempt in range(attempts):
+                if attempt:
+                    self.retries += 1
+                    await asyncio.sleep(random.uniform(0, HTTP_RETRY_BACKOFF * 2 ** (attempt - 1)))
+                try:
+                    response = await self.client.send(request)
+                except httpx.TransportError:
+                    if attempt + 1 < attempts:
+                        continue
+                    self.failures += 1
+                    breaker.record_failure()
+                    outcome_recorded = True
+                    raise
+                if response.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                    await response.aclose()
+                    continue
+                if response.status_code >= 500:
+                    self.failures += 1
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                outcome_recorded = True
+                return response
+        finally:
+            self.in_flight -= 1
+            if not outcome_recorded:
+                breaker.release()
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    def pool_stats(self) -> dict:
+        # httpx has no public pool API; read httpcore's connection list when present
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "connections": len(connections),
+            "idle": sum(1 for connection in connections if connection.is_idle()),
+            "http2": sum(1 for connection in connections if "HTTP/2" in repr(connection)),
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "max_keepalive": HTTP_MAX_KEEPALIVE,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "http2_enabled": HTTP2_AVAILABLE,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected_by_breaker": self.rejected,
+            "in_flight": self.in_flight,
+            "pool": self.pool_stats(),
+            "breakers": {host: breaker.stats() for host, breaker in self.breakers.items()},
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client = OutboundClient()
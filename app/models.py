@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Text, ForeignKey, DateTime, Enum, Float, UniqueConstraint, Index, JSON
+from sqlalchemy import Boolean, Column, Integer, String, Text, ForeignKey, DateTime, Enum, Float, UniqueConstraint, Index, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
@@ -77,6 +77,9 @@ class Project(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     uploader_admin = relationship("Admin", back_populates="projects")
     team_members = relationship("ProjectTeamMember", back_populates="project")
+    __table_args__ = (
+        Index('idx_project_year_id', 'year', 'id'),
+    )
 
 class ProjectTeamMember(Base):
     __tablename__ = "project_team_members"
@@ -173,4 +176,60 @@ class CollegeIdeasRequests(Base):
         UniqueConstraint('team_id', 'college_idea_title', name='uq_team_college_idea_request'),
     )
 
-    
\ No newline at end of file
+    
+class SimilarityEdge(Base):
+    # Top-k most similar documents of each Project, CollegeIdeas and TeamProject
+    # row within its academic year; source_type is "Project", "College Idea"
+    # or "Team Project"
+    __tablename__ = "similarity_edges"
+    id = Column(Integer, primary_key=True, index=True)
+    year = Column(Integer, nullable=False)
+    source_type = Column(String(32), nullable=False)
+    source_id = Column(Integer, nullable=False)
+    target_type = Column(String(32), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        UniqueConstraint('source_type', 'source_id', 'target_type', 'target_id', name='uq_similarity_edge'),
+        Index('idx_similarity_edge_year_score', 'year', 'score'),
+    )
+
+class DocumentTokens(Base):
+    # Normalized token stream of a Project, CollegeIdeas or TeamProject row,
+    # space separated. content_hash covers the title, the description and the
+    # text pipeline settings, so a stale stream is recognised and recomputed
+    __tablename__ = "document_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    source_type = Column(String(32), nullable=False)
+    source_id = Column(Integer, nullable=False)
+    content_hash = Column(String(40), nullable=False)
+    tokens = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    __table_args__ = (
+        UniqueConstraint('source_type', 'source_id', name='uq_document_tokens'),
+    )
+
+class DocumentEmbedding(Base):
+    # Sentence embedding (float32 bytes) of a Project, CollegeIdeas or
+    # TeamProject row under one model; content_hash covers the model name,
+    # the title and the description
+    __tablename__ = "document_embeddings"
+    id = Column(Integer, primary_key=True, index=True)
+    source_type = Column(String(32), nullable=False)
+    source_id = Column(Integer, nullable=False)
+    model = Column(String(255), nullable=False)
+    content_hash = Column(String(40), nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    __table_args__ = (
+        UniqueConstraint('source_type', 'source_id', 'model', name='uq_document_embedding'),
+    )
+
+class SimilarityAdmission(Base):
+    # One row per academic year, row-locked while a proposal is re-checked and
+    # inserted; version counts the proposals admitted so far
+    __tablename__ = "similarity_admissions"
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,22 @@
+import base64
+import json
+from fastapi import HTTPException
+
+# Keyset cursors are the (integer) sort key of the last row of a page,
+# encoded so clients treat them as opaque tokens.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError("wrong cursor size")
+        if not all(isinstance(value, int) for value in values):
+            raise ValueError("cursor values must be integers")
+        return values
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+
+from app.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# memory (per process) or redis (shared by every worker, needs REDIS_URL)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Bounds how long a change made outside the API (which bumps no version) can be served
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "gp:response:")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Optional: pip install redis
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class MemoryBackend:
+    """
+    The subset of Redis commands ResponseCache uses (get, set with ex, incr,
+    mget), in process. Entries live in a byte-bounded LRUCache; counters are
+    kept apart so that eviction can never reset a version.
+    """
+
+    def __init__(self, maxbytes: int):
+        self.entries = LRUCache(maxbytes, sizeof=lambda entry: len(entry[1]))
+        self.counters = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None or (entry[0] is not None and entry[0] < time.monotonic()):
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        self.entries.set(key, (time.monotonic() + ex if ex else None, value))
+
+    async def incr(self, key: str) -> int:
+        # No await in between, so atomic within the event loop
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    async def mget(self, keys: Sequence[str]) -> list:
+        return [self.counters.get(key) for key in keys]
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+
+class ResponseCache:
+    """
+    Rendered JSON responses of read-mostly GET endpoints, with strong ETags.
+
+    An entry is keyed by path, query string and the current version of every
+    resource the response depends on; writers bump those versions after
+    committing, which makes older entries unreachable (they age out of the
+    LRU, or expire in Redis). The ETag is a hash of the body, so it stays
+    valid across workers and after an entry is rebuilt. A matching
+    If-None-Match (or If-Modified-Since) is answered with 304 from the cache
+    alone, without a database query.
+
+    The backend is anything with Redis' get/set/incr/mget as coroutines: a
+    redis.asyncio client, MemoryBackend, or a fake in tests. A failing
+    backend degrades to uncached responses.
+    """
+
+    def __init__(self, backend, ttl: int = RESPONSE_CACHE_TTL, prefix: str = RESPONSE_CACHE_PREFIX):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    def version_key(self, resource: str) -> str:
+        return f"{self.prefix}version:{resource}"
+
+    async def versions(self, resources: Sequence[str]) -> Tuple[int, ...]:
+        values = await self.backend.mget([self.version_key(resource) for resource in resources])
+        return tuple(int(value or 0) for value in values)
+
+    async def bump(self, *resources: str):
+        """Call after committing a change to these resources."""
+        try:
+            for resource in resources:
+                await self.backend.incr(self.version_key(resource))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Could not bump response cache versions {resources}: {str(e)}")
+
+    def entry_key(self, request: Request, versions: Tuple[int, ...]) -> str:
+        query = sorted(request.query_params.multi_items())
+        digest = hashlib.blake2b(
+            json.dumps([request.url.path, query, versions]).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return f"{self.prefix}entry:{digest}"
+
+    async def respond(
+        self,
+        request: Request,
+        resources: Sequence[str],
+        render: Callable[[], Awaitable[Tuple[bytes, dict]]]
+    ) -> Response:
+        """
+        The cached response for this request, or render() -> (JSON body,
+        extra headers) stored and returned. Exceptions from render (e.g. a
+        404) propagate and are not cached.
+        """
+        key, entry = None, None
+        try:
+            key = self.entry_key(request, await self.versions(resources))
+            entry = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Response cache unavailable, serving uncached: {str(e)}")
+
+        if entry is not None:
+            self.hits += 1
+            meta, body = decode_entry(entry)
+        else:
+            self.misses += 1
+            body, headers = await render()
+            meta = {
+                "etag": '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+                "modified": int(time.time()),
+                "headers": dict(headers),
+            }
+            if key is not None:
+                try:
+                    await self.backend.set(key, encode_entry(meta, body), ex=self.ttl)
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"Could not store cached response: {str(e)}")
+
+        validators = {
+            "ETag": meta["etag"],
+            "Last-Modified": formatdate(meta["modified"], usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if not_modified(request, meta["etag"], meta["modified"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=validators)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**meta["headers"], **validators}
+        )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if hasattr(self.backend, "stats"):
+            stats["entries"] = self.backend.stats()
+        return stats
+
+    async def aclose(self):
+        if hasattr(self.backend, "aclose"):
+            await self.backend.aclose()
+
+
+def encode_entry(meta: dict, body: bytes) -> bytes:
+    return json.dumps(meta).encode("utf-8") + b"\n" + body
+
+
+def decode_entry(entry: bytes) -> Tuple[dict, bytes]:
+    meta, body = entry.split(b"\n", 1)
+    return json.loads(meta), body
+
+
+def not_modified(request: Request, etag: str, modified: int) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison, as the RFC requires for If-None-Match
+        return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        # HTTP dates have one second resolution: another version may have
+        # been rendered later in the same second, under the same date
+        try:
+            return modified < parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def get_backend():
+    if RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(RESPONSE_CACHE_BYTES)
+    if RESPONSE_CACHE_BACKEND == "redis":
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the redis package: pip install redis")
+        return redis_asyncio.from_url(REDIS_URL)
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{RESPONSE_CACHE_BACKEND}', expected memory or redis")
+
+
+# Catalogue responses; writers bump "projects", "team_projects", "college_ideas" or "supervisors"
+response_cache = ResponseCache(get_backend())
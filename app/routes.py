@@ -1,14 +1,26 @@
-from fastapi import Depends, HTTPException, status, APIRouter
-from sqlalchemy.orm import Session
+from fastapi import Depends, HTTPException, status, APIRouter, File, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, inspect, select, literal, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
+from pydantic import TypeAdapter
 import logging
 from typing import Optional, Union, List
-import httpx
 from datetime import datetime
 from app import auth, models, schemas, security
+from app.cache import data_versions
 from app.db import get_db
+from app.http_client import http_client
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.response_cache import response_cache
 from app.models import User, Admin, Supervisors, reqStatus, TeamProject, CollegeIdeas, Team, TeamMember
 from controllers.check_similarity import check_similarity_multi_table
+from controllers.candidate_index import candidate_index
+from controllers.recommender import Profile, recommender, recommendation_cache
+from controllers.similarity_batch import batch_jobs, pin_corpus
+from controllers import exports, similarity_graph
+from controllers.project_import import detect_format, import_projects
+from controllers.search_index import search_hits, search_index
 
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
@@ -16,12 +28,28 @@ load_dotenv(find_dotenv())
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Serializers of the responses kept in response_cache
+archive_page_adapter = TypeAdapter(list[schemas.ArchiveProjectResponse])
+project_adapter = TypeAdapter(schemas.ProjectsResponse)
+team_ideas_adapter = TypeAdapter(List[schemas.TeamProjectsResponse])
+college_ideas_adapter = TypeAdapter(list[schemas.CollegeIdeaResponse])
+
+
+def render_json(adapter: TypeAdapter, value, exclude_unset: bool = False) -> bytes:
+    """A route's return value as the JSON FastAPI would send for its response_model."""
+    return adapter.dump_json(adapter.validate_python(value), exclude_unset=exclude_unset)
+
+
+def cursor_headers(response: Response) -> dict:
+    cursor = response.headers.get(NEXT_CURSOR_HEADER)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
 
 @router.post("/v1/add-project-idea", response_model=schemas.ProjectIdeaResponse)
 async def add_project_idea(
     project: schemas.checkProject, 
     cur_user: schemas.UserDB = Depends(auth.getCurrentUser), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Add a new project idea for a team leader.
@@ -29,9 +57,9 @@ async def add_project_idea(
     """
     try:
         # Verify user is team leader
-        team_member = db.query(models.TeamMember).filter(
+        team_member = await db.scalar(select(models.TeamMember).where(
             models.TeamMember.user_email == cur_user.email
-        ).first()
+        ))
         
         if not team_member:
             raise HTTPException(
@@ -46,9 +74,9 @@ async def add_project_idea(
             )
         
         # Check if team already has a project
-        existing_project = db.query(models.TeamProject).filter(
+        existing_project = await db.scalar(select(models.TeamProject).where(
             models.TeamProject.team_id == team_member.team_id
-        ).first()
+        ))
         
         if existing_project:
             raise HTTPException(
@@ -57,7 +85,7 @@ async def add_project_idea(
             )
         
         # Call the similarity check function
-        return check_similarity_multi_table(project, team_member.team_id, db)
+        return await check_similarity_multi_table(project, team_member.team_id, db)
         
     except HTTPException:
         raise
@@ -69,67 +97,37 @@ async def add_project_idea(
         )
 
 @router.get('/v1/student/recommef-for-me', response_model=schemas.RecommendedTeams)
-async def recommend_teams(cur_user: schemas.UserDB = Depends(auth.getCurrentUser), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == cur_user.email).first()
+async def recommend_teams(cur_user: schemas.UserDB = Depends(auth.getCurrentUser), db: AsyncSession = Depends(get_db)):
+    cache_key = ("teams_for_student", cur_user.email, data_versions.snapshot("teams", "users"))
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    user = await db.scalar(select(models.User).where(models.User.email == cur_user.email))
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    dbteams = db.query(models.Team).all()
-
+    # Only teams sharing a skill with the student are loaded and scored
+    student = Profile(id=user.id, title=user.title, skills=user.skills)
+    await candidate_index.ensure_loaded(db)
+    candidate_ids = candidate_index.team_candidates(student)
     teams = [
-        {
-            "id": str(team.id),
-            "title": team.name,
-            "skills": ", ".join(team.expec_tools) if team.expec_tools else ""
-        }
-        for team in dbteams
-    ]
-
-    student_info = {
-        "id": str(user.id),
-        "jobtitle": user.title,
-        "skills": ", ".join(user.skills) if user.skills else ""
-    }
+        Profile(id=row.id, title=row.name, skills=row.expec_tools)
+        for row in (await db.execute(select(models.Team.id, models.Team.name, models.Team.expec_tools).where(
+            models.Team.id.in_(candidate_ids)
+        ))).all()
+    ] if candidate_ids else []
 
-
-    payload = {
-        "student": student_info,
-        "projects": teams
-    }
-
-    external_api_url = 'https://recommendation-system-production-390d.up.railway.app/v1/match/student-to-projects'
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(external_api_url, json=payload, headers=headers, timeout=10.0)
-            response.raise_for_status()  # Raise exception for 4xx/5xx responses
-            api_response = response.json()
-    except httpx.RequestError as e:
-        logger.error(f"Failed to connect to external API: {str(e)}")
-        raise HTTPException(status_code=503, detail="External recommendation service unavailable")
-    except httpx.HTTPStatusError as e:
-        logger.error(f"External API error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"External API error: {e.response.status_code}")
-    except ValueError as e:
-        logger.error(f"Invalid response from external API: {str(e)}")
-        raise HTTPException(status_code=500, detail="Invalid response from external API")
-
-    matches = api_response.get("matches", [])
-    
-    recommended_team_ids = [int(match["project_id"]) for match in matches]
+    matches = await recommender.teams_for_student(student, teams, stats=candidate_index.teams.corpus_stats())
     
-    recommended_team_from_db = db.query(models.Team).filter(
-        models.Team.id.in_(recommended_team_ids)
-    ).all()
+    recommended_team_from_db = (await db.scalars(select(models.Team).where(
+        models.Team.id.in_([team_id for team_id, _ in matches])
+    ))).all()
     
     team_map = {team.id: team for team in recommended_team_from_db}
     
     recommended_teams = []
-    for match in matches:
-        team_id = int(match["project_id"])
+    for team_id, score in matches:
         if team_id in team_map:
             team = team_map[team_id]
             recommended_teams.append(
@@ -137,22 +135,29 @@ async def recommend_teams(cur_user: schemas.UserDB = Depends(auth.getCurrentUser
                     team_id=team.id,
                     name=team.name,
                     description=team.description,
-                    skills = team.expec_tools,
-                    similarity_score=match["similarity_score"]
+                    skills = team.expec_tools or [],
+                    similarity_score=score
                 )
             )
 
-    return schemas.RecommendedTeams(
+    result = schemas.RecommendedTeams(
         matches=recommended_teams,
         total_teams=len(recommended_teams)
     )
+    recommendation_cache.set(cache_key, result)
+    return result
 
 
 
 
 @router.get('/v1/team/recommend-for-us', response_model=schemas.RecommendedUsers)
-async def recommend_users(cur_user: schemas.UserDB = Depends(auth.getCurrentUser), db: Session = Depends(get_db)):
-    leader = db.query(models.TeamMember).filter(models.TeamMember.user_email == cur_user.email).first()
+async def recommend_users(cur_user: schemas.UserDB = Depends(auth.getCurrentUser), db: AsyncSession = Depends(get_db)):
+    cache_key = ("students_for_team", cur_user.email, data_versions.snapshot("teams", "users"))
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    leader = await db.scalar(select(models.TeamMember).where(models.TeamMember.user_email == cur_user.email))
     if leader is None:
         raise HTTPException(status_code=400, detail="You are not a member of any team")
     
@@ -160,107 +165,71 @@ async def recommend_users(cur_user: schemas.UserDB = Depends(auth.getCurrentUser
         raise HTTPException(status_code=400, detail="You are not the leader of your team")
 
     # Get team information
-    team = db.query(models.Team).filter(models.Team.id == leader.team_id).first()
+    team = await db.scalar(select(models.Team).where(models.Team.id == leader.team_id))
     if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
 
     # Get all team member emails for the current team
-    team_member_emails = db.query(models.TeamMember.user_email).filter(
+    team_member_emails = (await db.execute(select(models.TeamMember.user_email).where(
         models.TeamMember.team_id == leader.team_id
-    ).all()
+    ))).all()
     team_member_email_list = [email[0] for email in team_member_emails]
 
-    # Get all users EXCLUDING current team members
-    users = db.query(models.User).filter(
-        ~models.User.email.in_(team_member_email_list)
-    ).all()
-
-    # Prepare data for external API (only non-team members)
+    # Only users sharing a skill with the team, and not in any team yet, are loaded and scored
+    team_profile = Profile(id=team.id, title=team.name, skills=team.expec_tools)
+    await candidate_index.ensure_loaded(db)
+    candidate_ids = candidate_index.user_candidates(team_profile)
     students = [
-        {
-            "id": str(user.id),
-            "jobtitle": user.title if user.title else "developer", 
-            "skills": ", ".join(user.skills) if user.skills else ""
-        }
-        for user in users
-    ]
+        Profile(id=row.id, title=row.title, skills=row.skills)
+        for row in (await db.execute(select(models.User.id, models.User.title, models.User.skills).where(
+            models.User.id.in_(candidate_ids)
+        ))).all()
+    ] if candidate_ids else []
 
-    team_info = {
-        "id": str(team.id),
-        "title": team.name,
-        "skills": ", ".join(team.expec_tools) if team.expec_tools else ""
-    }
-
-    payload = {
-        "project": team_info,
-        "students": students
-    }
-
-    external_api_url = 'https://recommendation-system-production-390d.up.railway.app/v1/match/projects-to-students'
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(external_api_url, json=payload, headers=headers, timeout=10.0)
-            response.raise_for_status()  # Raise exception for 4xx/5xx responses
-            api_response = response.json()
-    except httpx.RequestError as e:
-        logger.error(f"Failed to connect to external API: {str(e)}")
-        raise HTTPException(status_code=503, detail="External recommendation service unavailable")
-    except httpx.HTTPStatusError as e:
-        logger.error(f"External API error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"External API error: {e.response.status_code}")
-    except ValueError as e:
-        logger.error(f"Invalid response from external API: {str(e)}")
-        raise HTTPException(status_code=500, detail="Invalid response from external API")
-
-    matches = api_response.get("matches", [])
-    
-    # Extract recommended user IDs from the API response
-    recommended_user_ids = [int(match["student_id"]) for match in matches]
+    matches = await recommender.students_for_team(team_profile, students, stats=candidate_index.users.corpus_stats())
     
     # Fetch all recommended users in one query (they should already be excluded, but double-check)
-    recommended_users_from_db = db.query(models.User).filter(
-        models.User.id.in_(recommended_user_ids),
+    recommended_users_from_db = (await db.scalars(select(models.User).where(
+        models.User.id.in_([user_id for user_id, _ in matches]),
         ~models.User.email.in_(team_member_email_list)  # Double-check exclusion
-    ).all()
+    ))).all()
     
     # Create a mapping for quick lookup
     user_map = {user.id: user for user in recommended_users_from_db}
     
     # Build the response with actual user data from database
     recommended_users = []
-    for match in matches:
-        student_id = int(match["student_id"])
-        if student_id in user_map:
-            user = user_map[student_id]
+    for user_id, score in matches:
+        if user_id in user_map:
+            user = user_map[user_id]
             recommended_users.append(
                 schemas.RecommendedUser(
                     user_id=user.id,
                     username=user.username,
                     firstName=user.firstName,
                     lastName=user.lastName,
+                    title=user.title if user.title else "developer",
                     skills=user.skills if user.skills else [],
-                    similarity_score=match["similarity_score"]
+                    similarity_score=score
                 )
             )
 
-    return schemas.RecommendedUsers(
+    result = schemas.RecommendedUsers(
         matches=recommended_users,
         total_users=len(recommended_users)
     )
+    recommendation_cache.set(cache_key, result)
+    return result
 
 
     
 
 @router.post("/v1/admin/upload-project")
-async def upload_projects(data: schemas.ProjectBase, cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin), db: Session = Depends(get_db)):
+async def upload_projects(data: schemas.ProjectBase, cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin), db: AsyncSession = Depends(get_db)):
     tools_str = " ".join(data.tools)
 
     # Check if project title already exists
-    if db.query(models.Project).filter(models.Project.title == data.title).first():
+    if await db.scalar(select(models.Project).where(models.Project.title == data.title)):
         raise HTTPException(status_code=400, detail=f"Project title already exists")
 
     # Validate unique emails in team members
@@ -279,8 +248,8 @@ async def upload_projects(data: schemas.ProjectBase, cur_admin: schemas.AdminDB
             uploader=cur_admin.email  # This should be the email string
         )
         db.add(proj)
-        db.commit()
-        db.refresh(proj)
+        await db.commit()
+        await db.refresh(proj)
 
         # Add team members to project_team_members table
         for member in data.team_members:
@@ -294,67 +263,97 @@ async def upload_projects(data: schemas.ProjectBase, cur_admin: schemas.AdminDB
             )
             db.add(team_member)
         
-        db.commit()
+        await db.commit()
+        await response_cache.bump("projects")
+
+        similarity_graph.schedule(similarity_graph.index_document(
+            data.year, ("Project", proj.id), data.title, data.description
+        ))
         return {"message": "Project uploaded successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to upload project: {str(e)}")
 
+@router.post("/v1/admin/import-projects", response_model=schemas.ProjectImportReport)
+async def import_project_archive(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or jsonl; defaults to the file extension"),
+    cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import of historical projects from a CSV or JSONL file, with the
+    fields of /v1/admin/upload-project per row. CSV tools are separated by
+    ";" and team_members is a JSON array. Bad rows are reported, not fatal.
+    """
+    import_format = detect_format(file.filename, format)
+    if import_format is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .jsonl file, or pass format=csv|jsonl")
+    try:
+        return await import_projects(db, file.file, import_format, cur_admin.email)
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to import projects: {str(e)}")
+
 @router.post("/v1/register", response_model=schemas.UserDBBase)
-async def register(user: schemas.User, db: Session = Depends(get_db)):
-    existing_user = auth.getUser(db, email=user.email)
-    existing_admin = auth.getAdmin(db, email=user.email)
-    existing_supervisor = auth.getSupervisor(db, email=user.email)
-    if existing_user or existing_admin or existing_supervisor:
+async def register(user: schemas.User, db: AsyncSession = Depends(get_db)):
+    existing_account, _ = await auth.getAccount(db, email=user.email)
+    if existing_account:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    hashed_password = security.getHashedPassword(user.password)
+    hashed_password = await security.hash_password(user.password)
     db_user = models.User(
         **user.dict(exclude={'password'}),
         hashed_password=hashed_password
         )
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        auth.invalidate_principal(db_user.email)
+        data_versions.bump("users")
+        candidate_index.add_user(db_user.email, Profile(id=db_user.id, title=db_user.title, skills=db_user.skills))
         return db_user
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error: {str(e)}")
         raise HTTPException(status_code=400, detail="User creation failed due to duplicate username or email")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to register user: {str(e)}")
 
 @router.post("/v1/token", response_model=schemas.Token)
-async def login(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = auth.getUser(db, email=login_data.email)
-    is_admin = False
-    is_supervisor = False
-    
+async def login(login_data: schemas.LoginRequest, db: AsyncSession = Depends(get_db)):
+    user, role = await auth.getAccount(db, email=login_data.email)
     if not user:
-        user = auth.getAdmin(db, email=login_data.email)
-        if user:
-            is_admin = True
-        else:
-            user = auth.getSupervisor(db, email=login_data.email)
-            if user:
-                is_supervisor = True
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Incorrect email or password",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    is_admin = role == "admin"
+    is_supervisor = role == "supervisor"
     
-    if not security.pwd_context.verify(login_data.password, user.hashed_password):
+    valid, new_hash = await security.verify_password(login_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Stored hash predates the current BCRYPT_ROUNDS; upgrade it transparently
+    if new_hash:
+        try:
+            user.hashed_password = new_hash
+            await db.commit()
+            auth.invalidate_principal(user.email)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to rehash password: {str(e)}")
     
     access_token = security.create_access_token(
         data={"sub": user.email},
@@ -364,17 +363,15 @@ async def login(login_data: schemas.LoginRequest, db: Session = Depends(get_db))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/v1/add-supervisor", response_model=schemas.SupervisorDBBase)
-async def add_supervisor(supervisor_data: schemas.Supervisor, cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin), db: Session = Depends(get_db)):
+async def add_supervisor(supervisor_data: schemas.Supervisor, cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin), db: AsyncSession = Depends(get_db)):
     if cur_admin.degree != 'A':
         raise HTTPException(status_code=403, detail="Only admins with degree A can add supervisors")
     
-    existing_user = auth.getUser(db, email=supervisor_data.email)
-    existing_admin = auth.getAdmin(db, email=supervisor_data.email)
-    existing_supervisor = auth.getSupervisor(db, email=supervisor_data.email)
-    if existing_user or existing_admin or existing_supervisor:
+    existing_account, _ = await auth.getAccount(db, email=supervisor_data.email)
+    if existing_account:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    hashed_password = security.getHashedPassword(supervisor_data.password)
+    hashed_password = await security.hash_password(supervisor_data.password)
     
     new_supervisor = models.Supervisors(
         username=supervisor_data.email,
@@ -388,29 +385,29 @@ async def add_supervisor(supervisor_data: schemas.Supervisor, cur_admin: schemas
     
     try:
         db.add(new_supervisor)
-        db.commit()
-        db.refresh(new_supervisor)
+        await db.commit()
+        await db.refresh(new_supervisor)
+        auth.invalidate_principal(new_supervisor.email)
+        await response_cache.bump("supervisors")
         return new_supervisor
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error: {str(e)}")
         raise HTTPException(status_code=400, detail="Supervisor creation failed due to duplicate username or email")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to add supervisor: {str(e)}")
 
 
 @router.post("/v1/master/add-admin", response_model=schemas.AdminDBBase)
-async def add_admin(admin_data: schemas.Admin, db: Session = Depends(get_db)):
+async def add_admin(admin_data: schemas.Admin, db: AsyncSession = Depends(get_db)):
     
-    existing_user = auth.getUser(db, email=admin_data.email)
-    existing_admin = auth.getAdmin(db, email=admin_data.email)
-    existing_supervisor = auth.getSupervisor(db, email=admin_data.email)
-    if existing_user or existing_admin or existing_supervisor:
+    existing_account, _ = await auth.getAccount(db, email=admin_data.email)
+    if existing_account:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    hashed_password = security.getHashedPassword(admin_data.password)
+    hashed_password = await security.hash_password(admin_data.password)
     
     new_admin = models.Admin(
         username=admin_data.username,
@@ -422,18 +419,151 @@ async def add_admin(admin_data: schemas.Admin, db: Session = Depends(get_db)):
     
     try:
         db.add(new_admin)
-        db.commit()
-        db.refresh(new_admin)
+        await db.commit()
+        await db.refresh(new_admin)
+        auth.invalidate_principal(new_admin.email)
         return new_admin
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error: {str(e)}")
         raise HTTPException(status_code=400, detail="Admin creation failed due to duplicate username or email")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to add admin: {str(e)}")
 
+@router.post("/v1/admin/similarity-batch", response_model=schemas.SimilarityBatchJob, status_code=202)
+async def start_similarity_batch(
+    batch: schemas.SimilarityBatchRequest,
+    cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Screen many TeamProject proposals of a year at once, in the background.
+    Poll GET /v1/admin/similarity-batch/{job_id} for progress and read the
+    results, one NDJSON line per proposal, from .../{job_id}/results.
+    """
+    query = select(models.TeamProject.id).where(models.TeamProject.year == batch.year)
+    if batch.team_project_ids is None:
+        query = query.where(models.TeamProject.status == models.TeamProjectStatus.PENDING)
+    else:
+        query = query.where(models.TeamProject.id.in_(batch.team_project_ids))
+    proposal_ids = (await db.scalars(query.order_by(models.TeamProject.id))).all()
+    if not proposal_ids:
+        raise HTTPException(status_code=404, detail=f"No team projects to screen for year {batch.year}")
+
+    corpus_ids = await pin_corpus(db, batch.year)
+    job = batch_jobs.start(batch.year, corpus_ids, list(proposal_ids), batch.min_score, batch.top_k)
+    return job.summary()
+
+@router.get("/v1/admin/similarity-batch/{job_id}", response_model=schemas.SimilarityBatchJob)
+async def get_similarity_batch(job_id: str, cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin)):
+    return batch_jobs.get(job_id).summary()
+
+@router.get("/v1/admin/similarity-batch/{job_id}/results")
+async def get_similarity_batch_results(job_id: str, cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin)):
+    """Stream results as they are computed; the response ends when the job does."""
+    job = batch_jobs.get(job_id)
+    return StreamingResponse(job.stream(), media_type="application/x-ndjson")
+
+# URL slugs of the similarity graph node types
+GRAPH_SOURCES = {
+    "project": "Project",
+    "college-idea": "College Idea",
+    "team-project": "Team Project",
+}
+
+@router.get("/v1/search", response_model=schemas.SearchResults)
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    year: Optional[int] = None,
+    source: Optional[List[str]] = Query(None, description="project, college-idea and/or team-project"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ranked keyword search (BM25) over the title, description and tools of
+    projects, college ideas and team ideas. Pages are keyed on the rank:
+    pass the X-Next-Cursor header of a response as `cursor` to get the next
+    page; the header is absent on the last page.
+    """
+    sources = None
+    if source:
+        unknown = [name for name in source if name not in GRAPH_SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown source '{unknown[0]}'")
+        sources = [GRAPH_SOURCES[name] for name in source]
+    after = decode_cursor(cursor, 3) if cursor is not None else None
+
+    try:
+        terms, total, page, more = await search_index.search(
+            db, q, year=year, sources=sources, after=after, limit=limit
+        )
+        results = await search_hits(db, terms, page)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    if more:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*page[-1][:3])
+    return schemas.SearchResults(query=q, total=total, results=results)
+
+@router.get("/v1/similarity/{source}/{id}/neighbours", response_model=List[schemas.GraphNeighbour])
+async def get_similarity_neighbours(
+    source: str,
+    id: int,
+    limit: int = Query(similarity_graph.SIMILARITY_GRAPH_TOP_K, ge=1, le=100),
+    cur_user = Depends(auth.get_current_any_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Most similar ideas of the same academic year, read from the stored graph."""
+    if source not in GRAPH_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown source '{source}'")
+    return await similarity_graph.neighbours(db, (GRAPH_SOURCES[source], id), limit)
+
+@router.get("/v1/similarity/clusters", response_model=schemas.SimilarityClusters)
+async def get_similarity_clusters(
+    year: int,
+    threshold: float = Query(0.5, ge=0.0, le=1.0),
+    cur_user = Depends(auth.get_current_any_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Groups of ideas linked by graph edges scoring at least threshold."""
+    return {
+        "year": year,
+        "threshold": threshold,
+        "clusters": await similarity_graph.clusters(db, year, threshold)
+    }
+
+@router.post("/v1/admin/similarity-graph/rebuild")
+async def rebuild_similarity_graph(
+    year: int,
+    cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Recompute a year's graph from scratch, e.g. after bulk imports or deletes."""
+    edges = await similarity_graph.rebuild_year(db, year)
+    return {"year": year, "edges": edges}
+
+@router.get("/v1/admin/metrics")
+async def get_metrics(cur_admin: schemas.AdminDB = Depends(auth.getCurrentAdmin)):
+    """
+    In-process cache and pool counters for this worker.
+    """
+    return {
+        "auth_cache": auth.principal_cache.stats(),
+        "http_client": http_client.stats(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "data_versions": data_versions.stats(),
+        "response_cache": response_cache.stats(),
+        "candidate_index": candidate_index.stats(),
+        "search_index": search_index.stats()
+    }
+
 #################################################################
 ####################################################################
 
@@ -501,51 +631,86 @@ async def add_admin(admin_data: schemas.Admin, db: Session = Depends(get_db)):
 
 @router.get("/v1/team-ideas", response_model=List[schemas.TeamProjectsResponse])
 async def get_teams(
-    db: Session = Depends(get_db)
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status_filter: Optional[models.TeamProjectStatus] = Query(None, alias="status"),
+    year: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    One page of team project ideas in id order, in a single query. Pass the
+    X-Next-Cursor header of a response as `cursor` to get the next page.
+    """
+    async def render():
+        response = Response()
+        team_projects = await team_ideas_page(response, limit, cursor, status_filter, year, db)
+        return render_json(team_ideas_adapter, team_projects), cursor_headers(response)
+
+    return await response_cache.respond(request, ("team_projects",), render)
+
+async def team_ideas_page(
+    response: Response,
+    limit: int,
+    cursor: Optional[str],
+    status_filter: Optional[models.TeamProjectStatus],
+    year: Optional[int],
+    db: AsyncSession
 ):
     try:
-        team_projects = db.query(models.TeamProject).all()
-        
-        if not team_projects:
-            return []
-        
-        response = []
-        
-        for team_project in team_projects:
-            team = db.query(models.Team).filter(
-                models.Team.id == team_project.team_id
-            ).first()
-            if not team:
-                continue  # Skip if team not found rather than raising error
-                
-            response.append(
-                schemas.TeamProjectsResponse(
-                    team_project_id=team_project.id,  # Use team_project.id instead of team.id
-                    title=team_project.title,
-                    status=team_project.status,
-                )
+        # The inner join drops ideas whose team no longer exists
+        query = select(
+            models.TeamProject.id,
+            models.TeamProject.title,
+            models.TeamProject.status
+        ).join(
+            models.Team,
+            models.Team.id == models.TeamProject.team_id
+        )
+
+        if status_filter is not None:
+            query = query.where(models.TeamProject.status == status_filter)
+        if year is not None:
+            query = query.where(models.TeamProject.year == year)
+        if cursor is not None:
+            (cursor_id,) = decode_cursor(cursor, 1)
+            query = query.where(models.TeamProject.id > cursor_id)
+
+        query = query.order_by(models.TeamProject.id).limit(limit + 1)
+        team_projects = (await db.execute(query)).all()
+        if len(team_projects) > limit:
+            team_projects = team_projects[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(team_projects[-1].id)
+
+        return [
+            schemas.TeamProjectsResponse(
+                team_project_id=team_project.id,
+                title=team_project.title,
+                status=team_project.status.value,
             )
-            
-        return response
-        
+            for team_project in team_projects
+        ]
+
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_team_project_by_title: {str(e)}")
+        logger.error(f"Unexpected error in get_teams: {str(e)}")
         raise HTTPException(
             status_code=500, 
-            detail=f"Failed to retrieve team project: {str(e)}"
+            detail=f"Failed to retrieve team projects: {str(e)}"
         )
 
 
 @router.get("/v1/team-ideas/{title}", response_model=schemas.TeamProjectResponse)
 async def get_team_project_by_title(
     title: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # First, find the team project
-        team_project = db.query(models.TeamProject).filter(
+        team_project = await db.scalar(select(models.TeamProject).where(
             models.TeamProject.title == title
-        ).first()
+        ))
         
         if not team_project:
             raise HTTPException(
@@ -554,9 +719,9 @@ async def get_team_project_by_title(
             )
         
         # Get team information
-        team = db.query(models.Team).filter(
+        team = await db.scalar(select(models.Team).where(
             models.Team.id == team_project.team_id
-        ).first()
+        ))
         
         if not team:
             raise HTTPException(
@@ -577,15 +742,15 @@ async def get_team_project_by_title(
         #     ).first()
         
         # Get team members with their user details
-        team_members_query = db.query(
+        team_members_query = (await db.execute(select(
             models.TeamMember,
             models.User
         ).join(
             models.User,
             models.TeamMember.user_email == models.User.email
-        ).filter(
+        ).where(
             models.TeamMember.team_id == team.id
-        ).all()
+        ))).all()
         
         # Build team members list
         team_members = []
@@ -644,10 +809,53 @@ async def get_team_project_by_title(
             detail=f"Failed to retrieve team project: {str(e)}"
         )
 
+def export_response(body, name: str, format: str, gzip: bool) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=exports.EXPORT_MEDIA_TYPES[format], headers=headers)
+
+@router.get("/v1/export/archive")
+async def export_archive(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    year: Optional[int] = None,
+    supervisor: Optional[str] = None,
+    include_members: bool = False
+):
+    """
+    The whole archive (or one year or supervisor of it) as NDJSON or CSV,
+    streamed from a server-side cursor, optionally gzip-encoded. In CSV,
+    tools and team_members are JSON cells.
+    """
+    query = exports.archive_query(year=year, supervisor=supervisor)
+    return export_response(
+        exports.export_body(query, exports.project_record, format, gzip, include_members), "archive", format, gzip
+    )
+
+@router.get("/v1/export/college-ideas")
+async def export_college_ideas(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    year: Optional[int] = None,
+    idea_status: Optional[str] = Query(None, alias="status")
+):
+    """College ideas with their supervisor, streamed like /v1/export/archive."""
+    query = exports.college_ideas_query(year=year, status=idea_status)
+    return export_response(
+        exports.export_body(query, exports.college_idea_record, format, gzip), "college-ideas", format, gzip
+    )
+
 @router.get("/v1/archive/{id}", response_model=schemas.ProjectsResponse)
-async def get_project_by_id(id: int, db: Session = Depends(get_db)):
+async def get_project_by_id(id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    async def render():
+        return render_json(project_adapter, await archive_project(id, db)), {}
+
+    return await response_cache.respond(request, ("projects",), render)
+
+async def archive_project(id: int, db: AsyncSession):
     try:
-        query = db.query(
+        query = select(
             models.Project.id,
             models.Project.title,
             models.Project.description,
@@ -665,7 +873,7 @@ async def get_project_by_id(id: int, db: Session = Depends(get_db)):
         )
 
         
-        projects = query.filter(models.Project.id == id).all()
+        projects = (await db.execute(query.where(models.Project.id == id))).all()
         if not projects:
             raise HTTPException(status_code=404, detail=f"Project with id '{id}' not found")
         result = {
@@ -687,6 +895,8 @@ async def get_project_by_id(id: int, db: Session = Depends(get_db)):
             ]
         }
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get projects: {str(e)}")
@@ -694,10 +904,9 @@ async def get_project_by_id(id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/v1/archivet/{title}", response_model=schemas.ProjectsResponse)
-@router.get("/v1/archive", response_model=list[schemas.ProjectsResponse])
-async def get_projects(title: Optional[str] = None, db: Session = Depends(get_db)):
+async def get_project(title: str, db: AsyncSession = Depends(get_db)):
     try:
-        query = db.query(
+        query = select(
             models.Project.id,
             models.Project.title,
             models.Project.description,
@@ -714,74 +923,185 @@ async def get_projects(title: Optional[str] = None, db: Session = Depends(get_db
             models.ProjectTeamMember.project_id == models.Project.id
         )
 
-        if title is None:
-            projects = query.all()
-            result = {}
-            for proj in projects:
-                proj_id = proj.id
-                if proj_id not in result:
-                    result[proj_id] = {
-                        "id": proj_id,
-                        "title": proj.title,
-                        "description": proj.description,
-                        "tools": proj.tools.split(),
-                        "supervisor": proj.supervisor,
-                        "year": proj.year,
-                        "team_members": []
-                    }
-                if proj.email:
-                    result[proj_id]["team_members"].append(
-                        schemas.TeamMemberBase(
-                            firstName=proj.firstName,
-                            lastName=proj.lastName,
-                            email=proj.email,
-                            role=proj.role,
-                            is_leader=proj.is_leader
-                        )
-                    )
-            return list(result.values())
-        else:
-            projects = query.filter(models.Project.title == title).all()
-            if not projects:
-                raise HTTPException(status_code=404, detail=f"Project with title '{title}' not found")
-            result = {
-                "id": projects[0].id,
-                "title": projects[0].title,
-                "description": projects[0].description,
-                "tools": projects[0].tools.split(),
-                "supervisor": projects[0].supervisor,
-                "year": projects[0].year,
-                "team_members": [
+        projects = (await db.execute(query.where(models.Project.title == title))).all()
+        if not projects:
+            raise HTTPException(status_code=404, detail=f"Project with title '{title}' not found")
+        result = {
+            "id": projects[0].id,
+            "title": projects[0].title,
+            "description": projects[0].description,
+            "tools": projects[0].tools.split(),
+            "supervisor": projects[0].supervisor,
+            "year": projects[0].year,
+            "team_members": [
+                schemas.TeamMemberBase(
+                    firstName=proj.firstName,
+                    lastName=proj.lastName,
+                    email=proj.email,
+                    role=proj.role,
+                    is_leader=proj.is_leader
+                )
+                for proj in projects if proj.email
+            ]
+        }
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get projects: {str(e)}")
+
+@router.get(
+    "/v1/archive",
+    response_model=list[schemas.ArchiveProjectResponse],
+    response_model_exclude_unset=True
+)
+async def get_projects(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    year: Optional[int] = None,
+    supervisor: Optional[str] = None,
+    tool: Optional[str] = None,
+    include_members: bool = True,
+    include_description: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    One page of the archive, newest year first. Pages are keyed on (year, id):
+    pass the X-Next-Cursor header of a response as `cursor` to get the next
+    page; the header is absent on the last page. Responses carry an ETag;
+    send it back in If-None-Match to get a 304 while the archive is unchanged.
+    """
+    async def render():
+        response = Response()
+        projects = await archive_page(
+            response, limit, cursor, year, supervisor, tool, include_members, include_description, db
+        )
+        return render_json(archive_page_adapter, projects, exclude_unset=True), cursor_headers(response)
+
+    return await response_cache.respond(request, ("projects",), render)
+
+async def archive_page(
+    response: Response,
+    limit: int,
+    cursor: Optional[str],
+    year: Optional[int],
+    supervisor: Optional[str],
+    tool: Optional[str],
+    include_members: bool,
+    include_description: bool,
+    db: AsyncSession
+):
+    try:
+        columns = [
+            models.Project.id,
+            models.Project.title,
+            models.Project.tools,
+            models.Project.supervisor,
+            models.Project.year
+        ]
+        if include_description:
+            columns.append(models.Project.description)
+        query = select(*columns)
+
+        if year is not None:
+            query = query.where(models.Project.year == year)
+        if supervisor is not None:
+            query = query.where(models.Project.supervisor == supervisor)
+        if tool is not None:
+            # tools is a space separated list, match whole entries only
+            query = query.where(
+                (literal(" ") + models.Project.tools + " ").contains(f" {tool} ", autoescape=True)
+            )
+        if cursor is not None:
+            cursor_year, cursor_id = decode_cursor(cursor, 2)
+            query = query.where(or_(
+                models.Project.year < cursor_year,
+                and_(models.Project.year == cursor_year, models.Project.id < cursor_id)
+            ))
+
+        query = query.order_by(models.Project.year.desc(), models.Project.id.desc()).limit(limit + 1)
+        projects = (await db.execute(query)).all()
+        if len(projects) > limit:
+            projects = projects[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(projects[-1].year, projects[-1].id)
+
+        result = {}
+        for proj in projects:
+            result[proj.id] = {
+                "id": proj.id,
+                "title": proj.title,
+                "tools": proj.tools.split(),
+                "supervisor": proj.supervisor,
+                "year": proj.year
+            }
+            if include_description:
+                result[proj.id]["description"] = proj.description
+            if include_members:
+                result[proj.id]["team_members"] = []
+
+        if include_members and result:
+            members = (await db.execute(
+                select(models.ProjectTeamMember)
+                .where(models.ProjectTeamMember.project_id.in_(result.keys()))
+                .order_by(models.ProjectTeamMember.id)
+            )).scalars().all()
+            for member in members:
+                result[member.project_id]["team_members"].append(
                     schemas.TeamMemberBase(
-                        firstName=proj.firstName,
-                        lastName=proj.lastName,
-                        email=proj.email,
-                        role=proj.role,
-                        is_leader=proj.is_leader
+                        firstName=member.firstName,
+                        lastName=member.lastName,
+                        email=member.email,
+                        role=member.role,
+                        is_leader=member.is_leader
                     )
-                    for proj in projects if proj.email
-                ]
-            }
-            return result
+                )
+        return list(result.values())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get projects: {str(e)}")
 
 @router.post("/v1/student/create-team", response_model=schemas.TeamResponse)
-async def create_team(team: schemas.TeamBase, cur_user: schemas.UserDB = Depends(auth.getCurrentUser), db: Session = Depends(get_db)):
+async def create_team(team: schemas.TeamBase, cur_user: schemas.UserDB = Depends(auth.getCurrentUser), db: AsyncSession = Depends(get_db)):
+    """
+    Create a team led by the current user. Members are validated with one
+    query each for existence and existing memberships, and inserted in one
+    statement, so the query count does not depend on the team size.
+    """
     try:
         # Check for duplicate team name
-        if db.query(models.Team).filter(models.Team.name == team.name).first():
+        if await db.scalar(select(models.Team.id).where(models.Team.name == team.name)):
             raise HTTPException(status_code=400, detail=f"Team with name '{team.name}' already exists")
 
         # Validate unique emails and check if users exist
         emails = [member.email for member in team.members]
         if len(emails) != len(set(emails)):
             raise HTTPException(status_code=400, detail="Team members must have unique emails")
-        
-        # Check if current user is already in a team
-        if db.query(models.TeamMember).filter(models.TeamMember.user_email == cur_user.email).first():
+        # The current user is added as leader, not as a member
+        member_emails = [email for email in emails if email != cur_user.email]
+
+        usernames = {}
+        if member_emails:
+            usernames = dict((await db.execute(
+                select(models.User.email, models.User.username).where(models.User.email.in_(member_emails))
+            )).all())
+        for email in member_emails:
+            if email not in usernames:
+                raise HTTPException(status_code=404, detail=f"User with email '{email}' does not exist")
+
+        # Check if the current user or any member is already in a team
+        in_teams = set((await db.scalars(
+            select(models.TeamMember.user_email)
+            .where(models.TeamMember.user_email.in_([cur_user.email] + member_emails))
+        )).all())
+        if cur_user.email in in_teams:
             raise HTTPException(status_code=400, detail="You are already a member of another team")
+        for email in member_emails:
+            if email in in_teams:
+                raise HTTPException(status_code=400, detail=f"User '{email}' is already a member of another team")
 
         # Create team
         db_team = models.Team(
@@ -791,44 +1111,38 @@ async def create_team(team: schemas.TeamBase, cur_user: schemas.UserDB = Depends
             created_by=cur_user.email
         )
         db.add(db_team)
-        db.flush()  # Get the team ID
-
-        # Add current user as leader
-        db_member = models.TeamMember(
-            user_email=cur_user.email,
-            team_id=db_team.id,
-            role="Leader",
-            is_leader=True
+        await db.flush()  # Get the team ID
+        if "created_at" in inspect(db_team).unloaded:
+            # No RETURNING (MySQL): read back the server default
+            await db.refresh(db_team, attribute_names=["created_at"])
+
+        # Leader first, then the other members, in one statement; they join
+        # when the team is created
+        members = [
+            {"user_email": cur_user.email, "role": "Leader", "is_leader": True, "username": cur_user.username}
+        ] + [
+            {"user_email": email, "role": "Member", "is_leader": False, "username": usernames[email]}
+            for email in member_emails
+        ]
+        await db.execute(insert(models.TeamMember), [
+            {
+                "team_id": db_team.id,
+                "user_email": member["user_email"],
+                "role": member["role"],
+                "is_leader": member["is_leader"],
+                "joined_at": db_team.created_at
+            }
+            for member in members
+        ])
+
+        await db.commit()
+        data_versions.bump("teams")
+        candidate_index.add_team(
+            Profile(id=db_team.id, title=db_team.name, skills=db_team.expec_tools),
+            [cur_user.email] + member_emails
         )
-        db.add(db_member)
-
-        # Add other members
-        for member in team.members:
-            # Skip if it's the current user (already added as leader)
-            if member.email == cur_user.email:
-                continue
-                
-            user = db.query(models.User).filter(models.User.email == member.email).first()
-            if not user:
-                raise HTTPException(status_code=404, detail=f"User with email '{member.email}' does not exist")
-            
-            # Check if user is already in another team
-            if db.query(models.TeamMember).filter(models.TeamMember.user_email == member.email).first():
-                raise HTTPException(status_code=400, detail=f"User '{member.email}' is already a member of another team")
-            
-            db_member = models.TeamMember(
-                user_email=member.email,
-                team_id=db_team.id,
-                role="Member",  # Default role
-                is_leader=False
-            )
-            db.add(db_member)
 
-        db.commit()
-        db.refresh(db_team)
-        
         # Return team with members
-        team_members = db.query(models.TeamMember).filter(models.TeamMember.team_id == db_team.id).all()
         return {
             "id": db_team.id,
             "name": db_team.name,
@@ -837,30 +1151,32 @@ async def create_team(team: schemas.TeamBase, cur_user: schemas.UserDB = Depends
             "created_at": db_team.created_at,
             "members": [
                 {
-                    "username": tm.user.username if tm.user else "",
-                    "email": tm.user_email,
-                    "role": tm.role,
-                    "is_leader": tm.is_leader,
-                    "joined_at": tm.joined_at
+                    "username": member["username"] or "",
+                    "email": member["user_email"],
+                    "role": member["role"],
+                    "is_leader": member["is_leader"],
+                    "joined_at": db_team.created_at
                 }
-                for tm in team_members
+                for member in members
             ]
         }
 
+    except HTTPException:
+        raise
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error: {str(e)}")
         raise HTTPException(status_code=400, detail="Team creation failed due to duplicate name or other constraint")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create team: {str(e)}")
 
 
 @router.get("/v1/college-ideas/{id}", response_model=schemas.CollegeIdeaResponse)
-async def college_idea_by_id(id: int, db: Session = Depends(get_db)):
+async def college_idea_by_id(id: int, db: AsyncSession = Depends(get_db)):
     try:
-        query = db.query(
+        query = select(
             models.CollegeIdeas.id,
             models.CollegeIdeas.title,
             models.CollegeIdeas.description,
@@ -897,7 +1213,7 @@ async def college_idea_by_id(id: int, db: Session = Depends(get_db)):
             }
 
         
-        idea = query.filter(models.CollegeIdeas.id == id).first()
+        idea = (await db.execute(query.where(models.CollegeIdeas.id == id))).first()
         if idea is None:
             raise HTTPException(status_code=404, detail=f"College idea with title '{id}' not found")
         return map_idea(idea)
@@ -905,11 +1221,18 @@ async def college_idea_by_id(id: int, db: Session = Depends(get_db)):
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve college ideas: {str(e)}")
 
-@router.get("/v1/college-idea/{title}", response_model=schemas.CollegeIdeaResponse)
 @router.get("/v1/college-ideas", response_model=list[schemas.CollegeIdeaResponse])
-async def college_idea(title: Optional[str] = None, db: Session = Depends(get_db)):
+async def college_ideas(request: Request, db: AsyncSession = Depends(get_db)):
+    async def render():
+        return render_json(college_ideas_adapter, await college_idea(None, db)), {}
+
+    # Ideas are listed with their supervisor's details
+    return await response_cache.respond(request, ("college_ideas", "supervisors"), render)
+
+@router.get("/v1/college-idea/{title}", response_model=schemas.CollegeIdeaResponse)
+async def college_idea(title: Optional[str] = None, db: AsyncSession = Depends(get_db)):
     try:
-        query = db.query(
+        query = select(
             models.CollegeIdeas.id,
             models.CollegeIdeas.title,
             models.CollegeIdeas.description,
@@ -946,10 +1269,10 @@ async def college_idea(title: Optional[str] = None, db: Session = Depends(get_db
             }
 
         if title is None:
-            ideas = query.all()
+            ideas = (await db.execute(query)).all()
             return [map_idea(idea) for idea in ideas]
         else:
-            idea = query.filter(models.CollegeIdeas.title == title).first()
+            idea = (await db.execute(query.where(models.CollegeIdeas.title == title))).first()
             if idea is None:
                 raise HTTPException(status_code=404, detail=f"College idea with title '{title}' not found")
             return map_idea(idea)
@@ -961,31 +1284,31 @@ async def college_idea(title: Optional[str] = None, db: Session = Depends(get_db
 async def create_college_idea_request(
     request: schemas.CollegeIdeaRequestBase,
     cur_user: schemas.UserDB = Depends(auth.getCurrentUser),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Authenticate user and check if they are a team leader
-        team_member = db.query(models.TeamMember).filter(models.TeamMember.user_email == cur_user.email).first()
+        team_member = await db.scalar(select(models.TeamMember).where(models.TeamMember.user_email == cur_user.email))
         if not team_member:
             raise HTTPException(status_code=403, detail="User is not a member of any team")
         if not team_member.is_leader:
             raise HTTPException(status_code=403, detail="Only team leaders can request college ideas")
 
         # Fetch college idea
-        college_idea = db.query(models.CollegeIdeas).filter(models.CollegeIdeas.title == request.college_idea_title).first()
+        college_idea = await db.scalar(select(models.CollegeIdeas).where(models.CollegeIdeas.title == request.college_idea_title))
         if not college_idea:
             raise HTTPException(status_code=404, detail=f"College idea with title '{request.college_idea_title}' not found")
 
         # Validate supervisor existence
-        supervisor = db.query(models.Supervisors).filter(models.Supervisors.email == college_idea.supervisor_email).first()
+        supervisor = await db.scalar(select(models.Supervisors).where(models.Supervisors.email == college_idea.supervisor_email))
         if not supervisor:
             raise HTTPException(status_code=400, detail="Supervisor associated with the college idea does not exist")
 
         # Check for existing requests
-        existing_request = db.query(models.CollegeIdeasRequests).filter(
+        existing_request = await db.scalar(select(models.CollegeIdeasRequests).where(
             models.CollegeIdeasRequests.team_id == team_member.team_id,
             models.CollegeIdeasRequests.college_idea_title == request.college_idea_title
-        ).first()
+        ))
         if existing_request:
             if existing_request.status == reqStatus.PENDING:
                 raise HTTPException(status_code=400, detail="Team has already requested this idea")
@@ -1000,8 +1323,8 @@ async def create_college_idea_request(
             supervisor_email=college_idea.supervisor_email
         )
         db.add(req)
-        db.commit()
-        db.refresh(req)
+        await db.commit()
+        await db.refresh(req)
         res=models.CollegeIdeasRequests(
             team_id=team_member.team_id,
             college_idea_title=request.college_idea_title,
@@ -1011,11 +1334,11 @@ async def create_college_idea_request(
         return res
 
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error: {str(e)}")
         raise HTTPException(status_code=400, detail="Request creation failed due to database constraint")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create request: {str(e)}")
 
@@ -1,5 +1,5 @@
 import email
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, Field, validator
 from typing import List, Optional
 from datetime import datetime
 from app.models import reqStatus
@@ -165,6 +165,22 @@ class ProjectBase(BaseModel):
             raise ValueError(f'Year must be between 2023 and {current_year}')
         return v
 
+class ArchiveProject(ProjectBase):
+    # Rows of a historical archive import: any past year is accepted
+    @validator('year')
+    def year_valid(cls, v):
+        current_year = datetime.now().year
+        if v < 1900 or v > current_year:
+            raise ValueError(f'Year must be between 1900 and {current_year}')
+        return v
+
+    @validator('team_members')
+    def team_members_unique(cls, v):
+        emails = [member.email for member in v]
+        if len(emails) != len(set(emails)):
+            raise ValueError('Team members must have unique emails')
+        return v
+
 class ProjectResponse(BaseModel):
     id: int
     title: str
@@ -199,6 +215,18 @@ class ProjectsResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ArchiveProjectResponse(BaseModel):
+    id: int
+    title: str
+    supervisor: str
+    description: Optional[str] = None  # Omitted with include_description=false
+    tools: List[str]
+    year: int
+    team_members: Optional[List[TeamMemberBase]] = None  # Omitted with include_members=false
+
+    class Config:
+        from_attributes = True
+
 class CollegeIdeaBase(BaseModel):
     title: str
     description: str
@@ -409,4 +437,59 @@ class ProjectIdeaResponse(BaseModel):
     similar_projects: List[SimilarProject] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class SimilarityBatchRequest(BaseModel):
+    year: int
+    team_project_ids: Optional[List[int]] = None  # Default: every pending TeamProject of the year
+    min_score: float = Field(0.5, ge=0.0, le=1.0)
+    top_k: int = Field(10, ge=1, le=100)
+
+class SimilarityBatchJob(BaseModel):
+    job_id: str
+    status: str  # queued, running, done or failed
+    year: int
+    total: int
+    done: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class GraphNode(BaseModel):
+    source: str  # Project, College Idea or Team Project
+    id: int
+    title: str
+
+class GraphNeighbour(GraphNode):
+    similarity_score: float
+
+class SimilarityClusters(BaseModel):
+    year: int
+    threshold: float
+    clusters: List[List[GraphNode]]
+
+class ProjectImportError(BaseModel):
+    line: int  # line of the row in the uploaded file
+    title: Optional[str] = None
+    error: str
+
+class ProjectImportReport(BaseModel):
+    imported: int
+    failed: int
+    years: List[int]  # academic years whose similarity graph is being rebuilt
+    errors: List[ProjectImportError]
+    errors_truncated: bool = False
+
+class SearchHit(BaseModel):
+    source: str  # Project, College Idea or Team Project
+    id: int
+    year: int
+    score: float
+    title: str
+    # HTML-escaped, matched words wrapped in <mark>
+    title_highlight: str
+    snippet: str
+
+class SearchResults(BaseModel):
+    query: str
+    total: int  # matches across all pages
+    results: List[SearchHit]
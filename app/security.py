@@ -1,5 +1,7 @@
 from datetime import timedelta, datetime
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from jose import jwt
 from passlib.context import CryptContext
 import os
@@ -13,11 +15,31 @@ USER_ACCESS_TOKEN_EXPIRE_MINUTES = 360  # Expiration time for regular users
 ADMIN_ACCESS_TOKEN_EXPIRE_MINUTES = 720  # Expiration time for admins (12 hours)
 SUPERVISOR_ACCESS_TOKEN_EXPIRE_MINUTES = 720  # Expiration time for supervisors (12 hours)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt work factor; stored hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+# Threads available for hashing; bcrypt releases the GIL while it works
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '4'))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 def getHashedPassword(password: str):
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    """Hash a password on the hashing thread pool instead of the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, pwd_context.hash, password)
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hashing thread pool.
+    Returns (valid, new_hash); new_hash is set when the stored hash was made
+    with a different work factor and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, pwd_context.verify_and_update, password, hashed_password)
+
 def create_access_token(data: dict, is_admin: bool = False, is_supervisor: bool = False, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
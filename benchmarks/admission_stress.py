@@ -0,0 +1,141 @@
+"""
+Concurrent stress test of proposal admission (/v1/add-project-idea).
+
+Submits groups of near-identical ideas from different teams at the same
+instant, mixed with unrelated ideas, through check_similarity_multi_table
+with one session per request as uvicorn would. Fails if more than one idea
+of a group is admitted, i.e. if two near-duplicates both passed the
+similarity check. Also reports how many unrelated ideas were admitted and
+the wall time of each round, so throughput regressions show up too.
+
+    python -m benchmarks.admission_stress --groups 10 --copies 4 --unrelated 20 --rounds 3
+
+Runs on a temporary SQLite database unless DATABASE_URL is set; point it at
+a scratch database only, as it seeds users, teams and projects into the
+current academic year. Exits with status 1 on a violation.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument("--unrelated", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--corpus", type=int, default=300)
+    return parser.parse_args()
+
+
+def academic_year():
+    now = datetime.now()
+    return now.year + 1 if now.month in (10, 11, 12) else now.year
+
+
+async def seed(args, year, corpus):
+    from sqlalchemy import insert, select
+    from app import models
+    from app.db import engine, sessionLocal
+
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+
+    teams = args.rounds * (args.groups * args.copies + args.unrelated)
+    async with sessionLocal() as db:
+        if not await db.scalar(select(models.Admin.id).where(models.Admin.email == "stress@example.com")):
+            db.add(models.Admin(username="stress", email="stress@example.com", hashed_password="-", degree="A"))
+            db.add(models.User(username="stress", email="stress@example.com", hashed_password="-",
+                               firstName="Stress", lastName="Test"))
+            await db.commit()
+        await db.execute(insert(models.Project), [
+            {"title": title, "description": description, "tools": "python", "uploader": "stress@example.com",
+             "supervisor": "stress", "year": year}
+            for title, description in corpus
+        ])
+        result = await db.execute(insert(models.Team).returning(models.Team.id), [
+            {"name": f"stress team {time.time_ns()} {i}", "description": "-", "created_by": "stress@example.com"}
+            for i in range(teams)
+        ])
+        team_ids = list(result.scalars())
+        await db.commit()
+    return team_ids
+
+
+async def submit(team_id, title, description):
+    from app import schemas
+    from app.db import sessionLocal
+    from controllers.check_similarity import check_similarity_multi_table
+
+    async with sessionLocal() as db:
+        response = await check_similarity_multi_table(
+            schemas.checkProject(title=title, description=description), team_id, db
+        )
+    return response.status == "pending"
+
+
+async def main(args):
+    from benchmarks.similarity_regression import CorpusGenerator
+    from app.db import engine, sync_engine
+    from controllers import similarity_graph
+    from controllers.similarity_pool import similarity_pool
+
+    year = academic_year()
+    generator = CorpusGenerator(20260201)
+    corpus = [generator.document(f"stress corpus {i}") for i in range(args.corpus)]
+    team_ids = iter(await seed(args, year, corpus))
+    # Start the workers and load the year before timing anything
+    await similarity_pool.warm_up()
+
+    violations = 0
+    for number in range(args.rounds):
+        submissions, groups = [], []
+        for group in range(args.groups):
+            title, description = generator.document(f"stress round {number} group {group}")
+            groups.append(len(submissions))
+            for copy in range(args.copies):
+                _, variant = generator.variant(title, description, 0.1)
+                submissions.append((next(team_ids), f"{title} copy {copy}", variant))
+        for i in range(args.unrelated):
+            title, description = generator.document(f"stress round {number} idea {i}")
+            submissions.append((next(team_ids), title, description))
+
+        start = time.perf_counter()
+        admitted = await asyncio.gather(*[submit(*submission) for submission in submissions])
+        elapsed = time.perf_counter() - start
+
+        duplicates = [sum(admitted[first:first + args.copies]) for first in groups]
+        round_violations = sum(count > 1 for count in duplicates)
+        violations += round_violations
+        print(
+            f"round {number + 1}: {len(submissions)} submissions in {elapsed:6.2f} s"
+            f"  groups with one admitted {sum(count == 1 for count in duplicates)}/{args.groups}"
+            f"  with several {round_violations}"
+            f"  unrelated admitted {sum(admitted[args.groups * args.copies:])}/{args.unrelated}"
+        )
+
+    await asyncio.gather(*similarity_graph._background_tasks)
+    similarity_pool.shutdown()
+    await engine.dispose()
+    sync_engine.dispose()
+    return violations
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(), "admission_stress.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    # Every submission is in flight at once; do not let the pool shed them
+    os.environ.setdefault(
+        "SIMILARITY_QUEUE_SIZE", str(2 * (args.groups * args.copies + args.unrelated))
+    )
+    violations = asyncio.run(main(args))
+    if violations:
+        print(f"FAIL: {violations} group(s) had several near-identical ideas admitted")
+        sys.exit(1)
@@ -0,0 +1,120 @@
+"""
+Concurrent throughput of the blocking Session layer against the AsyncSession layer.
+
+Runs the archive-by-id lookup from many concurrent tasks on one event loop,
+the way uvicorn runs request handlers, and probes event loop latency (what
+/health would see) while the load is running.
+
+    python -m benchmarks.db_load --concurrency 50 --requests 2000
+    DATABASE_URL=mysql+aiomysql://user:pw@host/db python -m benchmarks.db_load
+
+Without DATABASE_URL a temporary SQLite database is seeded and used.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=1000)
+    return parser.parse_args()
+
+
+async def probe_loop(stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        latencies.append(time.perf_counter() - start - 0.005)
+
+
+async def run_load(name, handler, args):
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i % args.projects + 1)
+
+    async def worker():
+        while not queue.empty():
+            await handler(queue.get_nowait())
+
+    stop = asyncio.Event()
+    latencies = []
+    probe = asyncio.create_task(probe_loop(stop, latencies))
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(
+        f"{name:>12}: {args.requests / elapsed:8.1f} req/s"
+        f"  loop lag p50 {statistics.median(latencies or [0]) * 1000:6.2f} ms"
+        f"  p99 {p99 * 1000:6.2f} ms"
+    )
+
+
+async def main(args):
+    from sqlalchemy import select
+    from app import models
+    from app.db import engine, sessionLocal, sync_engine, syncSessionLocal
+
+    query = select(
+        models.Project.id,
+        models.Project.title,
+        models.Project.description,
+        models.ProjectTeamMember.email
+    ).outerjoin(
+        models.ProjectTeamMember,
+        models.ProjectTeamMember.project_id == models.Project.id
+    )
+
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+
+    async with sessionLocal() as db:
+        if not await db.scalar(select(models.Admin).where(models.Admin.email == "bench@example.com")):
+            db.add(models.Admin(username="bench", email="bench@example.com", hashed_password="-", degree="A"))
+        existing = await db.scalar(select(models.Project.id).order_by(models.Project.id.desc()))
+        for i in range((existing or 0) + 1, args.projects + 1):
+            db.add(models.Project(
+                title=f"Benchmark project {i}",
+                description=f"Synthetic description {i} " * 20,
+                tools="python fastapi",
+                uploader="bench@example.com",
+                supervisor="bench",
+                year=2025
+            ))
+        await db.commit()
+
+    async def blocking_handler(project_id):
+        # What every async def route did before: a blocking Session inside the coroutine
+        db = syncSessionLocal()
+        try:
+            db.execute(query.where(models.Project.id == project_id)).all()
+        finally:
+            db.close()
+
+    async def async_handler(project_id):
+        async with sessionLocal() as db:
+            (await db.execute(query.where(models.Project.id == project_id))).all()
+
+    await run_load("Session", blocking_handler, args)
+    await run_load("AsyncSession", async_handler, args)
+
+    await engine.dispose()
+    sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(), "db_load.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(args))
@@ -0,0 +1,128 @@
+"""
+Time to first byte, throughput and memory of the streaming exports.
+
+Seeds projects (with team members) and college ideas, then consumes the
+bodies of /v1/export/archive and /v1/export/college-ideas in process, in
+each format, and reports time to the first chunk, total time, bytes and
+the peak Python memory traced while streaming (in a second, traced pass). The list endpoint
+/v1/college-ideas is measured the same way for comparison.
+
+    python -m benchmarks.export_stream --rows 100000
+
+Runs on a temporary SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    return parser.parse_args()
+
+
+async def seed(rows):
+    from sqlalchemy import func, insert, select
+    from app import models
+    from app.db import engine, sessionLocal
+
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+    async with sessionLocal() as db:
+        if await db.scalar(select(func.count()).select_from(models.Project)) >= rows:
+            return
+        db.add(models.Admin(username="export", email="export@example.com", hashed_password="-", degree="A"))
+        db.add(models.Supervisors(username="export", email="export@example.com", hashed_password="-",
+                                  firstName="Ex", lastName="Port", university="DMU", department="CS"))
+        for start in range(0, rows, 5000):
+            numbers = range(start, min(start + 5000, rows))
+            await db.execute(insert(models.Project), [
+                {"title": f"Export project {i}", "description": f"Synthetic archive description {i} " * 10,
+                 "tools": "python fastapi mysql", "uploader": "export@example.com", "supervisor": "export",
+                 "year": 2015 + i % 10}
+                for i in numbers
+            ])
+            await db.execute(insert(models.CollegeIdeas), [
+                {"title": f"Export idea {i}", "description": f"Synthetic idea description {i} " * 10,
+                 "supervisor_email": "export@example.com", "year": 2015 + i % 10, "status": "open"}
+                for i in numbers
+            ])
+        await db.commit()
+        ids = (await db.scalars(select(models.Project.id))).all()
+        for start in range(0, len(ids), 5000):
+            await db.execute(insert(models.ProjectTeamMember), [
+                {"project_id": id, "firstName": "Member", "lastName": str(n), "email": f"m{n}.{id}@example.com",
+                 "is_leader": n == 0}
+                for id in ids[start:start + 5000] for n in range(3)
+            ])
+        await db.commit()
+
+
+async def consume(make_body):
+    start = time.perf_counter()
+    first, size = None, 0
+    async for chunk in make_body():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    return first, time.perf_counter() - start, size
+
+
+async def measure(name, make_body):
+    # Timed without tracing (tracemalloc slows allocation-heavy code a lot),
+    # then once more for the memory peak
+    first, elapsed, size = await consume(make_body)
+    tracemalloc.start()
+    await consume(make_body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>34}: first chunk {first * 1000:8.1f} ms  total {elapsed:6.2f} s"
+        f"  {size / 2 ** 20:7.1f} MB out  peak {peak / 2 ** 20:7.1f} MB"
+    )
+
+
+async def main(args):
+    from pydantic import TypeAdapter
+    from app import routes
+    from app.db import engine, sessionLocal
+
+    await seed(args.rows)
+
+    for format in ("ndjson", "csv"):
+        for gzip in (False, True):
+            async def body(format=format, gzip=gzip):
+                response = await routes.export_archive(format=format, gzip=gzip, year=None, supervisor=None,
+                                                       include_members=True)
+                async for chunk in response.body_iterator:
+                    yield chunk
+            await measure(f"archive {format}{' gzip' if gzip else ''} with members", body)
+
+        async def ideas(format=format):
+            response = await routes.export_college_ideas(format=format, gzip=False, year=None, idea_status=None)
+            async for chunk in response.body_iterator:
+                yield chunk
+        await measure(f"college ideas {format}", ideas)
+
+    async def listed():
+        # What the reporting jobs scrape today: the whole list, validated
+        # against the response model and serialized as one body
+        async with sessionLocal() as db:
+            ideas = await routes.college_idea(title=None, db=db)
+        adapter = TypeAdapter(list[routes.schemas.CollegeIdeaResponse])
+        yield adapter.dump_json(adapter.validate_python(ideas))
+    await measure("GET /v1/college-ideas (list)", listed)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(), "export_stream.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    asyncio.run(main(args))
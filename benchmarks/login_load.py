@@ -0,0 +1,101 @@
+"""
+Login throughput at 50/200/500 concurrent users.
+
+Drives POST /v1/token through the ASGI app while probing /health, once with
+bcrypt verification inline on the event loop (the old behaviour) and once on
+the hashing thread pool.
+
+    python -m benchmarks.login_load
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=8 python -m benchmarks.login_load --users 50 200
+
+Without DATABASE_URL a temporary SQLite database is seeded and used.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[50, 200, 500])
+    return parser.parse_args()
+
+
+async def probe_health(client, stop: asyncio.Event, latencies: list):
+    # Time from when the probe should fire to when /health has answered,
+    # so a blocked event loop shows up as latency
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        await client.get("/health")
+        latencies.append(time.perf_counter() - start - 0.01)
+
+
+async def run_level(client, users: int):
+    stop = asyncio.Event()
+    latencies = []
+    probe = asyncio.create_task(probe_health(client, stop, latencies))
+
+    async def login(i):
+        response = await client.post("/v1/token", json={"email": f"bench{i}@example.com", "password": "benchmark"})
+        assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*[login(i) for i in range(users)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] if latencies else 0.0
+    return users / elapsed, statistics.median(latencies or [0]), p99
+
+
+async def main(args):
+    import httpx
+    from main import app
+    from app import models, security
+    from app.db import sessionLocal
+
+    async with app.router.lifespan_context(app):
+        hashed = security.getHashedPassword("benchmark")
+        async with sessionLocal() as db:
+            for i in range(max(args.users)):
+                db.add(models.User(
+                    username=f"bench{i}",
+                    email=f"bench{i}@example.com",
+                    hashed_password=hashed,
+                    firstName="Bench",
+                    lastName="User"
+                ))
+            await db.commit()
+
+        pooled_verify = security.verify_password
+
+        async def inline_verify(password, hashed_password):
+            return security.pwd_context.verify_and_update(password, hashed_password)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            print(f"bcrypt rounds {security.BCRYPT_ROUNDS}, hashing threads {security.PASSWORD_HASH_WORKERS}")
+            for mode, verify in (("inline", inline_verify), ("thread pool", pooled_verify)):
+                security.verify_password = verify
+                for users in args.users:
+                    rate, p50, p99 = await run_level(client, users)
+                    print(
+                        f"{mode:>11} {users:4d} users: {rate:8.1f} logins/s"
+                        f"  /health p50 {p50 * 1000:8.1f} ms  p99 {p99 * 1000:8.1f} ms"
+                    )
+            security.verify_password = pooled_verify
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(), "login_load.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ.setdefault("SEC_KEY", "benchmark")
+    asyncio.run(main(args))
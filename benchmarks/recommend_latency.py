@@ -0,0 +1,116 @@
+"""
+Recommendation latency of the in-process engines against the remote service.
+
+Scores a synthetic student against the teams and a synthetic team against
+the students, as /v1/student/recommef-for-me and /v1/team/recommend-for-us
+do: once against every profile ("full") and once against the candidates
+the skill index pre-selects ("indexed"), which is what the routes do.
+
+    python -m benchmarks.recommend_latency --profiles 1000 10000
+    python -m benchmarks.recommend_latency --remote   # also time RECOMMENDER_URL
+
+The remote run posts synthetic data to the external service, so it is off
+by default.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+SKILLS = [
+    "Python", "FastAPI", "Django", "Flask", "React", "React Native", "Vue", "Angular",
+    "Node.js", "Express", "Java", "Spring Boot", "Kotlin", "Swift", "Flutter", "Dart",
+    "C++", "C#", ".NET", "Go", "Rust", "SQL", "MySQL", "PostgreSQL", "MongoDB", "Redis",
+    "Docker", "Kubernetes", "AWS", "Azure", "Machine Learning", "Deep Learning",
+    "Computer Vision", "NLP", "Data Analysis", "Pandas", "TensorFlow", "PyTorch",
+    "UI/UX", "Figma", "Cyber Security", "Networking", "Linux", "Git", "GraphQL",
+]
+TITLES = [
+    "Backend Developer", "Frontend Developer", "Full Stack Developer", "Mobile Developer",
+    "Data Scientist", "ML Engineer", "DevOps Engineer", "UI Designer", "Security Analyst", None,
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--remote", action="store_true")
+    return parser.parse_args()
+
+
+def make_profiles(count, rng):
+    from controllers.recommender import Profile
+    return [
+        Profile(id=i, title=rng.choice(TITLES), skills=rng.sample(SKILLS, rng.randint(1, 6)))
+        for i in range(1, count + 1)
+    ]
+
+
+async def measure(call, queries):
+    latencies = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+
+
+async def main(args):
+    from controllers.candidate_index import TermPostings
+    from controllers.recommender import LocalRecommender, RemoteRecommender, profile_terms
+
+    rng = random.Random(7)
+    engines = [("tfidf", LocalRecommender("tfidf")), ("bm25", LocalRecommender("bm25"))]
+    if args.remote:
+        engines.append(("remote", RemoteRecommender()))
+
+    for count in args.profiles:
+        teams = make_profiles(count, rng)
+        students = make_profiles(count, rng)
+        student, team = students[0], teams[0]
+
+        team_index, student_index = TermPostings(), TermPostings()
+        for profile in teams:
+            team_index.add(profile.id, profile_terms(profile, with_title=False))
+        for profile in students:
+            student_index.add(profile.id, profile_terms(profile))
+        teams_by_id = {profile.id: profile for profile in teams}
+        students_by_id = {profile.id: profile for profile in students}
+
+        async def indexed_teams(engine):
+            candidates = [teams_by_id[i] for i in team_index.candidates(profile_terms(student))]
+            return await engine.teams_for_student(student, candidates, stats=team_index.corpus_stats())
+
+        async def indexed_students(engine):
+            candidates = [
+                students_by_id[i]
+                for i in student_index.candidates(profile_terms(team, with_title=False), exclude={student.id})
+            ]
+            return await engine.students_for_team(team, candidates, stats=student_index.corpus_stats())
+
+        for name, engine in engines:
+            queries = args.queries if name != "remote" else min(args.queries, 20)
+            modes = [
+                ("full", lambda: engine.teams_for_student(student, teams),
+                 lambda: engine.students_for_team(team, students, exclude=[student.id])),
+            ]
+            if name != "remote":
+                modes.append(("indexed", lambda: indexed_teams(engine), lambda: indexed_students(engine)))
+            for mode, teams_call, students_call in modes:
+                p50_teams, p99_teams = await measure(teams_call, queries)
+                p50_users, p99_users = await measure(students_call, queries)
+                print(
+                    f"{name:>6} {mode:>7} {count:6d} profiles:"
+                    f"  teams p50 {p50_teams * 1000:7.2f} p99 {p99_teams * 1000:7.2f} ms"
+                    f"  users p50 {p50_users * 1000:7.2f} p99 {p99_users * 1000:7.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    # The candidate index imports the models; no database is touched
+    os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+    asyncio.run(main(parse_args()))
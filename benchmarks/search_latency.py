@@ -0,0 +1,162 @@
+"""
+Build time, size and query latency of the full-text search index.
+
+Seeds synthetic projects, college ideas and team ideas (the corpus
+generator of benchmarks.similarity_regression) into SQLite, loads the
+search index, then times /v1/search end to end in process (ranking,
+filters, the page's database read and highlighting) for one- to
+four-word queries, alone and with year/source filters, and the ranking
+step on its own. Finally reloads the index in the background, as the
+periodic refresh does, and reports the longest event loop stall meanwhile.
+
+    python -m benchmarks.search_latency --documents 100000 --queries 500
+    python -m benchmarks.search_latency --documents 100000 --max-p99-ms 50
+
+Runs on a temporary SQLite database unless DATABASE_URL is set. Exits
+with status 1 when --max-p99-ms is exceeded.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    return parser.parse_args()
+
+
+async def reload_stall(search_index):
+    """Longest gap between 10 ms ticks of the event loop while the index reloads in the background."""
+    search_index.start()
+    reload, worst, last = search_index._reload, 0.0, time.perf_counter()
+    while not reload.done():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        worst, last = max(worst, now - last - 0.01), now
+    return worst
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies) * 1000, latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+
+
+async def seed(documents):
+    from sqlalchemy import func, insert, select
+    from app import models
+    from app.db import engine, sessionLocal
+    from benchmarks.similarity_regression import CorpusGenerator
+
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+    generator = CorpusGenerator(20260301)
+    async with sessionLocal() as db:
+        if await db.scalar(select(func.count()).select_from(models.Project)):
+            return generator
+        db.add(models.Admin(username="search", email="search@example.com", hashed_password="-", degree="A"))
+        db.add(models.Supervisors(username="search", email="search@example.com", hashed_password="-",
+                                  firstName="Se", lastName="Arch", university="DMU", department="CS"))
+        # 80% archive projects, 10% college ideas, 10% team ideas
+        shares = [(models.Project, int(documents * 0.8)), (models.CollegeIdeas, documents // 10),
+                  (models.TeamProject, documents - int(documents * 0.8) - documents // 10)]
+        for model, count in shares:
+            rows = []
+            for i in range(count):
+                title, description = generator.document(f"{model.__tablename__} {i}")
+                row = {"title": title, "description": description, "year": 2015 + i % 12}
+                if model is models.Project:
+                    row.update(tools=" ".join(generator.rng.sample(["python", "java", "flutter", "react", "mysql",
+                                                                     "django", "arduino", "tensorflow"], 2)),
+                               uploader="search@example.com", supervisor="search")
+                elif model is models.CollegeIdeas:
+                    row.update(supervisor_email="search@example.com", status="open")
+                else:
+                    row.update(team_id=i + 1)
+                rows.append(row)
+            for start in range(0, len(rows), 5000):
+                await db.execute(insert(model), rows[start:start + 5000])
+        await db.commit()
+    return generator
+
+
+async def main(args):
+    from fastapi import Response
+    from app import routes
+    from app.db import engine, sessionLocal
+    from controllers.search_index import search_index
+    from controllers.similarity_pool import similarity_pool
+
+    generator = await seed(args.documents)
+
+    start = time.perf_counter()
+    await search_index.load()
+    build = time.perf_counter() - start
+    corpus = search_index.corpus
+    arrays = sum(array.nbytes for array in (corpus.indptr, corpus.post_docs, corpus.post_tfs, corpus.sources,
+                                             corpus.ids, corpus.years, corpus.lengths))
+    print(
+        f"index: {len(corpus)} documents, {len(corpus.vocabulary)} terms, {len(corpus.post_docs)} postings;"
+        f" built in {build:.1f} s, arrays {arrays / 2 ** 20:.0f} MB"
+    )
+
+    rng = random.Random(7)
+    queries = []
+    for _ in range(args.queries):
+        topic = rng.randrange(len(generator.topics))
+        queries.append(" ".join(generator.words(rng.randint(1, 4), topic)))
+
+    variants = [
+        ("no filters", {}),
+        ("year filter", {"year": 2020}),
+        ("source filter", {"source": ["college-idea", "team-project"]}),
+    ]
+    failed = False
+    async with sessionLocal() as db:
+        for name, filters in variants:
+            latencies, totals = [], []
+            for q in queries:
+                start = time.perf_counter()
+                result = await routes.search(Response(), q=q, year=filters.get("year"), source=filters.get("source"),
+                                             limit=args.limit, cursor=None, db=db)
+                latencies.append(time.perf_counter() - start)
+                totals.append(result.total)
+            p50, p99 = percentiles(latencies)
+            failed |= args.max_p99_ms is not None and p99 > args.max_p99_ms
+            print(f"  /v1/search {name:>13}: p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  median matches {statistics.median(totals):.0f}")
+
+        from controllers.text_processing import text_pipeline
+        latencies = []
+        for q in queries:
+            terms = text_pipeline.tokenize(q)
+            start = time.perf_counter()
+            corpus.search(terms, limit=args.limit)
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = percentiles(latencies)
+        print(f"  ranking only            : p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
+
+    start = time.perf_counter()
+    stall = await reload_stall(search_index)
+    print(f"  background reload       : {time.perf_counter() - start:.1f} s, longest event loop stall {stall * 1000:.1f} ms")
+
+    similarity_pool.shutdown()
+    await engine.dispose()
+    return failed
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(), "search_latency.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    if asyncio.run(main(args)):
+        print(f"FAIL: p99 above {args.max_p99_ms} ms")
+        sys.exit(1)
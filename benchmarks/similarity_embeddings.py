@@ -0,0 +1,181 @@
+"""
+Latency and recall of the embedding similarity engine against TF-IDF.
+
+ANN: builds the HNSW index (or the exact fallback without hnswlib) over
+synthetic clustered unit vectors, and reports build time, query p50/p99
+and recall@k against exact search.
+
+Paraphrases: generates a synthetic proposal corpus plus a reworded copy
+of some proposals (synonyms, reordering, dropped words), and reports how
+often each mode (tfidf, embedding, blend) ranks the original first and
+scores it above the 0.5 rejection threshold, with per-query latency.
+Needs sentence-transformers; skipped otherwise.
+
+    python -m benchmarks.similarity_embeddings --vectors 1000 10000 100000
+    python -m benchmarks.similarity_embeddings --skip-ann --documents 2000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+SUBJECTS = [
+    ("system", "platform", "application"), ("tracking", "monitoring", "following"),
+    ("students", "learners", "pupils"), ("university", "campus", "college"),
+    ("parking", "car park", "vehicle parking"), ("library", "book lending", "reading room"),
+    ("attendance", "presence", "class check-in"), ("booking", "reservation", "scheduling"),
+    ("clinic", "health centre", "medical office"), ("recommendation", "suggestion", "advice"),
+    ("chatbot", "conversational assistant", "virtual assistant"), ("detection", "recognition", "identification"),
+    ("fraud", "cheating", "dishonesty"), ("energy", "power", "electricity"),
+    ("farm", "agriculture", "crop field"), ("traffic", "road congestion", "vehicle flow"),
+    ("smart", "intelligent", "automated"), ("mobile", "smartphone", "phone"),
+    ("web", "online", "browser based"), ("sensors", "iot devices", "connected sensors"),
+]
+TECHNIQUES = [
+    ("machine learning", "statistical learning", "learned models"), ("computer vision", "image analysis", "camera vision"),
+    ("deep learning", "neural networks", "deep neural models"), ("blockchain", "distributed ledger", "shared ledger"),
+    ("natural language processing", "text understanding", "language models"), ("gps", "satellite positioning", "location data"),
+    ("rfid", "radio tags", "contactless tags"), ("cloud services", "hosted services", "remote servers"),
+]
+FILLER = ["for", "the", "of", "a", "an", "with", "using", "based", "on", "to", "and", "that", "helps", "in"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--paraphrases", type=int, default=200)
+    parser.add_argument("--skip-ann", action="store_true")
+    return parser.parse_args()
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies) * 1000, latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+
+
+def clustered_vectors(count, dim, rng):
+    centers = rng.standard_normal((max(count // 50, 1), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_ann(args):
+    from controllers.embeddings import HNSWLIB_AVAILABLE, VectorIndex
+
+    rng = np.random.default_rng(7)
+    print(f"ANN ({'hnswlib' if HNSWLIB_AVAILABLE else 'exact only, hnswlib not installed'}), dim {args.dim}, k {args.k}")
+    for count in args.vectors:
+        vectors = clustered_vectors(count + args.queries, args.dim, rng)
+        corpus, queries = vectors[:count], vectors[count:]
+
+        exact = VectorIndex(args.dim, approximate=False)
+        exact.add(corpus)
+        indexes = [("exact", exact, 0.0)]
+        if HNSWLIB_AVAILABLE:
+            start = time.perf_counter()
+            hnsw = VectorIndex(args.dim)
+            hnsw.add(corpus)
+            indexes.append(("hnsw", hnsw, time.perf_counter() - start))
+
+        truth = [set(exact.search(query, args.k)[0].tolist()) for query in queries]
+        for name, index, build in indexes:
+            latencies, hits = [], 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                rows, _ = index.search(query, args.k)
+                latencies.append(time.perf_counter() - start)
+                hits += len(expected & set(rows.tolist()))
+            p50, p99 = percentiles(latencies)
+            print(
+                f"  {name:>5} {count:7d} vectors: build {build:7.2f} s  p50 {p50:7.3f} ms  p99 {p99:7.3f} ms"
+                f"  recall@{args.k} {hits / (len(queries) * args.k):.3f}"
+            )
+
+
+def make_proposal(rng):
+    subjects = rng.sample(range(len(SUBJECTS)), 4)
+    technique = rng.randrange(len(TECHNIQUES))
+    return subjects, technique
+
+
+def render(proposal, rng, reword=False):
+    """The original wording, or a rewording: random synonyms, shuffled, maybe one concept dropped."""
+    subjects, technique = proposal
+    pick = (lambda: rng.randrange(3)) if reword else (lambda: 0)
+    words = [SUBJECTS[i][pick()] for i in subjects]
+    if reword:
+        rng.shuffle(words)
+        if rng.random() < 0.5:
+            words.pop()
+    title = " ".join(words[:2]).title()
+    text = []
+    for word in words + [TECHNIQUES[technique][pick()]]:
+        text.extend(rng.sample(FILLER, 2))
+        text.append(word)
+    return title, " ".join(text)
+
+
+def bench_paraphrases(args):
+    from controllers import embeddings
+    from controllers.embeddings import EmbeddingIndex, blend_scores
+    from controllers.similarity_index import SimilarityIndex, document_text, document_tokens
+
+    if not embeddings.SENTENCE_TRANSFORMERS_AVAILABLE:
+        print("Paraphrases: skipped, sentence-transformers is not installed")
+        return
+
+    rng = random.Random(7)
+    proposals = [make_proposal(rng) for _ in range(args.documents)]
+    originals = [render(proposal, rng) for proposal in proposals]
+    targets = rng.sample(range(args.documents), min(args.paraphrases, args.documents))
+    paraphrases = [render(proposals[i], rng, reword=True) for i in targets]
+
+    print(f"Paraphrases: {len(targets)} reworded queries against {args.documents} proposals ({embeddings.EMBEDDING_MODEL})")
+    start = time.perf_counter()
+    vectors = embeddings.encode([document_text(title, description) for title, description in originals])
+    print(f"  encoded corpus in {time.perf_counter() - start:.1f} s")
+
+    tfidf_index = SimilarityIndex(0)
+    tfidf_index.fit(
+        ("Project", i, title, document_tokens(title, description)) for i, (title, description) in enumerate(originals)
+    )
+    dense_index = EmbeddingIndex(0)
+    dense_index.add(("Project", i, title, vectors[i]) for i, (title, _) in enumerate(originals))
+
+    def tfidf(title, description):
+        return tfidf_index.query(title, description, with_ids=True)
+
+    def embedding(title, description):
+        return dense_index.query(embeddings.encode([document_text(title, description)])[0])
+
+    def blend(title, description):
+        vector = embeddings.encode([document_text(title, description)])[0]
+        return blend_scores(tfidf(title, description), dense_index, vector)
+
+    for name, score in (("tfidf", tfidf), ("embedding", embedding), ("blend", blend)):
+        latencies, top1, flagged = [], 0, 0
+        for target, (title, description) in zip(targets, paraphrases):
+            start = time.perf_counter()
+            results = score(title, description)
+            latencies.append(time.perf_counter() - start)
+            if results:
+                top1 += max(results, key=lambda result: result[3])[1] == target
+            flagged += any(result[1] == target and result[3] > 0.5 for result in results)
+        p50, p99 = percentiles(latencies)
+        print(
+            f"  {name:>9}: recall@1 {top1 / len(targets):.3f}  above 0.5 {flagged / len(targets):.3f}"
+            f"  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.skip_ann:
+        bench_ann(args)
+    bench_paraphrases(args)
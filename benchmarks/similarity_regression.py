@@ -0,0 +1,313 @@
+"""
+Scaling benchmark and decision-parity check for the proposal similarity path.
+
+Scale: seeds synthetic project descriptions (one academic year per corpus
+size) into SQLite and runs the worker side of /v1/add-project-idea,
+score_project_idea, in process. Reports the cold first query (load,
+tokenize and cache the year), a warm rebuild from the token cache, query
+p50/p99 and throughput, peak RSS, and a few full refits with the reference
+calculate_similarity_multi_source for comparison.
+
+Parity: replays the frozen cases of benchmarks/golden/similarity_decisions.json
+against their frozen corpus and fails if any accept/reject decision, or the
+set of documents above the 0.5 threshold, differs. Scores drifting by more
+than --score-tolerance are reported without failing.
+
+    python -m benchmarks.similarity_regression --sizes 1000 10000 100000
+    python -m benchmarks.similarity_regression --sizes 1000 --max-p99-ms 50
+    python -m benchmarks.similarity_regression --golden-only
+    python -m benchmarks.similarity_regression --update-golden   # after an intended change
+
+Seeds and creates tables, so it always runs on a fresh temporary SQLite
+database; DATABASE_URL (or a .env) is ignored. Pass --database-url to run
+against another database on purpose.
+Exits with status 1 on a parity failure or when --max-p99-ms is exceeded,
+so it can gate changes in CI.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "similarity_decisions.json")
+THRESHOLD = 0.5
+GOLDEN_YEAR = 2999
+SCALE_YEAR = 3000  # SCALE_YEAR + position of the size in --sizes
+
+DOMAIN_WORDS = """
+    system platform application mobile web smart intelligent automated online portal dashboard
+    students university campus college faculty courses lectures exams grades attendance library books
+    parking traffic vehicles drivers roads transport bus routes tracking gps location maps navigation
+    hospital clinic patients doctors appointments medical health records pharmacy diagnosis monitoring
+    farm agriculture crops irrigation soil weather sensors iot devices energy power solar consumption
+    machine learning deep neural network model prediction classification detection recognition vision
+    images camera video face speech voice language text chatbot assistant recommendation search
+    blockchain ledger security encryption authentication fraud privacy access control network cloud
+    shopping store products payments orders delivery inventory restaurant food menu booking reservation
+    hotel travel tourism events tickets social community volunteers charity donations jobs recruitment
+    game education learning children quiz virtual reality augmented simulation robot drone arduino
+    analysis data visualization reports statistics management administration employees schedule tasks
+""".split()
+SYLLABLES = ["ka", "ro", "mi", "tu", "sel", "van", "dor", "qi", "lex", "ba", "nur", "zan", "fi", "po", "ge"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--reference-queries", type=int, default=3)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="fail if any size's warm p99 exceeds this")
+    parser.add_argument("--score-tolerance", type=float, default=1e-6)
+    parser.add_argument("--golden-only", action="store_true")
+    parser.add_argument("--skip-golden", action="store_true")
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--database-url", default=None, help="database to seed instead of a temporary SQLite file")
+    return parser.parse_args()
+
+
+class CorpusGenerator:
+    """
+    Topic-mixture documents: most words from the document's topic, the rest
+    from a Zipf-distributed vocabulary with a long tail of made-up words, so
+    the vocabulary keeps growing with the corpus as real text does.
+    """
+
+    def __init__(self, seed: int, topics: int = 300, vocabulary: int = 20000, topic_share: float = 0.4):
+        self.rng = random.Random(seed)
+        self.topic_share = topic_share
+        tail = set()
+        while len(tail) < vocabulary - len(DOMAIN_WORDS):
+            tail.add("".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 4))))
+        self.vocabulary = DOMAIN_WORDS + sorted(tail)
+        self.weights = [1 / (rank + 1) for rank in range(len(self.vocabulary))]
+        self.topics = [self.rng.sample(DOMAIN_WORDS, 15) + self.rng.sample(self.vocabulary, 25) for _ in range(topics)]
+
+    def words(self, count, topic):
+        topic_words = self.topics[topic]
+        background = self.rng.choices(self.vocabulary, self.weights, k=count)
+        return [self.rng.choice(topic_words) if self.rng.random() < self.topic_share else word for word in background]
+
+    def document(self, number):
+        topic = self.rng.randrange(len(self.topics))
+        title = " ".join(self.words(self.rng.randint(3, 6), topic)).title()
+        return f"{title} {number}", " ".join(self.words(self.rng.randint(25, 80), topic))
+
+    def variant(self, title, description, change):
+        """A near copy: change of the words replaced or dropped."""
+        words = []
+        for word in description.split():
+            roll = self.rng.random()
+            if roll < change / 2:
+                continue
+            words.append(self.rng.choice(self.vocabulary) if roll < change else word)
+        return f"{title} revised", " ".join(words)
+
+
+def queries_for(generator, corpus, count):
+    """Half near copies of stored documents (at varying distance), half fresh ones."""
+    queries = []
+    for i in range(count):
+        if i % 2 == 0:
+            title, description = generator.rng.choice(corpus)
+            queries.append(generator.variant(title, description, generator.rng.choice((0.1, 0.3, 0.5, 0.7))))
+        else:
+            queries.append(generator.document(f"query {i}"))
+    return queries
+
+
+def seed_year(year, corpus):
+    from sqlalchemy import insert
+    from app import models
+    from app.db import syncSessionLocal
+
+    db = syncSessionLocal()
+    try:
+        if not db.get(models.Admin, 1):
+            db.add(models.Admin(id=1, username="bench", email="bench@example.com", hashed_password="-", degree="A"))
+            db.commit()
+        for start in range(0, len(corpus), 5000):
+            db.execute(insert(models.Project), [
+                {"title": title, "description": description, "tools": "python", "uploader": "bench@example.com",
+                 "supervisor": "bench", "year": year}
+                for title, description in corpus[start:start + 5000]
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies) * 1000, latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+
+
+def bench_size(position, size, args):
+    from controllers import similarity_index
+    from controllers.similarity_jobs import score_project_idea
+    from controllers.similarity_scores import calculate_similarity_multi_source
+
+    year = SCALE_YEAR + position
+    generator = CorpusGenerator(seed=size)
+    corpus = [generator.document(f"{position}.{i}") for i in range(size)]
+    start = time.perf_counter()
+    seed_year(year, corpus)
+    seeded = time.perf_counter() - start
+    queries = queries_for(generator, corpus, args.queries)
+
+    start = time.perf_counter()
+    score_project_idea(year, *queries[0])
+    cold = time.perf_counter() - start
+
+    # Drop the in-memory index: the rebuild reads the token cache
+    similarity_index._indexes.pop(year, None)
+    start = time.perf_counter()
+    score_project_idea(year, *queries[0])
+    warm = time.perf_counter() - start
+
+    latencies, rejected = [], 0
+    start = time.perf_counter()
+    for title, description in queries:
+        query_start = time.perf_counter()
+        scores = score_project_idea(year, title, description)
+        latencies.append(time.perf_counter() - query_start)
+        rejected += any(score > THRESHOLD for _, _, _, score in scores)
+    throughput = len(queries) / (time.perf_counter() - start)
+    p50, p99 = percentiles(latencies)
+
+    reference = []
+    documents = [SimpleNamespace(title=title, description=description) for title, description in corpus]
+    for title, description in queries[:args.reference_queries]:
+        query_start = time.perf_counter()
+        calculate_similarity_multi_source(SimpleNamespace(title=title, description=description), documents, [], [])
+        reference.append(time.perf_counter() - query_start)
+
+    print(
+        f"{size:7d} docs: seed {seeded:6.1f} s  cold {cold * 1000:8.1f} ms  warm rebuild {warm * 1000:8.1f} ms"
+        f"  query p50 {p50:7.2f} ms p99 {p99:7.2f} ms  {throughput:7.1f} q/s"
+        f"  rejected {rejected}/{len(queries)}  peak RSS {peak_rss_mb():7.1f} MB"
+        + (f"  refit p50 {statistics.median(reference) * 1000:8.1f} ms" if reference else "")
+    )
+    return p99
+
+
+def decision(scores):
+    """Accept/reject and the same-year documents above the threshold, as check_similarity decides."""
+    from controllers.similarity_index import SOURCES
+
+    same_year = [(source, title, score) for source, _, title, score in scores if source in SOURCES]
+    similar = sorted([source, title] for source, title, score in same_year if score > THRESHOLD)
+    return {
+        "rejected": bool(similar),
+        "similar": similar,
+        "max_score": round(max((score for _, _, score in same_year), default=0.0), 6),
+    }
+
+
+def make_golden():
+    generator = CorpusGenerator(seed=20260101, topics=60, vocabulary=3000)
+    corpus = [generator.document(i) for i in range(300)]
+    cases = queries_for(generator, corpus, 80)
+    return corpus, cases
+
+
+def check_golden(args) -> bool:
+    from controllers.similarity_jobs import score_project_idea
+    from controllers.similarity_scores import calculate_similarity_multi_source
+    from controllers.text_processing import text_pipeline
+
+    if args.update_golden:
+        corpus, cases = make_golden()
+    else:
+        with open(GOLDEN_PATH) as f:
+            golden = json.load(f)
+        corpus = [(doc["title"], doc["description"]) for doc in golden["corpus"]]
+        cases = [(case["title"], case["description"]) for case in golden["cases"]]
+        if golden["pipeline"] != text_pipeline.signature:
+            print(f"golden: recorded with text pipeline {golden['pipeline']}, running {text_pipeline.signature}")
+
+    seed_year(GOLDEN_YEAR, corpus)
+    documents = [SimpleNamespace(title=title, description=description) for title, description in corpus]
+    results = []
+    for title, description in cases:
+        result = decision(score_project_idea(GOLDEN_YEAR, title, description))
+        reference = calculate_similarity_multi_source(
+            SimpleNamespace(title=title, description=description), documents, [], []
+        )
+        result["reference_rejected"] = any(score > THRESHOLD for _, _, score in reference)
+        results.append(result)
+
+    if args.update_golden:
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w") as f:
+            json.dump({
+                "threshold": THRESHOLD,
+                "pipeline": text_pipeline.signature,
+                "corpus": [{"title": title, "description": description} for title, description in corpus],
+                "cases": [
+                    {"title": title, "description": description, "rejected": result["rejected"],
+                     "similar": result["similar"], "max_score": result["max_score"]}
+                    for (title, description), result in zip(cases, results)
+                ],
+            }, f, indent=1, ensure_ascii=False)
+        print(f"golden: wrote {len(cases)} cases ({sum(r['rejected'] for r in results)} rejected) to {GOLDEN_PATH}")
+        return True
+
+    failures, drifted = 0, 0
+    for i, (case, result) in enumerate(zip(golden["cases"], results)):
+        problems = []
+        if result["rejected"] != case["rejected"] or result["similar"] != case["similar"]:
+            problems.append(
+                f"expected rejected={case['rejected']} {case['similar']},"
+                f" got rejected={result['rejected']} {result['similar']}"
+            )
+        elif abs(result["max_score"] - case["max_score"]) > args.score_tolerance:
+            drifted += 1
+        if result["reference_rejected"] != result["rejected"]:
+            problems.append("index and reference refit disagree")
+        if problems:
+            failures += 1
+            print(f"golden case {i} '{case['title']}': " + "; ".join(problems))
+    print(
+        f"golden: {len(results) - failures}/{len(results)} decisions match,"
+        f" {drifted} max scores drifted beyond {args.score_tolerance}"
+    )
+    return failures == 0
+
+
+def main(args):
+    from app import models
+    from app.db import sync_engine
+
+    models.Base.metadata.create_all(sync_engine)
+    ok = True
+    if not args.skip_golden or args.golden_only or args.update_golden:
+        ok = check_golden(args)
+    if not (args.golden_only or args.update_golden):
+        for position, size in enumerate(args.sizes):
+            p99 = bench_size(position, size, args)
+            if args.max_p99_ms is not None and p99 > args.max_p99_ms:
+                print(f"{size} docs: p99 {p99:.2f} ms exceeds the {args.max_p99_ms} ms budget")
+                ok = False
+    sync_engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Set before app.db is imported, which reads it (and never lets .env override it)
+    os.environ["DATABASE_URL"] = args.database_url or (
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'similarity_regression.db')}"
+    )
+    # One process, no pool: score_project_idea is what each worker runs
+    sys.exit(0 if main(args) else 1)
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from controllers.recommender import CorpusStats, Profile, profile_terms
+
+# At most this many candidates (by number of shared terms) are scored per request
+RECOMMEND_CANDIDATES = int(os.getenv("RECOMMEND_CANDIDATES", "500"))
+# Reload from the database at this interval to pick up writes made by other workers
+CANDIDATE_INDEX_REFRESH = float(os.getenv("CANDIDATE_INDEX_REFRESH", "300"))
+
+
+class TermPostings:
+    """Inverted index from normalized skill/tool term to the ids having it."""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = {}
+        self.terms: Dict[int, List[str]] = {}
+        self.doc_freq: Dict[str, int] = {}
+        self.total_length = 0
+
+    def add(self, id: int, terms: List[str]):
+        self.remove(id)
+        self.terms[id] = terms
+        self.total_length += len(terms)
+        for term in set(terms):
+            self.postings.setdefault(term, set()).add(id)
+            self.doc_freq[term] = len(self.postings[term])
+
+    def remove(self, id: int):
+        terms = self.terms.pop(id, None)
+        if terms is None:
+            return
+        self.total_length -= len(terms)
+        for term in set(terms):
+            ids = self.postings[term]
+            ids.discard(id)
+            self.doc_freq[term] = len(ids)
+            if not ids:
+                del self.postings[term]
+                del self.doc_freq[term]
+
+    def candidates(self, terms: List[str], exclude: Set[int] = frozenset(), limit: int = RECOMMEND_CANDIDATES) -> List[int]:
+        """Ids sharing at least one term, most shared terms first."""
+        overlap = Counter()
+        for term in set(terms):
+            overlap.update(self.postings.get(term, ()))
+        ranked = sorted(
+            ((id, shared) for id, shared in overlap.items() if id not in exclude),
+            key=lambda item: (-item[1], item[0])
+        )
+        return [id for id, _ in ranked[:limit]]
+
+    def corpus_stats(self) -> CorpusStats:
+        n_docs = len(self.terms)
+        return CorpusStats(
+            n_docs=n_docs,
+            doc_freq=self.doc_freq,
+            avg_length=self.total_length / n_docs if n_docs else 0.0
+        )
+
+
+class CandidateIndex:
+    """
+    Skill/tool postings for users (skills and title) and teams (expec_tools),
+    plus which users already belong to a team.
+
+    Loaded from the database on first use and every CANDIDATE_INDEX_REFRESH
+    seconds; register and create_team update it in between.
+    """
+
+    def __init__(self, refresh_seconds: float = CANDIDATE_INDEX_REFRESH):
+        self.refresh_seconds = refresh_seconds
+        self.users = TermPostings()
+        self.teams = TermPostings()
+        self.user_ids: Dict[str, int] = {}
+        self.in_team: Set[int] = set()
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def build(self, users: Iterable[Tuple[str, Profile]], teams: Iterable[Profile], member_emails: Iterable[str]):
+        self.users, self.teams = TermPostings(), TermPostings()
+        self.user_ids, self.in_team = {}, set()
+        for email, profile in users:
+            self.add_user(email, profile)
+        for profile in teams:
+            self.teams.add(profile.id, profile_terms(profile, with_title=False))
+        self.add_members(member_emails)
+        self.loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.refresh_seconds:
+                return
+            users = (await db.execute(select(
+                models.User.id, models.User.email, models.User.title, models.User.skills
+            ))).all()
+            teams = (await db.execute(select(models.Team.id, models.Team.name, models.Team.expec_tools))).all()
+            members = (await db.scalars(select(models.TeamMember.user_email))).all()
+            self.build(
+                ((row.email, Profile(id=row.id, title=row.title, skills=row.skills)) for row in users),
+                (Profile(id=row.id, title=row.name, skills=row.expec_tools) for row in teams),
+                members
+            )
+
+    def add_user(self, email: str, profile: Profile):
+        self.user_ids[email] = profile.id
+        self.users.add(profile.id, profile_terms(profile))
+
+    def add_team(self, profile: Profile, member_emails: Iterable[str]):
+        self.teams.add(profile.id, profile_terms(profile, with_title=False))
+        self.add_members(member_emails)
+
+    def add_members(self, member_emails: Iterable[str]):
+        self.in_team.update(self.user_ids[email] for email in member_emails if email in self.user_ids)
+
+    def team_candidates(self, student: Profile) -> List[int]:
+        return self.teams.candidates(profile_terms(student))
+
+    def user_candidates(self, team: Profile) -> List[int]:
+        # Users who already belong to a team are dropped in the same pass
+        return self.users.candidates(profile_terms(team, with_title=False), exclude=self.in_team)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.users.terms),
+            "teams": len(self.teams.terms),
+            "user_terms": len(self.users.postings),
+            "team_terms": len(self.teams.postings),
+            "users_in_team": len(self.in_team),
+        }
+
+
+candidate_index = CandidateIndex()
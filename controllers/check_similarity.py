@@ -1,18 +1,64 @@
 from fastapi import Depends, HTTPException, status, APIRouter
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import StreamingResponse
 
 from app import auth, models, schemas, security
 from app.db import get_db
+from app.response_cache import response_cache
 from app.models import User, Admin
+import logging
 import os
 from datetime import datetime
-from controllers.similarity_scores import calculate_similarity_multi_source
+from controllers.embeddings import resolve_mode
+from controllers.similarity_jobs import score_project_idea
+from controllers.similarity_pool import similarity_pool
+from controllers import proposal_admission, similarity_graph
 
-def check_similarity_multi_table(project: schemas.checkProject, team_id: int, db: Session):
+logger = logging.getLogger(__name__)
+
+
+def summarize_similarities(all_similarities):
+    """Return the maximum score and the (source, title, score) matches above 0.5."""
+    max_similarity = 0.0
+    if all_similarities:
+        max_similarity = max([score for _, _, _, score in all_similarities])
+
+    similar_projects = [
+        (source, title, score)
+        for source, _, title, score in all_similarities
+        if score > 0.5
+    ]
+    return max_similarity, similar_projects
+
+
+def rejected_response(max_similarity, similar_projects):
+    return schemas.ProjectIdeaResponse(
+        success=False,
+        message="There are projects similar to your idea due to DMU policy",
+        project_id=None,
+        max_similarity_score=f"{max_similarity:.2f}",
+        status="rejected",
+        similar_projects=[
+            {
+                "source": source,
+                "title": title,
+                "similarity_score": f"{score:.2f}"
+            }
+            for source, title, score in similar_projects
+        ]
+    )
+
+
+async def check_similarity_multi_table(project: schemas.checkProject, team_id: int, db: AsyncSession, mode: str = None):
     """
     Check similarity against projects, college ideas, and team projects.
     Add to TeamProject table if similarity is acceptable.
+    mode is tfidf, embedding or blend (default: SIMILARITY_MODE).
+
+    Scoring runs without any lock. Only an accepted proposal enters the
+    year's admission critical section, where it is scored again if another
+    proposal was admitted in the meantime, so two near-identical ideas
+    submitted at once can never both be accepted.
     """
     try:
         cur_date = datetime.now()
@@ -22,57 +68,38 @@ def check_similarity_multi_table(project: schemas.checkProject, team_id: int, db
         # Adjust year for academic calendar
         if cur_month in [10, 11, 12]:
             cur_year += 1
-        
-        # Fetch from three tables (removing preprojects dependency)
-        projects = db.query(models.Project).filter(
-            models.Project.year == cur_year
-        ).all()
-        
-        college_ideas = db.query(models.CollegeIdeas).filter(
-            models.CollegeIdeas.year == cur_year
-        ).all()
-        
-        team_projects = db.query(models.TeamProject).filter(
-            models.TeamProject.year == cur_year
-        ).all()
+        mode = resolve_mode(mode)
+
+        # Admissions seen by the scoring below
+        version = await proposal_admission.read_version(db, cur_year)
 
-        # Calculate similarities across all sources
-        all_similarities = calculate_similarity_multi_source(
-            project, projects, college_ideas, team_projects
+        # Score against the year's projects, college ideas and team projects
+        # in a similarity worker, off the event loop
+        all_similarities = await similarity_pool.run(
+            score_project_idea, cur_year, project.title, project.description, mode
         )
         
-        # Find maximum similarity score
-        max_similarity = 0.0
-        if all_similarities:
-            max_similarity = max([score for _, _, score in all_similarities])
-        
-        # Check for similar projects (threshold > 0.5)
-        similar_projects = [
-            (source, title, score) 
-            for source, title, score in all_similarities 
-            if score > 0.5
-        ]
-
+        # Check for similar projects (threshold > 0.5). A rejection stands
+        # whatever is admitted concurrently: more documents never lower a match
+        max_similarity, similar_projects = summarize_similarities(all_similarities)
         if similar_projects:
-            # Return similar projects found
-            return schemas.ProjectIdeaResponse(
-                success=False,
-                message="There are projects similar to your idea due to DMU policy",
-                project_id=None,
-                max_similarity_score=f"{max_similarity:.2f}",
-                status="rejected",
-                similar_projects=[
-                    {
-                        "source": source, 
-                        "title": title, 
-                        "similarity_score": f"{score:.2f}"
-                    }
-                    for source, title, score in similar_projects
-                ]
-            )
-        else:
-            # Add to TeamProject table
+            return rejected_response(max_similarity, similar_projects)
+
+        async with proposal_admission.year_lock(cur_year):
             try:
+                if await proposal_admission.lock_version(db, cur_year) != version:
+                    # Proposals were admitted while this one was scored; score
+                    # again so they are taken into account
+                    logger.info(f"Re-checking proposal '{project.title}' after concurrent admissions")
+                    all_similarities = await similarity_pool.run(
+                        score_project_idea, cur_year, project.title, project.description, mode
+                    )
+                    max_similarity, similar_projects = summarize_similarities(all_similarities)
+                    if similar_projects:
+                        await db.rollback()
+                        return rejected_response(max_similarity, similar_projects)
+
+                # Add to TeamProject table
                 new_team_project = models.TeamProject(
                     team_id=team_id,
                     title=project.title,
@@ -82,27 +109,40 @@ def check_similarity_multi_table(project: schemas.checkProject, team_id: int, db
                     status=models.TeamProjectStatus.PENDING
                 )
                 db.add(new_team_project)
-                db.commit()
-                db.refresh(new_team_project)
-                
-                return schemas.ProjectIdeaResponse(
-                    success=True,
-                    message="Congratulations! Your project idea has been added successfully",
-                    project_id=new_team_project.id,
-                    max_similarity_score=f"{max_similarity:.2f}",
-                    status="pending",
-                    similar_projects=[]
-                )
-                
+                await proposal_admission.bump_version(db, cur_year)
+                await db.commit()
+            except HTTPException:
+                await db.rollback()
+                raise
             except Exception as e:
-                db.rollback()
+                await db.rollback()
                 raise HTTPException(
                     status_code=500, 
                     detail=f"Error adding project to database: {str(e)}"
                 )
+
+        await response_cache.bump("team_projects")
+
+        # Link the idea into the year's similarity graph with the
+        # scores we already have (cross-year matches are not edges)
+        similarity_graph.schedule(similarity_graph.index_document(
+            cur_year, ("Team Project", new_team_project.id), project.title, project.description,
+            scores=[(source, id, score) for source, id, _, score in all_similarities]
+        ))
+
+        return schemas.ProjectIdeaResponse(
+            success=True,
+            message="Congratulations! Your project idea has been added successfully",
+            project_id=new_team_project.id,
+            max_similarity_score=f"{max_similarity:.2f}",
+            status="pending",
+            similar_projects=[]
+        )
                 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, 
             detail=f"Error in similarity check: {str(e)}"
-        )
\ No newline at end of file
+        )
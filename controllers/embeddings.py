@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from controllers.similarity_index import SOURCES
+
+logger = logging.getLogger(__name__)
+
+# tfidf: TF-IDF cosine only, embedding: sentence-embedding cosine only,
+# blend: EMBEDDING_BLEND_WEIGHT * embedding + (1 - weight) * TF-IDF
+SIMILARITY_MODE = os.getenv("SIMILARITY_MODE", "tfidf")
+# Small multilingual CPU model: proposals mix Arabic and English
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+EMBEDDING_BLEND_WEIGHT = float(os.getenv("EMBEDDING_BLEND_WEIGHT", "0.5"))
+# Neighbours fetched from the ANN index per query
+EMBEDDING_TOP_K = int(os.getenv("EMBEDDING_TOP_K", "50"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# HNSW graph degree and build/search beam widths
+EMBEDDING_HNSW_M = int(os.getenv("EMBEDDING_HNSW_M", "16"))
+EMBEDDING_HNSW_EF_CONSTRUCTION = int(os.getenv("EMBEDDING_HNSW_EF_CONSTRUCTION", "200"))
+EMBEDDING_HNSW_EF_SEARCH = int(os.getenv("EMBEDDING_HNSW_EF_SEARCH", "64"))
+
+SIMILARITY_MODES = ("tfidf", "embedding", "blend")
+
+# Both are optional: pip install sentence-transformers hnswlib
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+
+def resolve_mode(mode: Optional[str] = None) -> str:
+    """The similarity mode to use, falling back to tfidf without an encoder."""
+    mode = mode or SIMILARITY_MODE
+    if mode not in SIMILARITY_MODES:
+        raise ValueError(f"Unknown similarity mode '{mode}'")
+    if mode != "tfidf" and not SENTENCE_TRANSFORMERS_AVAILABLE:
+        logger.warning(f"Similarity mode '{mode}' needs sentence-transformers; using tfidf")
+        return "tfidf"
+    return mode
+
+
+def embeddings_enabled() -> bool:
+    return SIMILARITY_MODE != "tfidf" and SENTENCE_TRANSFORMERS_AVAILABLE
+
+
+def embedding_hash(title: str, description: str) -> str:
+    """Identifies the stored embedding of a document under EMBEDDING_MODEL."""
+    text = f"{EMBEDDING_MODEL}\0{title}\0{description}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+_encoder = None
+
+
+def get_encoder():
+    """Load the sentence-embedding model once per process."""
+    global _encoder
+    if _encoder is None:
+        _encoder = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    return _encoder
+
+
+def encode(texts: List[str]) -> np.ndarray:
+    """Unit-length float32 embeddings, one row per text."""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = get_encoder().encode(
+        texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True, convert_to_numpy=True
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class VectorIndex:
+    """
+    Cosine top-k over unit vectors: an HNSW graph when hnswlib is installed,
+    an exact matrix-vector product otherwise. The vectors are kept as well,
+    for exact scores of arbitrary rows.
+    """
+
+    def __init__(self, dim: int, m: int = EMBEDDING_HNSW_M,
+                 ef_construction: int = EMBEDDING_HNSW_EF_CONSTRUCTION, ef_search: int = EMBEDDING_HNSW_EF_SEARCH,
+                 approximate: bool = HNSWLIB_AVAILABLE):
+        self.dim = dim
+        self.ef_search = ef_search
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self._hnsw = None
+        if approximate:
+            self._hnsw = hnswlib.Index(space="ip", dim=dim)
+            self._hnsw.init_index(max_elements=1024, M=m, ef_construction=ef_construction)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def add(self, vectors: np.ndarray):
+        if not len(vectors):
+            return
+        labels = np.arange(len(self.vectors), len(self.vectors) + len(vectors))
+        self.vectors = np.vstack([self.vectors, vectors])
+        if self._hnsw is not None:
+            if len(self.vectors) > self._hnsw.get_max_elements():
+                self._hnsw.resize_index(max(2 * self._hnsw.get_max_elements(), len(self.vectors)))
+            self._hnsw.add_items(vectors, labels)
+
+    def search(self, vector: np.ndarray, k: int):
+        """Return (rows, similarities) of the k nearest vectors, nearest first."""
+        k = min(k, len(self.vectors))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if self._hnsw is None:
+            similarities = self.vectors @ vector
+            rows = np.argpartition(-similarities, k - 1)[:k]
+            rows = rows[np.argsort(-similarities[rows], kind="stable")]
+            return rows, similarities[rows]
+        self._hnsw.set_ef(max(self.ef_search, k))
+        labels, distances = self._hnsw.knn_query(vector, k=k)
+        # Inner product space: distance is 1 - dot
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+    def scores(self, vector: np.ndarray, rows) -> np.ndarray:
+        return self.vectors[rows] @ vector
+
+
+class EmbeddingIndex:
+    """
+    Sentence embeddings of every Project, CollegeIdeas and TeamProject row of
+    one academic year, with an ANN index over them. Synced the same way as
+    SimilarityIndex: rows above the last seen ids are added, and the index is
+    refit (re-encoding only changed text) when its row counts drift or it
+    gets old.
+    """
+
+    def __init__(self, year: int):
+        self.year = year
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.sources = []
+        self.rows = {}
+        self.last_ids = {source: 0 for source in SOURCES}
+        self.counts = {source: 0 for source in SOURCES}
+        self.loaded = False
+        self.loaded_at = None
+        self._vectors: Optional[VectorIndex] = None
+
+    def __len__(self):
+        return len(self.sources)
+
+    def fit(self, docs):
+        """Rebuild the index from scratch, from (source_type, id, title, vector) tuples."""
+        with self._lock:
+            self._reset()
+            self._append(docs)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def add(self, docs):
+        """docs is an iterable of (source_type, id, title, vector) tuples."""
+        with self._lock:
+            self._append(docs)
+
+    def _append(self, docs):
+        docs = list(docs)
+        for source, id, title, _ in docs:
+            self.rows[(source, id)] = len(self.sources)
+            self.sources.append((source, id, title))
+            self.last_ids[source] = max(self.last_ids[source], id)
+            self.counts[source] += 1
+        if docs:
+            vectors = np.vstack([doc[3] for doc in docs])
+            if self._vectors is None:
+                self._vectors = VectorIndex(vectors.shape[1])
+            self._vectors.add(vectors)
+
+    def query(self, vector: np.ndarray, k: int = EMBEDDING_TOP_K):
+        """Nearest documents as (source_type, id, title, similarity_score), nearest first."""
+        with self._lock:
+            if self._vectors is None:
+                return []
+            rows, similarities = self._vectors.search(vector, k)
+            sources = self.sources
+        return [
+            (sources[row][0], sources[row][1], sources[row][2], max(float(score), 0.0))
+            for row, score in zip(rows, similarities)
+        ]
+
+    def scores(self, vector: np.ndarray, keys) -> dict:
+        """Exact similarity to the given (source_type, id) documents."""
+        with self._lock:
+            keys = [key for key in keys if key in self.rows]
+            if self._vectors is None or not keys:
+                return {}
+            similarities = self._vectors.scores(vector, [self.rows[key] for key in keys])
+        return {key: max(float(score), 0.0) for key, score in zip(keys, similarities)}
+
+
+def blend_scores(tfidf, index: EmbeddingIndex, vector: np.ndarray,
+                 weight: float = EMBEDDING_BLEND_WEIGHT, k: int = EMBEDDING_TOP_K):
+    """
+    Blend TF-IDF scores, (source_type, id, title, score) for every document,
+    with embedding cosines. Only the ANN neighbours and the TF-IDF matches
+    are kept; the latter get exact cosines when the lookup missed them.
+    """
+    dense = {(source, id): score for source, id, _, score in index.query(vector, k)}
+    dense.update(index.scores(vector, [
+        (source, id) for source, id, _, score in tfidf if score > 0 and (source, id) not in dense
+    ]))
+    return [
+        (source, id, title, weight * dense[(source, id)] + (1 - weight) * score)
+        for source, id, title, score in tfidf
+        if (source, id) in dense
+    ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_embedding_index(year: int) -> EmbeddingIndex:
+    """Return the long-lived embedding index for an academic year."""
+    with _indexes_lock:
+        index = _indexes.get(year)
+        if index is None:
+            index = EmbeddingIndex(year)
+            _indexes[year] = index
+        return index
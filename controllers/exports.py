@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import Select, select
+
+from app import models
+from app.db import sessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor, and written out, per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+PROJECT_FIELDS = ["id", "title", "description", "tools", "supervisor", "year"]
+COLLEGE_IDEA_FIELDS = ["id", "title", "description", "year", "status"]
+SUPERVISOR_FIELDS = ["id", "firstName", "lastName", "username", "email", "university", "department"]
+
+
+def archive_query(year: Optional[int] = None, supervisor: Optional[str] = None) -> Select:
+    query = select(*[getattr(models.Project, field) for field in PROJECT_FIELDS])
+    if year is not None:
+        query = query.where(models.Project.year == year)
+    if supervisor is not None:
+        query = query.where(models.Project.supervisor == supervisor)
+    return query.order_by(models.Project.id)
+
+
+def college_ideas_query(year: Optional[int] = None, status: Optional[str] = None) -> Select:
+    query = select(
+        *[getattr(models.CollegeIdeas, field) for field in COLLEGE_IDEA_FIELDS],
+        *[getattr(models.Supervisors, field).label(f"supervisor_{field}") for field in SUPERVISOR_FIELDS]
+    ).join(
+        models.Supervisors,
+        models.CollegeIdeas.supervisor_email == models.Supervisors.email
+    )
+    if year is not None:
+        query = query.where(models.CollegeIdeas.year == year)
+    if status is not None:
+        query = query.where(models.CollegeIdeas.status == status)
+    return query.order_by(models.CollegeIdeas.id)
+
+
+def project_record(values: dict) -> dict:
+    values["tools"] = values["tools"].split()
+    return values
+
+
+def college_idea_record(values: dict) -> dict:
+    """Same shape as CollegeIdeaResponse."""
+    record = {field: values[field] for field in COLLEGE_IDEA_FIELDS}
+    record["supervisor_info"] = {field: values[f"supervisor_{field}"] for field in SUPERVISOR_FIELDS}
+    return record
+
+
+async def fetch_members(connection, project_ids: List[int]) -> dict:
+    """Team members of a batch of projects, in upload order, keyed by project id."""
+    members = {id: [] for id in project_ids}
+    rows = await connection.execute(
+        select(
+            models.ProjectTeamMember.project_id,
+            models.ProjectTeamMember.firstName,
+            models.ProjectTeamMember.lastName,
+            models.ProjectTeamMember.email,
+            models.ProjectTeamMember.role,
+            models.ProjectTeamMember.is_leader
+        )
+        .where(models.ProjectTeamMember.project_id.in_(project_ids))
+        .order_by(models.ProjectTeamMember.id)
+    )
+    for project_id, first_name, last_name, email, role, is_leader in rows:
+        members[project_id].append({
+            "firstName": first_name,
+            "lastName": last_name,
+            "email": email,
+            "role": role,
+            "is_leader": is_leader
+        })
+    return members
+
+
+async def stream_records(query: Select, to_record: Callable, include_members: bool = False) -> AsyncIterator[List[dict]]:
+    """
+    Yield batches of records read through a server-side cursor. to_record
+    gets each row as a dict of column values. The export has its own
+    sessions: it outlives the request's dependencies. Team members come
+    from a second connection, as MySQL cannot run another query on a
+    connection with an open streaming cursor.
+    """
+    async with sessionLocal() as db, sessionLocal() as members_db:
+        # Core rows, without the ORM result layer
+        connection = await db.connection()
+        members_connection = await members_db.connection()
+        result = await connection.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        keys = list(result.keys())
+        async for rows in result.partitions():
+            records = [to_record(dict(zip(keys, row))) for row in rows]
+            if include_members:
+                members = await fetch_members(members_connection, [record["id"] for record in records])
+                for record in records:
+                    record["team_members"] = members[record["id"]]
+            yield records
+
+
+def csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def flatten(record: dict) -> dict:
+    """One CSV row: nested objects become prefixed columns, lists JSON cells."""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            row.update({f"{key}_{field}": csv_value(item) for field, item in value.items()})
+        else:
+            row[key] = csv_value(value)
+    return row
+
+
+async def encode_records(batches: AsyncIterator[List[dict]], format: str) -> AsyncIterator[str]:
+    """Render record batches as NDJSON lines or CSV, one chunk per batch."""
+    writer, buffer = None, io.StringIO()
+    try:
+        async for records in batches:
+            if format == "ndjson":
+                yield "".join(json.dumps(record, default=str) + "\n" for record in records)
+                continue
+            for record in records:
+                row = flatten(record)
+                if writer is None:
+                    writer = csv.DictWriter(buffer, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    except Exception as e:
+        # The status line has gone out already; end the body with the error
+        logger.error(f"Export failed: {str(e)}")
+        if format == "ndjson":
+            yield json.dumps({"error": str(e)}) + "\n"
+
+
+async def gzip_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Gzip a text stream, flushing after every chunk so rows go out as they are read."""
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk.encode("utf-8")) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_body(query: Select, to_record: Callable, format: str, gzip: bool = False, include_members: bool = False):
+    body = encode_records(stream_records(query, to_record, include_members), format)
+    return gzip_chunks(body) if gzip else body
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from controllers.similarity_index import SOURCES, document_tokens
+
+# 64 bands of 2 rows: documents whose word sets have Jaccard similarity 0.3
+# collide in some band with probability 0.998, unrelated ones (0.01) with
+# ~0.006. Candidates are ranked by colliding bands and capped, so loosely
+# related documents that also collide only cost a place in the cap.
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", "64"))
+NEAR_DUPLICATE_ROWS = int(os.getenv("NEAR_DUPLICATE_ROWS", "2"))
+NEAR_DUPLICATE_MAX_CANDIDATES = int(os.getenv("NEAR_DUPLICATE_MAX_CANDIDATES", "200"))
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Rows appended since the last consolidation are matched by a linear scan;
+# past this many they are merged into the sorted band arrays
+CONSOLIDATE_AFTER = 2048
+
+
+def shingles(title: str, description: str) -> set:
+    """The distinct tokens of a document, the same unigrams TF-IDF sees."""
+    return set(document_tokens(title, description))
+
+
+class MinHashLSH:
+    """
+    MinHash signatures of every Project, CollegeIdeas and TeamProject row of
+    every year, banded for locality sensitive hashing.
+
+    Each band of a signature is folded into one 64 bit key. Keys are kept in
+    per-band sorted arrays, so a query is bands * log(n) binary searches, and
+    returns the rows that collide with it in at least one band, ordered by
+    the number of colliding bands.
+    """
+
+    def __init__(self, bands: int = NEAR_DUPLICATE_BANDS, rows: int = NEAR_DUPLICATE_ROWS, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.RandomState(seed)
+        num_perm = bands * rows
+        # Universal hashing (a * x + b) mod p with a, b drawn below the prime;
+        # the product wraps at 2**64 before the modulo, as in datasketch
+        self._a = rng.randint(1, 2 ** 61 - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 61 - 1, size=num_perm, dtype=np.uint64)
+        self._mix = rng.randint(1, 2 ** 62, size=rows, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.docs = []  # (source_type, id, year) per row
+        self.last_ids = {source: 0 for source in SOURCES}
+        # Rows seen per source, including those without tokens (not indexed)
+        self.counts = {source: 0 for source in SOURCES}
+        self.loaded = False
+        self.loaded_at = None
+        self._keys = np.zeros((0, self.bands), dtype=np.uint64)
+        self._sorted_keys = np.zeros((self.bands, 0), dtype=np.uint64)
+        self._sorted_rows = np.zeros((self.bands, 0), dtype=np.int64)
+        self._pending = []
+
+    def __len__(self):
+        return len(self.docs)
+
+    def band_keys(self, words: set):
+        if not words:
+            return None
+        x = np.fromiter((zlib.crc32(word.encode()) for word in words), dtype=np.uint64, count=len(words))
+        signature = (((np.outer(self._a, x) + self._b[:, None]) % MERSENNE_PRIME) & MAX_HASH).min(axis=1)
+        # uint64 arithmetic wraps, which is what we want for a hash
+        return (signature.reshape(self.bands, self.rows) * self._mix).sum(axis=1)
+
+    def fit(self, docs):
+        """
+        Rebuild from scratch.
+        docs is an iterable of (source_type, id, year, title, tokens) tuples.
+        """
+        with self._lock:
+            self._reset()
+            self._append(docs)
+            self._consolidate()
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def add(self, docs):
+        with self._lock:
+            self._append(docs)
+            if len(self._pending) > CONSOLIDATE_AFTER:
+                self._consolidate()
+
+    def _append(self, docs):
+        for source, id, year, title, tokens in docs:
+            self.last_ids[source] = max(self.last_ids[source], id)
+            self.counts[source] += 1
+            keys = self.band_keys(set(tokens))
+            if keys is None:
+                continue
+            self.docs.append((source, id, year))
+            self._pending.append(keys)
+
+    def _consolidate(self):
+        if not self._pending:
+            return
+        self._keys = np.vstack([self._keys, np.asarray(self._pending, dtype=np.uint64)])
+        self._pending = []
+        order = np.argsort(self._keys, axis=0, kind="stable").T
+        self._sorted_rows = order
+        self._sorted_keys = np.take_along_axis(self._keys.T, order, axis=1)
+
+    def candidates(self, title: str, description: str, limit: int = NEAR_DUPLICATE_MAX_CANDIDATES):
+        """
+        Rows likely to be near duplicates of the document.
+        Returns list of (source_type, id, year), most colliding bands first.
+        """
+        keys = self.band_keys(shingles(title, description))
+        if keys is None:
+            return []
+
+        with self._lock:
+            hits = Counter()
+            consolidated = len(self._keys)
+            for band in range(self.bands):
+                sorted_keys = self._sorted_keys[band]
+                lo = np.searchsorted(sorted_keys, keys[band], side="left")
+                hi = np.searchsorted(sorted_keys, keys[band], side="right")
+                hits.update(self._sorted_rows[band, lo:hi].tolist())
+            if self._pending:
+                pending = np.asarray(self._pending, dtype=np.uint64)
+                rows, _ = np.nonzero(pending == keys)
+                hits.update((rows + consolidated).tolist())
+            docs = self.docs
+
+        ranked = sorted(hits.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [docs[row] for row, _ in ranked]
+
+
+_lsh = MinHashLSH()
+
+
+def get_lsh() -> MinHashLSH:
+    """Return the long-lived all-years index of this process."""
+    return _lsh
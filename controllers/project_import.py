@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+import logging
+import os
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app import models, schemas
+from app.db import sessionLocal
+from app.response_cache import response_cache
+from controllers import similarity_graph
+
+logger = logging.getLogger(__name__)
+
+# Rows validated, checked for duplicates and inserted per transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# Per-row errors returned in the report; the rest are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def detect_format(filename: Optional[str], format: Optional[str] = None) -> Optional[str]:
+    """csv or jsonl, from the explicit format or else the file extension."""
+    if format:
+        return format if format in IMPORT_FORMATS.values() else None
+    return IMPORT_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def read_records(stream, format: str):
+    """
+    Yield (line, record, error) for each row of an uploaded file, reading it
+    incrementally. CSV rows are dicts of strings; tools is separated by ";"
+    and team_members, if present, is a JSON array of member objects.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if format == "csv":
+            reader = csv.DictReader(text)
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield reader.line_num, None, f"Malformed CSV: {str(e)}"
+                    continue
+                row.pop(None, None)  # cells beyond the header
+                yield reader.line_num, row, None
+        else:
+            for line, raw in enumerate(text, 1):
+                if not raw.strip():
+                    continue
+                try:
+                    yield line, json.loads(raw), None
+                except ValueError as e:
+                    yield line, None, f"Invalid JSON: {str(e)}"
+    except UnicodeDecodeError:
+        yield 0, None, "File is not valid UTF-8; rows after this point were not read"
+    finally:
+        text.detach()
+
+
+def parse_record(record, format: str) -> schemas.ArchiveProject:
+    """Validate one row; raises ValueError (including ValidationError)."""
+    if not isinstance(record, dict):
+        raise ValueError("Row must be a JSON object")
+    if format == "csv":
+        record = dict(record)
+        record["tools"] = [tool.strip() for tool in (record.get("tools") or "").split(";") if tool.strip()]
+        members = (record.get("team_members") or "").strip()
+        try:
+            record["team_members"] = json.loads(members) if members else []
+        except ValueError as e:
+            raise ValueError(f"team_members: invalid JSON ({str(e)})")
+    return schemas.ArchiveProject(**record)
+
+
+def describe_error(error: ValueError) -> str:
+    if hasattr(error, "errors"):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+        )
+    return str(error)
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.years = set()
+        self.errors = []
+
+    def error(self, line: int, title: Optional[str], message: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(schemas.ProjectImportError(line=line, title=title, error=message))
+
+    def response(self) -> schemas.ProjectImportReport:
+        return schemas.ProjectImportReport(
+            imported=self.imported,
+            failed=self.failed,
+            years=sorted(self.years),
+            errors=sorted(self.errors, key=lambda error: error.line),
+            errors_truncated=self.failed > len(self.errors)
+        )
+
+
+async def insert_projects(db: AsyncSession, projects: List[schemas.ArchiveProject], uploader: str):
+    """Bulk insert projects and their team members; the caller commits."""
+    await db.execute(insert(models.Project), [
+        {
+            "title": project.title,
+            "description": project.description,
+            "tools": " ".join(project.tools),
+            "supervisor": project.supervisor,
+            "year": project.year,
+            "uploader": uploader,
+        }
+        for project in projects
+    ])
+    # Titles are unique; looked up rather than RETURNING, which MySQL lacks
+    ids = dict((await db.execute(
+        select(models.Project.title, models.Project.id)
+        .where(models.Project.title.in_([project.title for project in projects]))
+    )).all())
+    members = [
+        {
+            "project_id": ids[project.title],
+            "firstName": member.firstName,
+            "lastName": member.lastName,
+            "email": member.email,
+            "role": member.role,
+            "is_leader": member.is_leader,
+        }
+        for project in projects
+        for member in project.team_members
+    ]
+    if members:
+        await db.execute(insert(models.ProjectTeamMember), members)
+
+
+async def import_chunk(db: AsyncSession, rows: List[Tuple[int, schemas.ArchiveProject]], uploader: str,
+                       seen_titles: set, report: ImportReport):
+    """Insert the valid rows of a chunk, skipping titles already stored or seen earlier in the file."""
+    if not rows:
+        return
+    existing = set((await db.scalars(
+        select(models.Project.title).where(models.Project.title.in_([project.title for _, project in rows]))
+    )).all())
+
+    accepted = []
+    for line, project in rows:
+        if project.title in existing:
+            report.error(line, project.title, "Project title already exists")
+        elif project.title in seen_titles:
+            report.error(line, project.title, "Duplicate title earlier in the file")
+        else:
+            seen_titles.add(project.title)
+            accepted.append((line, project))
+    if not accepted:
+        return
+
+    try:
+        await insert_projects(db, [project for _, project in accepted], uploader)
+        await db.commit()
+    except SQLAlchemyError:
+        # Something in the chunk violates a constraint (e.g. a title differing
+        # only in case); retry its rows one by one to find out which
+        await db.rollback()
+        imported = []
+        for line, project in accepted:
+            try:
+                await insert_projects(db, [project], uploader)
+                await db.commit()
+                imported.append((line, project))
+            except SQLAlchemyError as e:
+                await db.rollback()
+                report.error(line, project.title, f"Database error: {str(getattr(e, 'orig', e))}")
+        accepted = imported
+
+    report.imported += len(accepted)
+    report.years.update(project.year for _, project in accepted)
+    if accepted:
+        await response_cache.bump("projects")
+
+
+async def import_projects(db: AsyncSession, stream, format: str, uploader: str) -> schemas.ProjectImportReport:
+    """
+    Import an archive of projects from a CSV or JSONL file object, one chunk
+    of IMPORT_CHUNK_SIZE rows per transaction. Invalid or duplicate rows are
+    reported and skipped; they do not abort the import.
+    """
+    report = ImportReport()
+    seen_titles = set()
+    records = read_records(stream, format)
+    while True:
+        # Reading and decoding the spooled upload is blocking file I/O
+        batch = await run_in_threadpool(lambda: list(islice(records, IMPORT_CHUNK_SIZE)))
+        if not batch:
+            break
+        rows = []
+        for line, record, error in batch:
+            if error:
+                report.error(line, None, error)
+                continue
+            try:
+                rows.append((line, parse_record(record, format)))
+            except ValueError as e:
+                title = record.get("title") if isinstance(record, dict) else None
+                report.error(line, title if isinstance(title, str) else None, describe_error(e))
+        await import_chunk(db, rows, uploader, seen_titles, report)
+
+    logger.info(f"Imported {report.imported} projects, {report.failed} rows failed")
+    if report.years:
+        # Feed the similarity graph (and the token cache) once per year
+        # instead of once per row
+        similarity_graph.schedule(rebuild_years(sorted(report.years)))
+    return report.response()
+
+
+async def rebuild_years(years: List[int]):
+    async with sessionLocal() as db:
+        for year in years:
+            await similarity_graph.rebuild_year(db, year)
@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+
+# Admissions are serialized per academic year: in this process by an asyncio
+# lock, so waiting requests do not each hold a pooled connection blocked on
+# the row lock, and across API processes by locking the year's
+# SimilarityAdmission row until the insert commits.
+_year_locks = {}
+
+
+def year_lock(year: int) -> asyncio.Lock:
+    lock = _year_locks.get(year)
+    if lock is None:
+        lock = asyncio.Lock()
+        _year_locks[year] = lock
+    return lock
+
+
+async def read_version(db: AsyncSession, year: int) -> int:
+    """
+    Number of proposals admitted for the year so far, read before scoring.
+    Creates the year's row on first use, and ends the transaction so no
+    connection is held while the proposal is scored.
+    """
+    version = await db.scalar(
+        select(models.SimilarityAdmission.version).where(models.SimilarityAdmission.year == year)
+    )
+    if version is None:
+        db.add(models.SimilarityAdmission(year=year, version=0))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Created by a concurrent request; a stale 0 only forces a re-check
+            await db.rollback()
+        return 0
+    await db.commit()
+    return version
+
+
+async def lock_version(db: AsyncSession, year: int) -> int:
+    """
+    Lock the year's row (SELECT ... FOR UPDATE) and return its version.
+    The lock is held until the session commits or rolls back.
+    """
+    return await db.scalar(
+        select(models.SimilarityAdmission.version)
+        .where(models.SimilarityAdmission.year == year)
+        .with_for_update()
+    )
+
+
+async def bump_version(db: AsyncSession, year: int):
+    """Record an admission; part of the caller's transaction."""
+    await db.execute(
+        update(models.SimilarityAdmission)
+        .where(models.SimilarityAdmission.year == year)
+        .values(version=models.SimilarityAdmission.version + 1)
+    )
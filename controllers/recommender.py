@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+from fastapi import HTTPException
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+from app.cache import LRUCache
+from app.http_client import CircuitOpenError, http_client
+
+logger = logging.getLogger(__name__)
+
+# "tfidf" or "bm25" score in process; "remote" keeps the external matching service
+RECOMMENDER = os.getenv("RECOMMENDER", "tfidf")
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "10"))
+RECOMMENDER_URL = os.getenv("RECOMMENDER_URL", "https://recommendation-system-production-390d.up.railway.app")
+RECOMMENDER_TIMEOUT = float(os.getenv("RECOMMENDER_TIMEOUT", "10"))
+RECOMMEND_CACHE_BYTES = int(os.getenv("RECOMMEND_CACHE_BYTES", str(32 * 1024 * 1024)))
+# data_versions are per process: a write handled by another worker is only
+# seen here once the entries cached before it expire
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL", "60"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+WORD_PATTERN = re.compile(r"[\w+#.]+")
+
+
+class Profile(NamedTuple):
+    """What the recommenders see of a user (title, skills) or a team (name, expec_tools)."""
+    id: int
+    title: Optional[str]
+    skills: Optional[List[str]]
+
+
+def profile_terms(profile: Profile, with_title: bool = True) -> List[str]:
+    """
+    Each skill is one term ("machine learning"), plus its single words so that
+    "react" still partially matches "react native". Titles add their words.
+    """
+    terms = []
+    for skill in profile.skills or []:
+        words = [word.strip(".") for word in WORD_PATTERN.findall(str(skill).lower())]
+        words = [word for word in words if word]
+        if not words:
+            continue
+        terms.append(" ".join(words))
+        if len(words) > 1:
+            terms.extend(words)
+    if with_title and profile.title:
+        terms.extend(word.strip(".") for word in WORD_PATTERN.findall(profile.title.lower()) if word.strip("."))
+    return terms
+
+
+def _identity(terms):
+    return terms
+
+
+class CorpusStats(NamedTuple):
+    """Document frequencies of the whole corpus, for scoring a subset of it."""
+    n_docs: int
+    doc_freq: Dict[str, int]
+    avg_length: float
+
+
+class ProfileMatrix:
+    """
+    Term weights of a set of profiles, scored against a query profile.
+    "tfidf" gives the cosine of l2-normalised TF-IDF vectors (the
+    TfidfTransformer defaults); "bm25" gives the BM25 score of the query terms.
+
+    With stats, IDF and average length come from the whole corpus, so scoring
+    a pre-filtered subset gives the same scores as scoring every profile.
+    """
+
+    def __init__(self, ids: Sequence[int], documents: Sequence[List[str]], scoring: str, stats: Optional[CorpusStats] = None):
+        if scoring not in ("tfidf", "bm25"):
+            raise ValueError(f"Unknown scoring '{scoring}'")
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.scoring = scoring
+        self.vocabulary = {}
+        self.weights = None
+        if not any(documents):
+            return
+
+        vectorizer = CountVectorizer(analyzer=_identity)
+        counts = vectorizer.fit_transform(documents).astype(np.float64).tocsr()
+        self.vocabulary = vectorizer.vocabulary_
+        terms = vectorizer.get_feature_names_out()
+        lengths = np.asarray(counts.sum(axis=1)).ravel()
+        if stats is None:
+            doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+            stats = CorpusStats(counts.shape[0], dict(zip(terms, doc_freq.tolist())), lengths.mean())
+        self.stats = stats
+        idf = np.array([self.idf(term) for term in terms])
+
+        weights = counts
+        if scoring == "tfidf":
+            weights.data *= idf[weights.indices]
+            weights = normalize(weights)
+        else:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(stats.avg_length, 1e-9))
+            row_norm = np.repeat(norm, np.diff(weights.indptr))
+            weights.data = idf[weights.indices] * weights.data * (BM25_K1 + 1) / (weights.data + row_norm)
+        self.weights = weights
+
+    def idf(self, term: str) -> float:
+        n_docs, doc_freq = self.stats.n_docs, self.stats.doc_freq.get(term, 0)
+        if self.scoring == "tfidf":
+            return np.log((1 + n_docs) / (1 + doc_freq)) + 1
+        return np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def score(self, terms: List[str]) -> np.ndarray:
+        if self.weights is None or not terms:
+            return np.zeros(len(self.ids))
+        query = np.zeros(self.weights.shape[1])
+        if self.scoring == "tfidf":
+            # The query norm covers every query term the corpus knows, not
+            # only the terms that occur in this subset
+            counts = Counter(term for term in terms if self.stats.doc_freq.get(term))
+            norm = np.sqrt(sum((count * self.idf(term)) ** 2 for term, count in counts.items()))
+            for term, count in counts.items():
+                if term in self.vocabulary:
+                    query[self.vocabulary[term]] = count * self.idf(term) / norm
+        else:
+            for term in set(terms):
+                if term in self.vocabulary:
+                    query[self.vocabulary[term]] = 1.0
+        return self.weights @ query
+
+    def top_k(self, terms: List[str], k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        scores = self.score(terms)
+        exclude = set(exclude)
+        if exclude:
+            scores[np.isin(self.ids, list(exclude))] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.lexsort((self.ids[candidates], -scores[candidates]))]
+        return [(int(self.ids[i]), float(scores[i])) for i in candidates]
+
+
+class Recommender(ABC):
+    """
+    Matches students to teams and teams to students. Both methods return
+    (id, similarity_score) pairs, best first. stats describes the full
+    corpus when the candidates passed in are a pre-filtered subset of it.
+    """
+
+    @abstractmethod
+    async def teams_for_student(self, student: Profile, teams: Sequence[Profile], top_k: int = RECOMMEND_TOP_K, stats: Optional[CorpusStats] = None) -> List[Tuple[int, float]]:
+        ...
+
+    @abstractmethod
+    async def students_for_team(self, team: Profile, students: Sequence[Profile], exclude: Iterable[int] = (), top_k: int = RECOMMEND_TOP_K, stats: Optional[CorpusStats] = None) -> List[Tuple[int, float]]:
+        ...
+
+
+class LocalRecommender(Recommender):
+    """
+    Scores in process over User.skills, User.title and Team.expec_tools.
+    Matrices are built per call from the candidates passed in, so the work
+    scales with the number of candidates.
+    """
+
+    def __init__(self, scoring: str = "tfidf"):
+        self.scoring = scoring
+
+    def _rank(self, query_terms, profiles, with_title, top_k, exclude=(), stats=None):
+        matrix = ProfileMatrix(
+            [p.id for p in profiles],
+            [profile_terms(p, with_title) for p in profiles],
+            self.scoring,
+            stats
+        )
+        return matrix.top_k(query_terms, top_k, exclude)
+
+    async def teams_for_student(self, student, teams, top_k=RECOMMEND_TOP_K, stats=None):
+        return await asyncio.to_thread(self._rank, profile_terms(student), teams, False, top_k, (), stats)
+
+    async def students_for_team(self, team, students, exclude=(), top_k=RECOMMEND_TOP_K, stats=None):
+        return await asyncio.to_thread(self._rank, profile_terms(team, with_title=False), students, True, top_k, exclude, stats)
+
+
+class RemoteRecommender(Recommender):
+    """The external matching service, posted the full candidate list on every call."""
+
+    def __init__(self, base_url: str = RECOMMENDER_URL, timeout: float = RECOMMENDER_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    async def _post(self, path: str, payload: dict) -> list:
+        try:
+            # Matching has no side effects, so the POST is safe to retry
+            response = await http_client.post(
+                f"{self.base_url}{path}", json=payload, timeout=self.timeout, idempotent=True
+            )
+            response.raise_for_status()  # Raise exception for 4xx/5xx responses
+            return response.json().get("matches", [])
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping external API call: {str(e)}")
+            raise HTTPException(status_code=503, detail="External recommendation service unavailable")
+        except httpx.RequestError as e:
+            logger.error(f"Failed to connect to external API: {str(e)}")
+            raise HTTPException(status_code=503, detail="External recommendation service unavailable")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"External API error: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"External API error: {e.response.status_code}")
+        except ValueError as e:
+            logger.error(f"Invalid response from external API: {str(e)}")
+            raise HTTPException(status_code=500, detail="Invalid response from external API")
+
+    async def teams_for_student(self, student, teams, top_k=RECOMMEND_TOP_K, stats=None):
+        payload = {
+            "student": {
+                "id": str(student.id),
+                "jobtitle": student.title,
+                "skills": ", ".join(student.skills) if student.skills else ""
+            },
+            "projects": [
+                {
+                    "id": str(team.id),
+                    "title": team.title,
+                    "skills": ", ".join(team.skills) if team.skills else ""
+                }
+                for team in teams
+            ]
+        }
+        matches = await self._post("/v1/match/student-to-projects", payload)
+        return [(int(match["project_id"]), match["similarity_score"]) for match in matches][:top_k]
+
+    async def students_for_team(self, team, students, exclude=(), top_k=RECOMMEND_TOP_K, stats=None):
+        exclude = set(exclude)
+        payload = {
+            "project": {
+                "id": str(team.id),
+                "title": team.title,
+                "skills": ", ".join(team.skills) if team.skills else ""
+            },
+            "students": [
+                {
+                    "id": str(student.id),
+                    "jobtitle": student.title if student.title else "developer",
+                    "skills": ", ".join(student.skills) if student.skills else ""
+                }
+                for student in students if student.id not in exclude
+            ]
+        }
+        matches = await self._post("/v1/match/projects-to-students", payload)
+        return [(int(match["student_id"]), match["similarity_score"]) for match in matches][:top_k]
+
+
+def get_recommender(name: str = RECOMMENDER) -> Recommender:
+    if name == "remote":
+        return RemoteRecommender()
+    if name in ("tfidf", "bm25"):
+        return LocalRecommender(scoring=name)
+    raise ValueError(f"Unknown RECOMMENDER '{name}', expected tfidf, bm25 or remote")
+
+
+recommender = get_recommender()
+
+# Finished responses keyed by (endpoint, requester, data versions). Results only
+# depend on team tools, membership and user profiles, so the routes that change
+# those bump data_versions["teams"] / data_versions["users"] instead of deleting.
+recommendation_cache = LRUCache(
+    maxbytes=RECOMMEND_CACHE_BYTES,
+    sizeof=lambda response: len(response.model_dump_json()),
+    ttl=RECOMMEND_CACHE_TTL
+)
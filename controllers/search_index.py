@@ -0,0 +1,376 @@
+import asyncio
+import html
+import logging
+import math
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.db import syncSessionLocal
+from controllers.similarity_index import SOURCES
+from controllers.similarity_pool import similarity_pool
+from controllers.text_processing import TOKEN_PATTERN, text_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Full reload interval, which also drops deleted and edited rows; rows
+# inserted in between are picked up by id at most every SEARCH_SYNC_INTERVAL
+SEARCH_INDEX_REFRESH = float(os.getenv("SEARCH_INDEX_REFRESH", "300"))
+SEARCH_SYNC_INTERVAL = float(os.getenv("SEARCH_SYNC_INTERVAL", "1"))
+# New rows read per source per sync, so a large import never stalls a search
+SEARCH_SYNC_BATCH = int(os.getenv("SEARCH_SYNC_BATCH", "1000"))
+SEARCH_SNIPPET_WORDS = int(os.getenv("SEARCH_SNIPPET_WORDS", "30"))
+# Retry-After of the 503 answered until the first load of a worker finishes
+SEARCH_RETRY_AFTER = int(os.getenv("SEARCH_RETRY_AFTER", "5"))
+
+# BM25 with per-field term frequency weights (a simplified BM25F)
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"title": 3.0, "tools": 2.0, "description": 1.0}
+# Scores are ranked, and cursors keyed, at this resolution
+SCORE_SCALE = 10 ** 6
+
+SOURCE_MODELS = {
+    "Project": models.Project,
+    "College Idea": models.CollegeIdeas,
+    "Team Project": models.TeamProject,
+}
+SOURCE_CODES = {source: code for code, source in enumerate(SOURCES)}
+
+# (source_type, id, year, title, description, tools)
+Document = Tuple[str, int, int, str, str, str]
+
+
+def document_query(source: str, after: int = 0):
+    model = SOURCE_MODELS[source]
+    tools = model.tools if source == "Project" else literal("")
+    return select(model.id, model.year, model.title, model.description, tools).where(model.id > after)
+
+
+class SearchCorpus:
+    """
+    BM25 inverted index over the title, description and tools of every
+    Project, CollegeIdeas and TeamProject row.
+
+    Postings are stored CSR-style, one contiguous (document, weighted term
+    frequency) run per term, so a query term is a pair of array slices.
+    Rows added after the build go to small per-term delta lists until the
+    next full reload.
+    """
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+        self.post_tfs = np.zeros(0, dtype=np.float32)
+        self.delta: Dict[str, Tuple[List[int], List[float]]] = {}
+        self.sources = np.zeros(0, dtype=np.int8)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.years = np.zeros(0, dtype=np.int32)
+        self.lengths = np.zeros(0, dtype=np.float32)
+        self.last_ids = {source: 0 for source in SOURCES}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def weighted_terms(title: str, description: str, tools: str) -> Counter:
+        counts = Counter()
+        for field, text in (("title", title), ("description", description), ("tools", tools)):
+            weight = FIELD_WEIGHTS[field]
+            for token in text_pipeline.tokenize(text or ""):
+                counts[token] += weight
+        return counts
+
+    def build(self, docs: Iterable[Document]):
+        """Index docs from scratch, straight into the CSR arrays."""
+        terms, doc_nums, tfs = [], [], []
+        sources, ids, years, lengths = [], [], [], []
+        vocabulary = self.vocabulary
+        for num, (source, id, year, title, description, tools) in enumerate(docs):
+            counts = self.weighted_terms(title, description, tools)
+            for term, tf in counts.items():
+                col = vocabulary.get(term)
+                if col is None:
+                    col = len(vocabulary)
+                    vocabulary[term] = col
+                terms.append(col)
+                doc_nums.append(num)
+                tfs.append(tf)
+            sources.append(SOURCE_CODES[source])
+            ids.append(id)
+            years.append(year)
+            lengths.append(sum(counts.values()))
+            self.last_ids[source] = max(self.last_ids[source], id)
+
+        terms = np.asarray(terms, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")
+        self.indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocabulary)), out=self.indptr[1:])
+        self.post_docs = np.asarray(doc_nums, dtype=np.int32)[order]
+        self.post_tfs = np.asarray(tfs, dtype=np.float32)[order]
+        self.sources = np.asarray(sources, dtype=np.int8)
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.years = np.asarray(years, dtype=np.int32)
+        self.lengths = np.asarray(lengths, dtype=np.float32)
+
+    def add(self, docs: Sequence[Document]):
+        """Append rows inserted since the build."""
+        if not docs:
+            return
+        start = len(self.ids)
+        lengths = []
+        for num, (source, id, year, title, description, tools) in enumerate(docs, start):
+            counts = self.weighted_terms(title, description, tools)
+            for term, tf in counts.items():
+                doc_list, tf_list = self.delta.setdefault(term, ([], []))
+                doc_list.append(num)
+                tf_list.append(tf)
+            lengths.append(sum(counts.values()))
+            self.last_ids[source] = max(self.last_ids[source], id)
+        self.sources = np.concatenate([self.sources, [SOURCE_CODES[doc[0]] for doc in docs]]).astype(np.int8)
+        self.ids = np.concatenate([self.ids, [doc[1] for doc in docs]]).astype(np.int64)
+        self.years = np.concatenate([self.years, [doc[2] for doc in docs]]).astype(np.int32)
+        self.lengths = np.concatenate([self.lengths, lengths]).astype(np.float32)
+
+    def postings(self, term: str):
+        col = self.vocabulary.get(term)
+        docs = tfs = None
+        if col is not None:
+            docs = self.post_docs[self.indptr[col]:self.indptr[col + 1]]
+            tfs = self.post_tfs[self.indptr[col]:self.indptr[col + 1]]
+        if term in self.delta:
+            delta_docs, delta_tfs = self.delta[term]
+            delta_docs = np.asarray(delta_docs, dtype=np.int32)
+            delta_tfs = np.asarray(delta_tfs, dtype=np.float32)
+            if docs is None:
+                return delta_docs, delta_tfs
+            return np.concatenate([docs, delta_docs]), np.concatenate([tfs, delta_tfs])
+        return docs, tfs
+
+    def search(self, terms: Iterable[str], year: Optional[int] = None, sources: Optional[Iterable[str]] = None,
+               after: Optional[Tuple[int, int, int]] = None, limit: int = 20):
+        """
+        Rank documents matching any of the terms by BM25.
+        after is the (rank, source code, id) cursor of the previous page.
+        Returns (total matches, [(rank, source code, id, year, score)], more pages).
+        """
+        n_docs = len(self.ids)
+        if n_docs == 0:
+            return 0, [], False
+        scores = np.zeros(n_docs)
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / max(float(self.lengths.mean()), 1e-9))
+        for term in set(terms):
+            docs, tfs = self.postings(term)
+            if docs is None or not len(docs):
+                continue
+            df = len(docs)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norms[docs])
+
+        mask = scores > 0
+        if year is not None:
+            mask &= self.years == year
+        if sources is not None:
+            mask &= np.isin(self.sources, [SOURCE_CODES[source] for source in sources])
+        matched = np.flatnonzero(mask)
+        total = len(matched)
+
+        ranks = np.rint(scores[matched] * SCORE_SCALE).astype(np.int64)
+        if after is not None:
+            rank, source, id = after
+            match_sources, match_ids = self.sources[matched], self.ids[matched]
+            keep = (ranks < rank) | ((ranks == rank) & (
+                (match_sources > source) | ((match_sources == source) & (match_ids > id))
+            ))
+            matched, ranks = matched[keep], ranks[keep]
+
+        # Everything tied with the (limit + 1)th rank, then an exact sort
+        if len(matched) > limit + 1:
+            kth = np.partition(ranks, len(ranks) - limit - 1)[len(ranks) - limit - 1]
+            top = ranks >= kth
+            matched, ranks = matched[top], ranks[top]
+        order = np.lexsort((self.ids[matched], self.sources[matched], -ranks))[:limit + 1]
+        page = [
+            (int(ranks[i]), int(self.sources[matched[i]]), int(self.ids[matched[i]]),
+             int(self.years[matched[i]]), float(scores[matched[i]]))
+            for i in order
+        ]
+        return total, page[:limit], len(page) > limit
+
+
+def load_corpus() -> SearchCorpus:
+    """Build a corpus from the database (blocking; runs in a similarity worker)."""
+    corpus = SearchCorpus()
+    db = syncSessionLocal()
+
+    def documents():
+        for source in SOURCES:
+            rows = db.execute(document_query(source).execution_options(yield_per=1000))
+            for id, year, title, description, tools in rows:
+                yield source, id, year, title, description, tools
+
+    try:
+        corpus.build(documents())
+    finally:
+        db.close()
+    return corpus
+
+
+class SearchIndex:
+    """
+    Owns the current SearchCorpus: loaded in the background from startup
+    (searches get a 503 with Retry-After until the first load is done) and
+    reloaded every SEARCH_INDEX_REFRESH seconds (searches keep using the
+    previous corpus meanwhile), with new rows synced by id in between.
+
+    Loads are built in the similarity pool: tokenizing the whole catalogue
+    holds the GIL for seconds, which in a thread would stall every request
+    of this process. Only the finished arrays come back.
+    """
+
+    def __init__(self, refresh_seconds: float = SEARCH_INDEX_REFRESH, sync_seconds: float = SEARCH_SYNC_INTERVAL,
+                 retry_after: int = SEARCH_RETRY_AFTER):
+        self.refresh_seconds = refresh_seconds
+        self.sync_seconds = sync_seconds
+        self.retry_after = retry_after
+        self.corpus: Optional[SearchCorpus] = None
+        self.loaded_at: Optional[float] = None
+        self.synced_at = 0.0
+        self._reload: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Load the corpus now; start() does it in the background."""
+        start = time.perf_counter()
+        corpus = await similarity_pool.run(load_corpus)
+        self.corpus, self.loaded_at = corpus, time.monotonic()
+        logger.info(f"Search index loaded: {len(corpus)} documents in {time.perf_counter() - start:.1f} s")
+
+    async def _reload_in_background(self):
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Search index load failed: {str(e)}")
+
+    def start(self):
+        """Load (or reload) the corpus in the background unless a load is running."""
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.create_task(self._reload_in_background())
+
+    async def ensure_ready(self, db: AsyncSession) -> SearchCorpus:
+        if self.corpus is None:
+            # Not loaded by the lifespan yet, or that load failed
+            self.start()
+            raise HTTPException(
+                status_code=503,
+                detail="Search index is loading, please try again shortly",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        if time.monotonic() - self.loaded_at > self.refresh_seconds:
+            self.start()
+
+        if time.monotonic() - self.synced_at > self.sync_seconds:
+            self.synced_at = time.monotonic()
+            corpus = self.corpus
+            for source in SOURCES:
+                rows = (await db.execute(
+                    document_query(source, corpus.last_ids[source])
+                    .order_by(SOURCE_MODELS[source].id)
+                    .limit(SEARCH_SYNC_BATCH)
+                )).all()
+                corpus.add([(source, *row) for row in rows])
+        return self.corpus
+
+    async def search(self, db: AsyncSession, query: str, year: Optional[int] = None,
+                     sources: Optional[List[str]] = None, after=None, limit: int = 20):
+        """Returns (query terms, total matches, page, more pages) as SearchCorpus.search does."""
+        terms = list(dict.fromkeys(text_pipeline.tokenize(query)))
+        corpus = await self.ensure_ready(db)
+        if not terms:
+            return terms, 0, [], False
+        return (terms, *corpus.search(terms, year=year, sources=sources, after=after, limit=limit))
+
+    def stats(self) -> dict:
+        corpus = self.corpus
+        return {
+            "documents": len(corpus) if corpus else 0,
+            "terms": len(corpus.vocabulary) if corpus else 0,
+            "delta_terms": len(corpus.delta) if corpus else 0,
+            "loaded_seconds_ago": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            "loading": self._reload is not None and not self._reload.done(),
+        }
+
+
+def highlight(text: str, terms: Iterable[str], words: Optional[int] = None) -> str:
+    """
+    HTML-escaped text with the words matching the (normalized, stemmed)
+    query terms wrapped in <mark>. With words, only a window of that many
+    words around the first match is kept.
+    """
+    terms = set(terms)
+    matches = [
+        (match.start(), match.end(), bool(terms.intersection(text_pipeline.tokenize(match.group()))))
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+    if not matches:
+        return html.escape(text)
+    start_word, end_word = 0, len(matches)
+    if words is not None and len(matches) > words:
+        first = next((i for i, (_, _, hit) in enumerate(matches) if hit), 0)
+        start_word = max(0, min(first - words // 4, len(matches) - words))
+        end_word = start_word + words
+
+    parts = ["…" if start_word > 0 else ""]
+    position = matches[start_word][0] if start_word > 0 else 0
+    for begin, end, hit in matches[start_word:end_word]:
+        if hit:
+            parts.append(html.escape(text[position:begin]))
+            parts.append(f"<mark>{html.escape(text[begin:end])}</mark>")
+            position = end
+    stop = matches[end_word - 1][1] if end_word < len(matches) else len(text)
+    parts.append(html.escape(text[position:stop]))
+    if end_word < len(matches):
+        parts.append("…")
+    return "".join(parts)
+
+
+async def search_hits(db: AsyncSession, terms: List[str], page) -> List[schemas.SearchHit]:
+    """
+    Highlighted results for a page of SearchCorpus.search, with title and
+    description read in one query per source. Rows deleted since the index
+    was loaded are left out.
+    """
+    documents = {}
+    for code, source in enumerate(SOURCES):
+        ids = [id for _, source_code, id, _, _ in page if source_code == code]
+        if ids:
+            model = SOURCE_MODELS[source]
+            rows = await db.execute(select(model.id, model.title, model.description).where(model.id.in_(ids)))
+            for id, title, description in rows:
+                documents[(code, id)] = (title, description)
+
+    hits = []
+    for _, code, id, year, score in page:
+        if (code, id) not in documents:
+            continue
+        title, description = documents[(code, id)]
+        hits.append(schemas.SearchHit(
+            source=SOURCES[code],
+            id=id,
+            year=year,
+            score=round(score, 4),
+            title=title,
+            title_highlight=highlight(title, terms),
+            snippet=highlight(description, terms, words=SEARCH_SNIPPET_WORDS)
+        ))
+    return hits
+
+
+search_index = SearchIndex()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from controllers.similarity_jobs import SOURCE_MODELS, score_proposal_batch
+from controllers.similarity_pool import similarity_pool
+
+logger = logging.getLogger(__name__)
+
+# Proposals per pool job; progress advances one chunk at a time
+SIMILARITY_BATCH_CHUNK = int(os.getenv("SIMILARITY_BATCH_CHUNK", "50"))
+# Finished jobs (and their results) kept in memory for polling and download
+SIMILARITY_BATCH_KEEP = int(os.getenv("SIMILARITY_BATCH_KEEP", "20"))
+
+
+class BatchJob:
+    """
+    One admin batch screening, run in the background on the similarity pool.
+
+    Chunks run one at a time, so a batch never takes more than one pool slot
+    away from interactive /v1/add-project-idea checks. Results accumulate in
+    order and can be streamed while the job is still running.
+    """
+
+    def __init__(self, year: int, corpus_ids: dict, proposal_ids: List[int], min_score: float, top_k: int):
+        self.job_id = uuid.uuid4().hex
+        self.year = year
+        self.corpus_ids = corpus_ids
+        self.proposal_ids = proposal_ids
+        self.min_score = min_score
+        self.top_k = top_k
+        self.status = "queued"
+        self.results = []
+        self.done = 0
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "year": self.year,
+            "total": len(self.proposal_ids),
+            "done": self.done,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def run(self):
+        self.status = "running"
+        await self._notify()
+        try:
+            for start in range(0, len(self.proposal_ids), SIMILARITY_BATCH_CHUNK):
+                chunk = self.proposal_ids[start:start + SIMILARITY_BATCH_CHUNK]
+                while True:
+                    try:
+                        results = await similarity_pool.run(
+                            score_proposal_batch, self.job_id, self.year, self.corpus_ids,
+                            self.proposal_ids, chunk, self.min_score, self.top_k
+                        )
+                        break
+                    except HTTPException as e:
+                        # Pool busy or restarting: wait our turn instead of failing the job
+                        if e.status_code != 503:
+                            raise
+                        await asyncio.sleep(similarity_pool.retry_after)
+                self.results.extend(results)
+                self.done += len(chunk)
+                await self._notify()
+            self.status = "done"
+        except asyncio.CancelledError:
+            # Shutdown (or a cancelled task): streams must not wait for more chunks
+            logger.warning(f"Similarity batch {self.job_id} cancelled after {self.done} proposals")
+            self.status = "cancelled"
+            self.error = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Similarity batch {self.job_id} failed: {str(e)}")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now()
+            await self._notify()
+
+    async def stream(self):
+        """Yield results as NDJSON lines, waiting for chunks still running."""
+        sent = 0
+        while True:
+            while sent < len(self.results):
+                yield json.dumps(self.results[sent]) + "\n"
+                sent += 1
+            if self.finished:
+                break
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.results) > sent or self.finished)
+        if self.status in ("failed", "cancelled"):
+            yield json.dumps({"error": self.error}) + "\n"
+
+
+async def pin_corpus(db: AsyncSession, year: int) -> dict:
+    """
+    Highest id per source in an academic year. A job only scores against the
+    rows up to these, so all of its chunks see the same corpus.
+    """
+    return {
+        source: await db.scalar(select(func.max(model.id)).where(model.year == year)) or 0
+        for source, model in SOURCE_MODELS
+    }
+
+
+class BatchJobs:
+    """In-memory registry of the batch jobs of this process."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self._jobs = OrderedDict()
+
+    def start(self, year: int, corpus_ids: dict, proposal_ids: List[int], min_score: float, top_k: int) -> BatchJob:
+        job = BatchJob(year, corpus_ids, proposal_ids, min_score, top_k)
+        self._jobs[job.job_id] = job
+        job.task = asyncio.create_task(job.run())
+        finished = [job_id for job_id, old in self._jobs.items() if old.finished]
+        for job_id in finished[:max(len(self._jobs) - self.keep, 0)]:
+            del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> BatchJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Similarity batch '{job_id}' not found")
+        return job
+
+    def cancel_all(self):
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+
+
+batch_jobs = BatchJobs(SIMILARITY_BATCH_KEEP)
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.db import sessionLocal
+from controllers.similarity_index import SOURCES
+from controllers.similarity_jobs import compute_year_graph, score_document
+from controllers.similarity_pool import similarity_pool
+
+logger = logging.getLogger(__name__)
+
+# Neighbours kept per document, and the lowest score worth an edge
+SIMILARITY_GRAPH_TOP_K = int(os.getenv("SIMILARITY_GRAPH_TOP_K", "10"))
+SIMILARITY_GRAPH_MIN_SCORE = float(os.getenv("SIMILARITY_GRAPH_MIN_SCORE", "0.1"))
+
+SOURCE_MODELS = {
+    "Project": models.Project,
+    "College Idea": models.CollegeIdeas,
+    "Team Project": models.TeamProject,
+}
+
+Node = Tuple[str, int]
+
+_background_tasks = set()
+
+# Graph writes of a year (incremental links and rebuilds) run one at a time,
+# so a rebuild cannot interleave with a link and two links do not both insert
+# the edge between their documents
+_year_locks = {}
+
+
+def year_lock(year: int) -> asyncio.Lock:
+    lock = _year_locks.get(year)
+    if lock is None:
+        lock = asyncio.Lock()
+        _year_locks[year] = lock
+    return lock
+
+
+async def link_document(db: AsyncSession, year: int, node: Node, scores: Iterable[Tuple[str, int, float]]):
+    """
+    Add a newly inserted document to the graph from its scores against the
+    rest of its year: its own top-k edges, plus an edge back from every
+    neighbour whose top-k it now enters (evicting that neighbour's weakest
+    edge when its list is full). Edges already stored, e.g. by a neighbour
+    linked before this document's scores came back, are left as they are.
+    Callers hold year_lock(year).
+    """
+    scores = [
+        (source, id, score) for source, id, score in scores
+        if source in SOURCES and (source, id) != node and score >= SIMILARITY_GRAPH_MIN_SCORE
+    ]
+    if not scores:
+        return
+    scores.sort(key=lambda item: -item[2])
+
+    # Edges from and to the document that are already stored
+    existing = set((await db.execute(
+        select(
+            models.SimilarityEdge.source_type,
+            models.SimilarityEdge.source_id,
+            models.SimilarityEdge.target_type,
+            models.SimilarityEdge.target_id
+        ).where(or_(
+            and_(models.SimilarityEdge.source_type == node[0], models.SimilarityEdge.source_id == node[1]),
+            and_(models.SimilarityEdge.target_type == node[0], models.SimilarityEdge.target_id == node[1])
+        ))
+    )).all())
+
+    edges = [
+        models.SimilarityEdge(
+            year=year, source_type=node[0], source_id=node[1],
+            target_type=source, target_id=id, score=score
+        )
+        for source, id, score in scores[:SIMILARITY_GRAPH_TOP_K]
+        if (node[0], node[1], source, id) not in existing
+    ]
+
+    # Current size and weakest edge of every neighbour's list, in one query
+    by_node = {
+        (source, id): score for source, id, score in scores
+        if (source, id, node[0], node[1]) not in existing
+    }
+    if not by_node and not edges:
+        return
+    lists = {
+        (row.source_type, row.source_id): (row.edges, row.weakest)
+        for row in (await db.execute(
+            select(
+                models.SimilarityEdge.source_type,
+                models.SimilarityEdge.source_id,
+                func.count().label("edges"),
+                func.min(models.SimilarityEdge.score).label("weakest")
+            ).where(
+                tuple_(models.SimilarityEdge.source_type, models.SimilarityEdge.source_id).in_(list(by_node))
+            ).group_by(models.SimilarityEdge.source_type, models.SimilarityEdge.source_id)
+        )).all()
+    }
+    full = []
+    for neighbour, score in by_node.items():
+        count, weakest = lists.get(neighbour, (0, None))
+        if count >= SIMILARITY_GRAPH_TOP_K and score <= weakest:
+            continue
+        if count >= SIMILARITY_GRAPH_TOP_K:
+            full.append(neighbour)
+        edges.append(models.SimilarityEdge(
+            year=year, source_type=neighbour[0], source_id=neighbour[1],
+            target_type=node[0], target_id=node[1], score=score
+        ))
+
+    if full:
+        rows = (await db.execute(
+            select(
+                models.SimilarityEdge.id,
+                models.SimilarityEdge.source_type,
+                models.SimilarityEdge.source_id,
+                models.SimilarityEdge.score
+            ).where(
+                tuple_(models.SimilarityEdge.source_type, models.SimilarityEdge.source_id).in_(full)
+            )
+        )).all()
+        weakest = {}
+        for row in rows:
+            key = (row.source_type, row.source_id)
+            if key not in weakest or row.score < weakest[key][1]:
+                weakest[key] = (row.id, row.score)
+        await db.execute(delete(models.SimilarityEdge).where(
+            models.SimilarityEdge.id.in_([edge_id for edge_id, _ in weakest.values()])
+        ))
+
+    db.add_all(edges)
+    await db.commit()
+
+
+async def index_document(year: int, node: Node, title: str, description: str, scores=None):
+    """
+    Link a stored document into the graph, scoring it on the similarity pool
+    unless the caller already has its scores against the year.
+    """
+    if scores is None:
+        scores = await similarity_pool.run(score_document, year, title, description)
+    async with year_lock(year), sessionLocal() as db:
+        await link_document(db, year, node, scores)
+
+
+def schedule(coro):
+    """Run graph maintenance after the response, logging instead of raising."""
+    async def runner():
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"Similarity graph update failed: {str(e)}")
+
+    task = asyncio.create_task(runner())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def rebuild_year(db: AsyncSession, year: int) -> int:
+    """Recompute the whole graph of an academic year and replace its edges."""
+    async with year_lock(year):
+        edges = await similarity_pool.run(
+            compute_year_graph, year, SIMILARITY_GRAPH_TOP_K, SIMILARITY_GRAPH_MIN_SCORE
+        )
+        await db.execute(delete(models.SimilarityEdge).where(models.SimilarityEdge.year == year))
+        db.add_all([
+            models.SimilarityEdge(
+                year=year, source_type=source, source_id=id,
+                target_type=target_type, target_id=target_id, score=score
+            )
+            for source, id, target_type, target_id, score in edges
+        ])
+        await db.commit()
+    return len(edges)
+
+
+async def fetch_titles(db: AsyncSession, nodes: Iterable[Node]) -> dict:
+    titles = {}
+    nodes = set(nodes)
+    for source, model in SOURCE_MODELS.items():
+        ids = [id for node_source, id in nodes if node_source == source]
+        if ids:
+            for row in (await db.execute(select(model.id, model.title).where(model.id.in_(ids)))).all():
+                titles[(source, row.id)] = row.title
+    return titles
+
+
+async def neighbours(db: AsyncSession, node: Node, limit: int) -> List[dict]:
+    edges = (await db.execute(
+        select(models.SimilarityEdge.target_type, models.SimilarityEdge.target_id, models.SimilarityEdge.score)
+        .where(models.SimilarityEdge.source_type == node[0], models.SimilarityEdge.source_id == node[1])
+        .order_by(models.SimilarityEdge.score.desc())
+        .limit(limit)
+    )).all()
+    titles = await fetch_titles(db, [(edge.target_type, edge.target_id) for edge in edges])
+    return [
+        {
+            "source": edge.target_type,
+            "id": edge.target_id,
+            "title": titles.get((edge.target_type, edge.target_id), ""),
+            "similarity_score": round(edge.score, 4),
+        }
+        for edge in edges
+    ]
+
+
+async def clusters(db: AsyncSession, year: int, threshold: float) -> List[List[dict]]:
+    """
+    Connected components of the year's graph restricted to edges scoring at
+    least threshold, largest first. Documents without such an edge are left out.
+    """
+    edges = (await db.execute(
+        select(
+            models.SimilarityEdge.source_type, models.SimilarityEdge.source_id,
+            models.SimilarityEdge.target_type, models.SimilarityEdge.target_id
+        ).where(models.SimilarityEdge.year == year, models.SimilarityEdge.score >= threshold)
+    )).all()
+
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for edge in edges:
+        a, b = find((edge.source_type, edge.source_id)), find((edge.target_type, edge.target_id))
+        if a != b:
+            parent[a] = b
+
+    groups = {}
+    for node in parent:
+        groups.setdefault(find(node), []).append(node)
+    titles = await fetch_titles(db, parent)
+    return [
+        [{"source": source, "id": id, "title": titles.get((source, id), "")} for source, id in sorted(members)]
+        for members in sorted(groups.values(), key=len, reverse=True)
+    ]
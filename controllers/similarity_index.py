@@ -0,0 +1,269 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+import numpy as np
+from scipy import sparse
+
+from controllers.text_processing import analyze, text_pipeline
+
+# Vectorizer settings shared with calculate_similarity_multi_source. Documents
+# are given as token streams from text_pipeline; analyze adds the bigrams.
+VECTORIZER_OPTIONS = {
+    "analyzer": analyze,
+    "max_features": 1000,
+}
+
+# The index reproduces the full refit exactly: the submitted document takes
+# part in feature selection and document frequencies just as it does when
+# calculate_similarity_multi_source refits on [query] + corpus. Scores agree
+# with the refit to within floating point error (well below this tolerance).
+SCORE_TOLERANCE = 1e-9
+
+SOURCES = ("Project", "College Idea", "Team Project")
+
+# Rows counted into one sparse block at a time while (re)loading, so loading
+# a year never holds more than one block's triplets in Python lists
+APPEND_BATCH = 1000
+
+
+def document_text(title, description):
+    return f"{title} {description}"
+
+
+def document_tokens(title, description):
+    return text_pipeline.tokenize(document_text(title, description))
+
+
+class SimilarityIndex:
+    """
+    TF-IDF index of every Project, CollegeIdeas and TeamProject row of one
+    academic year.
+
+    Keeps the vocabulary, per-term document frequencies and a sparse matrix of
+    raw term counts, so inserting a row only counts the n-grams of its
+    (cached) token stream. A query tokenizes the submitted document once,
+    derives the IDF weights (and the max_features cut) the refit would have
+    produced, and scores every stored document with sparse matrix-vector
+    products over the count matrix.
+    """
+
+    def __init__(self, year: int):
+        self.year = year
+        self._max_features = VECTORIZER_OPTIONS["max_features"]
+        self._analyzer = VECTORIZER_OPTIONS["analyzer"]
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.sources = []
+        self.last_ids = {source: 0 for source in SOURCES}
+        # Rows held per source, compared with the year's row counts on sync
+        self.counts = {source: 0 for source in SOURCES}
+        self.loaded = False
+        self.loaded_at = None
+        self.vocabulary = {}
+        self.term_counts = np.zeros(0, dtype=np.int64)
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        # Terms in sklearn's feature order, used to break frequency ties the
+        # same way the max_features cut does
+        self._sorted_terms = []
+        self._sorted_cols = np.zeros(0, dtype=np.int64)
+        self._counts = None
+        self._counts_sq = None
+        self._pending = []
+
+    def __len__(self):
+        return len(self.sources)
+
+    def fit(self, docs):
+        """
+        Rebuild the index from scratch.
+        docs is an iterable of (source_type, id, title, tokens) tuples.
+        """
+        with self._lock:
+            self._reset()
+            self._append(docs)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def add(self, docs):
+        """Append newly inserted rows without touching the existing ones."""
+        with self._lock:
+            self._append(docs)
+
+    def query(self, title: str, description: str, with_ids: bool = False):
+        """
+        Score a document against the index.
+        Returns list of (source_type, title, similarity_score) tuples, or
+        (source_type, id, title, similarity_score) tuples with with_ids.
+        """
+        counts = Counter(self._analyzer(document_tokens(title, description)))
+
+        with self._lock:
+            if not self.sources:
+                return []
+            self._consolidate()
+
+            vocab_size = len(self.vocabulary)
+            q_cols, q_tf, oov_terms, oov_tf = [], [], [], []
+            for term, tf in counts.items():
+                col = self.vocabulary.get(term)
+                if col is None:
+                    oov_terms.append(term)
+                    oov_tf.append(tf)
+                else:
+                    q_cols.append(col)
+                    q_tf.append(tf)
+            q_cols = np.asarray(q_cols, dtype=np.int64)
+            q_tf = np.asarray(q_tf, dtype=np.int64)
+            oov_tf = np.asarray(oov_tf, dtype=np.int64)
+
+            n_docs = len(self.sources) + 1
+            totals = self.term_counts.copy()
+            totals[q_cols] += q_tf
+            doc_freq = self.doc_freq.copy()
+            doc_freq[q_cols] += 1
+
+            if vocab_size + len(oov_terms) == 0:
+                return []
+            selected, oov_selected = self._select_features(totals, oov_terms, oov_tf)
+
+            idf = np.log((n_docs + 1) / (doc_freq + 1)) + 1
+            idf[~selected] = 0.0
+            oov_weights = oov_tf[oov_selected] * (np.log((n_docs + 1) / 2) + 1)
+
+            q_weights = np.zeros(vocab_size)
+            q_weights[q_cols] = q_tf * idf[q_cols]
+            q_norm = np.sqrt(np.dot(q_weights, q_weights) + np.dot(oov_weights, oov_weights))
+
+            doc_norms = np.sqrt(self._counts_sq @ (idf * idf))
+            dots = self._counts @ (q_weights * idf)
+            sources = self.sources
+
+        denom = doc_norms * q_norm
+        scores = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+        if with_ids:
+            return [
+                (sources[i][0], sources[i][1], sources[i][2], float(score))
+                for i, score in enumerate(scores)
+            ]
+        return [
+            (sources[i][0], sources[i][2], float(score))
+            for i, score in enumerate(scores)
+        ]
+
+    def _append(self, docs):
+        docs = iter(docs)
+        new_terms = []
+        while True:
+            batch = list(islice(docs, APPEND_BATCH))
+            if not batch:
+                break
+            self._append_batch(batch, new_terms)
+
+        if new_terms and not self._sorted_terms:
+            new_terms.sort()
+            self._sorted_terms = new_terms
+            self._sorted_cols = np.fromiter(
+                (self.vocabulary[term] for term in new_terms), dtype=np.int64, count=len(new_terms)
+            )
+        elif new_terms:
+            # Merged once per load rather than per batch: the sorted vocabulary
+            # can run to millions of n-grams
+            new_terms.sort()
+            positions = [bisect_left(self._sorted_terms, term) for term in new_terms]
+            self._sorted_cols = np.insert(
+                self._sorted_cols, positions, [self.vocabulary[term] for term in new_terms]
+            )
+            # Two sorted runs, so this is a linear merge
+            self._sorted_terms.extend(new_terms)
+            self._sorted_terms.sort()
+
+    def _append_batch(self, docs, new_terms):
+        indices, data, indptr = [], [], [0]
+        new_sources = []
+        for source, doc_id, title, tokens in docs:
+            for term, tf in Counter(self._analyzer(tokens)).items():
+                col = self.vocabulary.get(term)
+                if col is None:
+                    col = len(self.vocabulary)
+                    self.vocabulary[term] = col
+                    new_terms.append(term)
+                indices.append(col)
+                data.append(tf)
+            indptr.append(len(indices))
+            new_sources.append((source, doc_id, title))
+            self.counts[source] += 1
+            if doc_id > self.last_ids.get(source, 0):
+                self.last_ids[source] = doc_id
+
+        if not new_sources:
+            return
+
+        vocab_size = len(self.vocabulary)
+        grow = vocab_size - len(self.term_counts)
+        if grow:
+            self.term_counts = np.concatenate([self.term_counts, np.zeros(grow, dtype=np.int64)])
+            self.doc_freq = np.concatenate([self.doc_freq, np.zeros(grow, dtype=np.int64)])
+        indices = np.asarray(indices, dtype=np.int64)
+        np.add.at(self.term_counts, indices, np.asarray(data, dtype=np.int64))
+        np.add.at(self.doc_freq, indices, 1)
+
+        self._pending.append(sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), indices, indptr),
+            shape=(len(new_sources), vocab_size)
+        ))
+        self.sources.extend(new_sources)
+
+    def _consolidate(self):
+        """Stack rows appended since the last query into the count matrix."""
+        if not self._pending:
+            return
+        vocab_size = len(self.vocabulary)
+        blocks = [] if self._counts is None else [self._counts]
+        blocks.extend(self._pending)
+        for block in blocks:
+            block.resize((block.shape[0], vocab_size))
+        self._counts = sparse.vstack(blocks, format="csr")
+        self._counts_sq = self._counts.multiply(self._counts).tocsr()
+        self._pending = []
+
+    def _select_features(self, totals, oov_terms, oov_tf):
+        """
+        Apply the max_features cut the way CountVectorizer does: the most
+        frequent terms win, ties resolved by argsort over alphabetical order.
+        """
+        vocab_size = len(totals)
+        selected = np.ones(vocab_size, dtype=bool)
+        oov_selected = np.ones(len(oov_terms), dtype=bool)
+        if vocab_size + len(oov_terms) <= self._max_features:
+            return selected, oov_selected
+
+        order = sorted(range(len(oov_terms)), key=lambda i: oov_terms[i])
+        positions = [bisect_left(self._sorted_terms, oov_terms[i]) for i in order]
+        tfs = np.insert(totals[self._sorted_cols], positions, oov_tf[order])
+        keys = np.insert(self._sorted_cols, positions, [-(i + 1) for i in order])
+
+        top = keys[(-tfs).argsort()[:self._max_features]]
+        selected[:] = False
+        selected[top[top >= 0]] = True
+        oov_selected[:] = False
+        oov_selected[-top[top < 0] - 1] = True
+        return selected, oov_selected
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(year: int) -> SimilarityIndex:
+    """Return the long-lived index for an academic year, creating it if needed."""
+    with _indexes_lock:
+        index = _indexes.get(year)
+        if index is None:
+            index = SimilarityIndex(year)
+            _indexes[year] = index
+        return index
@@ -0,0 +1,451 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+from scipy import sparse
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+from typing import List, Optional
+
+from app import models
+from app.db import sync_engine, syncSessionLocal
+from controllers import embeddings
+from controllers.embeddings import EmbeddingIndex, get_embedding_index
+from controllers.near_duplicates import MinHashLSH, get_lsh
+from controllers.similarity_index import VECTORIZER_OPTIONS, SimilarityIndex, document_text, document_tokens, get_index
+from controllers.text_processing import text_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Also compare proposals against other years, through the MinHash/LSH index
+NEAR_DUPLICATE_CHECK = os.getenv("NEAR_DUPLICATE_CHECK", "1") == "1"
+# Rows fetched per round trip when streaming a corpus
+CORPUS_BATCH_SIZE = int(os.getenv("SIMILARITY_CORPUS_BATCH_SIZE", "1000"))
+# Full refit interval of a worker's per-year indexes, which drops edited and
+# deleted rows; in between, new rows are added by id
+SIMILARITY_INDEX_REFRESH = float(os.getenv("SIMILARITY_INDEX_REFRESH", "300"))
+# Same for the all-years near-duplicate index, which is costlier to refit
+NEAR_DUPLICATE_REFRESH = float(os.getenv("NEAR_DUPLICATE_REFRESH", "3600"))
+# Batch job models each worker keeps, so concurrent jobs do not evict each other
+SIMILARITY_BATCH_MODELS = int(os.getenv("SIMILARITY_BATCH_MODELS", "2"))
+
+SOURCE_MODELS = (
+    ("Project", models.Project),
+    ("College Idea", models.CollegeIdeas),
+    ("Team Project", models.TeamProject),
+)
+
+def init_worker():
+    # Never reuse connections inherited from the parent process
+    sync_engine.dispose(close=False)
+    if embeddings.embeddings_enabled():
+        embeddings.get_encoder()
+
+def rendezvous(barrier, timeout: float) -> int:
+    """
+    Block until every worker holds one of these tasks, so that a batch of
+    them starts each worker of the pool. Returns the worker's pid.
+    """
+    barrier.wait(timeout)
+    return os.getpid()
+
+def load_documents(db: Session, source: str, model, *criteria, with_year: bool = False):
+    """
+    Yield (source_type, id, [year,] title, tokens) rows of one source table.
+
+    Only the needed columns are selected, and rows are streamed from a
+    server-side cursor CORPUS_BATCH_SIZE at a time, so consumers such as the
+    index can count terms while the rows arrive.
+
+    Token streams come from the document_tokens cache when its content hash
+    still matches the row; the others are tokenized here and written back
+    once the stream is drained (the connection is busy until then).
+    """
+    cache = models.DocumentTokens
+    columns = [model.id, model.title, model.description, cache.id.label("cache_id"), cache.content_hash, cache.tokens]
+    if with_year:
+        columns.insert(1, model.year)
+    result = db.execute(
+        select(*columns).outerjoin(cache, and_(
+            cache.source_type == source,
+            cache.source_id == model.id
+        )).where(*criteria).order_by(model.id).execution_options(yield_per=CORPUS_BATCH_SIZE)
+    )
+
+    stale = []
+    for row in result:
+        content_hash = text_pipeline.content_hash(row.title, row.description)
+        if row.content_hash == content_hash:
+            tokens = row.tokens.split()
+        else:
+            tokens = document_tokens(row.title, row.description)
+            stale.append((row.id, row.cache_id, content_hash, " ".join(tokens)))
+        year = (row.year,) if with_year else ()
+        yield (source, row.id, *year, row.title, tokens)
+
+    if stale:
+        store_tokens(db, source, stale)
+
+def store_tokens(db: Session, source: str, stale: list):
+    """
+    Upsert recomputed token streams, given as (id, cache_id, content_hash,
+    tokens) with cache_id None for rows never cached. Bulk statements in
+    CORPUS_BATCH_SIZE chunks; a failure only costs a re-tokenize later.
+    """
+    cache = models.DocumentTokens
+    try:
+        for start in range(0, len(stale), CORPUS_BATCH_SIZE):
+            chunk = stale[start:start + CORPUS_BATCH_SIZE]
+            new = [
+                {"source_type": source, "source_id": id, "content_hash": content_hash, "tokens": tokens}
+                for id, cache_id, content_hash, tokens in chunk if cache_id is None
+            ]
+            changed = [
+                {"id": cache_id, "content_hash": content_hash, "tokens": tokens}
+                for _, cache_id, content_hash, tokens in chunk if cache_id is not None
+            ]
+            if new:
+                db.execute(insert(cache), new)
+            if changed:
+                db.execute(update(cache), changed)
+        db.commit()
+    except SQLAlchemyError as e:
+        # Usually another worker caching the same rows first
+        db.rollback()
+        logger.warning(f"Could not cache document tokens: {str(e)}")
+
+def load_similarity_corpus(db: Session, year: int, after: Optional[dict] = None, until: Optional[dict] = None):
+    """
+    Yield (source_type, id, title, tokens) rows for an academic year.
+    With after, only rows whose id is above the last one seen per source;
+    with until, only rows up to the given id per source.
+    """
+    after = after or {}
+    for source, model in SOURCE_MODELS:
+        criteria = [model.year == year, model.id > after.get(source, 0)]
+        if until is not None:
+            criteria.append(model.id <= until.get(source, 0))
+        yield from load_documents(db, source, model, *criteria)
+
+def year_row_counts(db: Session, year: Optional[int] = None) -> dict:
+    """Rows per source of an academic year (of every year if None), in one statement."""
+    counts = db.execute(select(*[
+        select(func.count()).select_from(model).where(
+            *([model.year == year] if year is not None else [])
+        ).scalar_subquery()
+        for _, model in SOURCE_MODELS
+    ])).one()
+    return {source: count for (source, _), count in zip(SOURCE_MODELS, counts)}
+
+def index_expired(index, refresh: Optional[float] = None) -> bool:
+    if refresh is None:
+        refresh = SIMILARITY_INDEX_REFRESH
+    return not index.loaded or time.monotonic() - index.loaded_at > refresh
+
+def sync_similarity_index(index: SimilarityIndex, db: Session):
+    """
+    Bring the year's index up to date with the database.
+    Rows inserted since the last call, whichever route or worker inserted
+    them, are added by id. The year is refit from scratch on first use,
+    every SIMILARITY_INDEX_REFRESH seconds (edits), and when its row counts
+    no longer match the index: a deleted row, or a lower id committed after
+    a higher one was indexed (MySQL hands out auto-increment ids at insert,
+    not at commit).
+    """
+    if not index_expired(index):
+        index.add(load_similarity_corpus(db, index.year, after=index.last_ids))
+        if index.counts == year_row_counts(db, index.year):
+            return
+    index.fit(load_similarity_corpus(db, index.year))
+
+def load_all_years_corpus(db: Session, after: Optional[dict] = None):
+    """
+    Yield (source_type, id, year, title, tokens) rows of every year,
+    with after only those above the last id seen per source.
+    """
+    after = after or {}
+    for source, model in SOURCE_MODELS:
+        yield from load_documents(db, source, model, model.id > after.get(source, 0), with_year=True)
+
+def sync_near_duplicate_index(lsh: MinHashLSH, db: Session):
+    """Like sync_similarity_index, over every year, refit every NEAR_DUPLICATE_REFRESH seconds."""
+    if not index_expired(lsh, NEAR_DUPLICATE_REFRESH):
+        lsh.add(load_all_years_corpus(db, after=lsh.last_ids))
+        if lsh.counts == year_row_counts(db):
+            return
+    lsh.fit(load_all_years_corpus(db))
+
+def score_other_years(db: Session, lsh: MinHashLSH, year: int, title: str, description: str):
+    """
+    TF-IDF cosine against the LSH candidates from years other than `year`,
+    each scored by its own year's SimilarityIndex. The IDF weights are those
+    of the candidate's whole year, as for same-year matches, so the scores
+    are on the same scale and share the rejection threshold. (A vectorizer
+    fitted on the query and its candidates alone derives the IDF from a few
+    hundred similar documents, which puts the scores on a scale of its own.)
+    Returns list of ("<source_type> (<year>)", id, title, similarity_score) tuples.
+    """
+    by_year = {}
+    for source, id, doc_year in lsh.candidates(title, description):
+        if doc_year != year:
+            by_year.setdefault(doc_year, set()).add((source, id))
+
+    scores = []
+    for doc_year, keys in sorted(by_year.items()):
+        index = get_index(doc_year)
+        sync_similarity_index(index, db)
+        scores.extend(
+            (f"{source} ({doc_year})", id, doc_title, score)
+            for source, id, doc_title, score in index.query(title, description, with_ids=True)
+            if (source, id) in keys
+        )
+    return scores
+
+def load_embeddings(db: Session, source: str, model, *criteria):
+    """
+    Yield (source_type, id, title, vector) rows of one source table, streamed
+    like load_documents. Rows without a current stored embedding are encoded
+    a batch at a time and written back once the stream is drained.
+    """
+    cache = models.DocumentEmbedding
+    result = db.execute(
+        select(
+            model.id, model.title, model.description,
+            cache.id.label("cache_id"), cache.content_hash, cache.vector
+        ).outerjoin(cache, and_(
+            cache.source_type == source,
+            cache.source_id == model.id,
+            cache.model == embeddings.EMBEDDING_MODEL
+        )).where(*criteria).order_by(model.id).execution_options(yield_per=CORPUS_BATCH_SIZE)
+    )
+
+    stale = []
+    for rows in result.partitions():
+        hashes = [embeddings.embedding_hash(row.title, row.description) for row in rows]
+        missing = [i for i, row in enumerate(rows) if row.content_hash != hashes[i]]
+        encoded = dict(zip(missing, embeddings.encode(
+            [document_text(rows[i].title, rows[i].description) for i in missing]
+        )))
+        for i, row in enumerate(rows):
+            if i in encoded:
+                vector = encoded[i]
+                stale.append((row.id, row.cache_id, hashes[i], vector.tobytes()))
+            else:
+                vector = np.frombuffer(row.vector, dtype=np.float32)
+            yield (source, row.id, row.title, vector)
+
+    if stale:
+        store_embeddings(db, source, stale)
+
+def store_embeddings(db: Session, source: str, stale: list):
+    """Upsert (id, cache_id, content_hash, vector bytes) rows, like store_tokens."""
+    cache = models.DocumentEmbedding
+    try:
+        for start in range(0, len(stale), CORPUS_BATCH_SIZE):
+            chunk = stale[start:start + CORPUS_BATCH_SIZE]
+            new = [
+                {"source_type": source, "source_id": id, "model": embeddings.EMBEDDING_MODEL,
+                 "content_hash": content_hash, "vector": vector}
+                for id, cache_id, content_hash, vector in chunk if cache_id is None
+            ]
+            changed = [
+                {"id": cache_id, "content_hash": content_hash, "vector": vector}
+                for _, cache_id, content_hash, vector in chunk if cache_id is not None
+            ]
+            if new:
+                db.execute(insert(cache), new)
+            if changed:
+                db.execute(update(cache), changed)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Could not store document embeddings: {str(e)}")
+
+def year_embeddings(db: Session, year: int, after: Optional[dict] = None):
+    for source, model in SOURCE_MODELS:
+        criteria = [model.year == year]
+        if after is not None:
+            criteria.append(model.id > after[source])
+        yield from load_embeddings(db, source, model, *criteria)
+
+def sync_embedding_index(index: EmbeddingIndex, db: Session):
+    """Like sync_similarity_index; a refit re-encodes only rows whose text changed."""
+    if not index_expired(index):
+        index.add(year_embeddings(db, index.year, after=index.last_ids))
+        if index.counts == year_row_counts(db, index.year):
+            return
+    index.fit(year_embeddings(db, index.year))
+
+def score_same_year(db: Session, year: int, title: str, description: str, mode: str):
+    """
+    Scores against the academic year in the given similarity mode.
+    TF-IDF scores every document; embedding mode only the EMBEDDING_TOP_K
+    nearest by the ANN index; blend mode the union of both, with exact
+    embedding cosines for the TF-IDF matches the ANN lookup did not return.
+    """
+    tfidf = []
+    if mode != "embedding":
+        index = get_index(year)
+        sync_similarity_index(index, db)
+        tfidf = index.query(title, description, with_ids=True)
+        if mode == "tfidf":
+            return tfidf
+
+    dense_index = get_embedding_index(year)
+    sync_embedding_index(dense_index, db)
+    vector = embeddings.encode([document_text(title, description)])[0]
+    if mode == "embedding":
+        return dense_index.query(vector)
+    return embeddings.blend_scores(tfidf, dense_index, vector)
+
+def score_project_idea(year: int, title: str, description: str, mode: str = "tfidf"):
+    """
+    Score a proposal against everything stored for the academic year, and
+    against near-duplicate candidates from every other year.
+    Returns list of (source_type, id, title, similarity_score) tuples.
+    """
+    db = syncSessionLocal()
+    try:
+        same_year = score_same_year(db, year, title, description, mode)
+        other_years = []
+        if NEAR_DUPLICATE_CHECK:
+            lsh = get_lsh()
+            sync_near_duplicate_index(lsh, db)
+            other_years = score_other_years(db, lsh, year, title, description)
+    finally:
+        db.close()
+    return same_year + other_years
+
+
+def fit_year_matrix(year: int, until: Optional[dict] = None):
+    """
+    One TF-IDF fit over an academic year, with the token streams fed to the
+    vectorizer as they are read from the database. until limits the rows as
+    in load_similarity_corpus.
+    Returns ((source_type, id, title) per row, L2-normalised TF-IDF matrix).
+    """
+    docs = []
+
+    def token_streams(db):
+        for source, id, title, tokens in load_similarity_corpus(db, year, until=until):
+            docs.append((source, id, title))
+            yield tokens
+
+    vectorizer = TfidfVectorizer(**VECTORIZER_OPTIONS)
+    db = syncSessionLocal()
+    try:
+        matrix = vectorizer.fit_transform(token_streams(db))
+    except ValueError:
+        # Empty year, or nothing left after stop words: nothing is similar
+        return docs, sparse.csr_matrix((len(docs), 0))
+    finally:
+        db.close()
+    return docs, normalize(matrix).tocsr()
+
+
+# TF-IDF models of the batch jobs this worker served last, by job id
+_batch_models = OrderedDict()
+
+def _load_batch_model(job_id: str, year: int, corpus_ids: dict, proposal_ids: List[int]):
+    """
+    Fit one TF-IDF model over the year's corpus (the proposals are part of it)
+    and keep it for the rest of the job's chunks. The corpus is pinned to
+    the rows up to corpus_ids, taken when the job started, so every worker
+    fits the same rows whatever is inserted meanwhile.
+    """
+    if job_id in _batch_models:
+        _batch_models.move_to_end(job_id)
+        return _batch_models[job_id]
+
+    docs, matrix = fit_year_matrix(year, until=corpus_ids)
+    proposals = set(proposal_ids)
+    model = {
+        "docs": docs,
+        "matrix": matrix,
+        "rows": {doc[1]: i for i, doc in enumerate(docs) if doc[0] == "Team Project"},
+        "is_proposal": np.array([doc[0] == "Team Project" and doc[1] in proposals for doc in docs], dtype=bool),
+    }
+    _batch_models[job_id] = model
+    while len(_batch_models) > SIMILARITY_BATCH_MODELS:
+        _batch_models.popitem(last=False)
+    return model
+
+def score_proposal_batch(job_id: str, year: int, corpus_ids: dict, proposal_ids: List[int], chunk_ids: List[int],
+                         min_score: float, top_k: int):
+    """
+    Score a chunk of a batch job's TeamProject proposals against the rest of
+    the year's corpus and against the other proposals of the batch, with one
+    sparse product of the chunk's rows and the whole TF-IDF matrix.
+    Returns one result dict per proposal of the chunk.
+    """
+    model = _load_batch_model(job_id, year, corpus_ids, proposal_ids)
+    docs, matrix, rows = model["docs"], model["matrix"], model["rows"]
+    chunk_rows = [rows[id] for id in chunk_ids if id in rows]
+    if not chunk_rows:
+        return []
+    scores = (matrix[chunk_rows] @ matrix.T).toarray()
+
+    results = []
+    for i, row in enumerate(chunk_rows):
+        row_scores = scores[i]
+        row_scores[row] = 0.0  # never report a proposal as similar to itself
+        entry = {
+            "team_project_id": docs[row][1],
+            "title": docs[row][2],
+            "max_similarity_score": round(float(row_scores.max()), 4) if len(row_scores) else 0.0,
+        }
+        for key, mask in (("similar_projects", ~model["is_proposal"]), ("similar_proposals", model["is_proposal"])):
+            candidates = np.flatnonzero(mask & (row_scores >= min_score) & (row_scores > 0))
+            candidates = candidates[np.argsort(-row_scores[candidates], kind="stable")[:top_k]]
+            entry[key] = [
+                {
+                    "source": docs[j][0],
+                    "id": docs[j][1],
+                    "title": docs[j][2],
+                    "similarity_score": round(float(row_scores[j]), 4),
+                }
+                for j in candidates
+            ]
+        results.append(entry)
+    return results
+
+def score_document(year: int, title: str, description: str):
+    """
+    Score a stored document against the rest of its academic year, for the
+    similarity graph. Returns list of (source_type, id, similarity_score).
+    """
+    index = get_index(year)
+    db = syncSessionLocal()
+    try:
+        sync_similarity_index(index, db)
+    finally:
+        db.close()
+    return [(source, id, score) for source, id, _, score in index.query(title, description, with_ids=True)]
+
+def compute_year_graph(year: int, top_k: int, min_score: float, chunk: int = 500):
+    """
+    Top-k neighbours of every document of an academic year, from one TF-IDF
+    fit over the year and chunked sparse products of the normalised matrix
+    with itself. Returns list of (source_type, id, target_type, target_id, score).
+    """
+    docs, matrix = fit_year_matrix(year)
+    if len(docs) < 2:
+        return []
+
+    edges = []
+    for start in range(0, len(docs), chunk):
+        scores = (matrix[start:start + chunk] @ matrix.T).toarray()
+        for i, row_scores in enumerate(scores):
+            row = start + i
+            row_scores[row] = 0.0
+            neighbours = np.flatnonzero(row_scores >= min_score)
+            neighbours = neighbours[np.argsort(-row_scores[neighbours], kind="stable")[:top_k]]
+            edges.extend(
+                (docs[row][0], docs[row][1], docs[j][0], docs[j][1], float(row_scores[j]))
+                for j in neighbours if row_scores[j] > 0
+            )
+    return edges
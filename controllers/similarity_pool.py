@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from controllers.similarity_jobs import init_worker, rendezvous
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_WORKERS = int(os.getenv("SIMILARITY_WORKERS", "2"))
+SIMILARITY_QUEUE_SIZE = int(os.getenv("SIMILARITY_QUEUE_SIZE", "16"))
+SIMILARITY_RETRY_AFTER = int(os.getenv("SIMILARITY_RETRY_AFTER", "5"))
+# Seconds warm_up waits for every worker to start (and load its model)
+SIMILARITY_WARM_UP_TIMEOUT = float(os.getenv("SIMILARITY_WARM_UP_TIMEOUT", "300"))
+
+
+class SimilarityPool:
+    """
+    Process pool for CPU-bound similarity jobs.
+
+    At most queue_size jobs may be running or waiting at once; further
+    submissions are refused with 503 and a Retry-After header instead of
+    piling up behind the workers.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.pending = 0
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: the event loop process has threads and open DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.queue_size:
+            raise HTTPException(
+                status_code=503,
+                detail="Similarity service is busy, please try again shortly",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next job
+            self.shutdown(wait=False)
+            raise HTTPException(
+                status_code=503,
+                detail="Similarity service is restarting, please try again shortly",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        finally:
+            self.pending -= 1
+
+    async def warm_up(self, timeout: float = SIMILARITY_WARM_UP_TIMEOUT):
+        """
+        Start every worker now rather than on the first requests, so their
+        initializer (which loads the embedding model, if enabled) runs at
+        startup. The pool only launches a worker when a task finds none idle,
+        so one task per worker is submitted, each blocking on a shared
+        barrier until all of them are running.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            barrier = manager.Barrier(self.workers)
+            try:
+                pids = await asyncio.gather(*(
+                    loop.run_in_executor(executor, rendezvous, barrier, timeout)
+                    for _ in range(self.workers)
+                ))
+            except threading.BrokenBarrierError:
+                # Workers still starting will serve requests once they are up
+                logger.warning(f"Not every similarity worker started within {timeout}s")
+                return
+        logger.info(f"Similarity pool started {len(set(pids))} workers")
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+similarity_pool = SimilarityPool(SIMILARITY_WORKERS, SIMILARITY_QUEUE_SIZE, SIMILARITY_RETRY_AFTER)
@@ -1,9 +1,12 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from controllers.similarity_index import VECTORIZER_OPTIONS
+from controllers.text_processing import text_pipeline
 
 def calculate_similarity_multi_source(project, projects, college_ideas, team_projects):
     """
-    Calculate similarity against multiple data sources.
+    Calculate similarity against multiple data sources by refitting TF-IDF
+    on the whole corpus. Reference implementation for SimilarityIndex.
     Returns list of (source_type, title, similarity_score) tuples.
     """
     proj_txt = f"{project.title} {project.description}"
@@ -31,12 +34,10 @@ def calculate_similarity_multi_source(project, projects, college_ideas, team_pro
     
     try:
         # Calculate TF-IDF and cosine similarity
-        vectorizer = TfidfVectorizer(
-            stop_words='english',
-            max_features=1000,
-            ngram_range=(1, 2)
+        vectorizer = TfidfVectorizer(**VECTORIZER_OPTIONS)
+        tfidf_matrix = vectorizer.fit_transform(
+            [text_pipeline.tokenize(text) for text in [proj_txt] + all_texts]
         )
-        tfidf_matrix = vectorizer.fit_transform([proj_txt] + all_texts)
         similarity_matrix = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
         
         # Return results with source information
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import re
+from typing import Iterable, List
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+logger = logging.getLogger(__name__)
+
+# Comma separated stop word languages (english, arabic)
+TEXT_STOPWORDS = os.getenv("TEXT_STOPWORDS", "english,arabic")
+# light: built-in suffix/prefix stripping, snowball: nltk's English Snowball
+# stemmer plus the Arabic light stemmer (needs nltk), none: keep words as is
+TEXT_STEMMING = os.getenv("TEXT_STEMMING", "light")
+TEXT_NORMALIZE_ARABIC = os.getenv("TEXT_NORMALIZE_ARABIC", "1") == "1"
+
+# Bump when the pipeline changes in a way the settings above do not capture;
+# cached token streams from another version are recomputed
+PIPELINE_VERSION = 1
+
+try:
+    from nltk.stem.snowball import SnowballStemmer
+    SNOWBALL_AVAILABLE = True
+except ImportError:
+    SNOWBALL_AVAILABLE = False
+
+# Same as sklearn's default token_pattern
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+ARABIC_LETTER = re.compile("[\u0621-\u064a]")
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel
+ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+ARABIC_CHARACTERS = str.maketrans({
+    "أ": "ا",  # alef with hamza above
+    "إ": "ا",  # alef with hamza below
+    "آ": "ا",  # alef with madda
+    "ٱ": "ا",  # alef wasla
+    "ى": "ي",  # alef maksura -> ya
+    "ة": "ه",  # ta marbuta -> ha
+    "ؤ": "و",  # waw with hamza
+    "ئ": "ي",  # ya with hamza
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+    **{chr(0x06f0 + d): str(d) for d in range(10)},  # Eastern Arabic-Indic digits
+})
+
+# Common Arabic function words, written as normalize_arabic leaves them
+ARABIC_STOP_WORDS = frozenset("""
+    في من الي علي عن مع هذا هذه ذلك تلك هو هي هم هن انا نحن انت انتم
+    التي الذي الذين اللذين اللتين كان كانت يكون تكون ان او ثم لكن بل قد لقد
+    لم لن لا ما ماذا متي اين كيف كل بعض غير بين عند حتي اذا اذ اي ايضا
+    حيث حول دون خلال عبر منذ لدي ضمن نحو هنا هناك به بها له لها لهم
+    فيه فيها منه منها عليه عليها الا الان وهو وهي وفي ومن والي وعلي كما
+    مثل جدا فقط سوف يتم تم يمكن هل
+""".split())
+
+STOP_WORDS_BY_LANGUAGE = {
+    "english": ENGLISH_STOP_WORDS,
+    "arabic": ARABIC_STOP_WORDS,
+}
+
+ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+ARABIC_SUFFIXES = ("ها", "ان", "ات", "ون", "ين", "يه", "ه", "ي")
+ENGLISH_SUFFIXES = (
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("ousness", "ous"),
+    ("iveness", "ive"), ("ations", "ate"), ("ation", "ate"), ("ments", ""), ("ment", ""),
+    ("ities", "ity"), ("ness", ""), ("ings", ""), ("ing", ""), ("ies", "y"), ("ied", "y"),
+    ("sses", "ss"), ("ers", ""), ("er", ""), ("ed", ""), ("es", ""), ("s", ""),
+)
+VOWEL = re.compile(r"[aeiouy]")
+
+
+def normalize_arabic(text: str) -> str:
+    """Strip diacritics and tatweel, and fold letter variants and digits."""
+    return ARABIC_DIACRITICS.sub("", text).translate(ARABIC_CHARACTERS)
+
+
+def stem_arabic(word: str) -> str:
+    """Light10-style stemming: strip one article/conjunction prefix and suffixes."""
+    for prefix in ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            word = word[len(prefix):]
+            break
+    else:
+        if word.startswith("و") and len(word) >= 4:
+            word = word[1:]
+    for suffix in ARABIC_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            word = word[:-len(suffix)]
+    return word
+
+
+def stem_english_light(word: str) -> str:
+    """
+    Strip one inflectional or common derivational suffix, keeping a stem of
+    at least three letters with a vowel in it.
+    """
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    for suffix, replacement in ENGLISH_SUFFIXES:
+        if word.endswith(suffix):
+            stem = word[:-len(suffix)] + replacement
+            if len(stem) >= 3 and VOWEL.search(stem):
+                if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in "lsz" and not replacement:
+                    stem = stem[:-1]  # running -> run, planned -> plan
+                return stem
+            return word
+    return word
+
+
+class TextPipeline:
+    """
+    Turns a document into the normalized tokens every similarity component
+    (TF-IDF index, batch and graph models, MinHash shingles) works on:
+    lowercasing, Arabic normalization, sklearn's word pattern, multilingual
+    stop words and stemming. Bigrams are built from the surviving tokens,
+    the same way sklearn does after stop word removal.
+    """
+
+    def __init__(self, stopwords: str = TEXT_STOPWORDS, stemming: str = TEXT_STEMMING, normalize: bool = TEXT_NORMALIZE_ARABIC):
+        languages = sorted(filter(None, (language.strip() for language in stopwords.split(","))))
+        for language in languages:
+            if language not in STOP_WORDS_BY_LANGUAGE:
+                raise ValueError(f"Unknown stop word language '{language}'")
+        if stemming not in ("light", "snowball", "none"):
+            raise ValueError(f"Unknown stemming '{stemming}'")
+        if stemming == "snowball" and not SNOWBALL_AVAILABLE:
+            logger.warning("TEXT_STEMMING=snowball needs nltk; using the light stemmer")
+            stemming = "light"
+
+        self.stemming = stemming
+        self.normalize = normalize
+        self.stop_words = frozenset().union(*(STOP_WORDS_BY_LANGUAGE[language] for language in languages))
+        if normalize:
+            self.stop_words = frozenset(normalize_arabic(word) for word in self.stop_words)
+        self._english_stem = stem_english_light
+        if stemming == "snowball":
+            self._english_stem = SnowballStemmer("english").stem
+        self.signature = f"v{PIPELINE_VERSION}|{','.join(languages)}|{stemming}|{int(normalize)}"
+
+    def stem(self, word: str) -> str:
+        if self.stemming == "none":
+            return word
+        if ARABIC_LETTER.match(word):
+            return stem_arabic(word)
+        return self._english_stem(word)
+
+    def tokenize(self, text: str) -> List[str]:
+        text = text.lower()
+        if self.normalize:
+            text = normalize_arabic(text)
+        tokens = []
+        for word in TOKEN_PATTERN.findall(text):
+            if word in self.stop_words:
+                continue
+            word = self.stem(word)
+            if len(word) >= 2:
+                tokens.append(word)
+        return tokens
+
+    def content_hash(self, title: str, description: str) -> str:
+        """Identifies the cached token stream of a document under this pipeline."""
+        text = f"{self.signature}\0{title}\0{description}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def analyze(tokens: Iterable[str]) -> List[str]:
+    """Unigrams and bigrams of a token stream, in sklearn's order."""
+    tokens = list(tokens)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+text_pipeline = TextPipeline()
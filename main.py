@@ -1,15 +1,46 @@
 from fastapi import FastAPI
 import uvicorn
-from app import models
+from contextlib import asynccontextmanager
+from app import models, security
+from app.http_client import http_client
+from app.response_cache import response_cache
 from app.db import engine
 from app.routes import router
+from controllers.embeddings import embeddings_enabled
+from controllers.search_index import search_index
+from controllers.similarity_batch import batch_jobs
+from controllers.similarity_pool import similarity_pool
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables if they don't exist
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(models.Base.metadata.create_all)
+        print("Database tables created successfully")
+    except Exception as e:
+        print(f"Database table creation warning: {e}")
+    # Build the search index in the background; /v1/search answers 503 until then
+    search_index.start()
+    if embeddings_enabled():
+        # Load the sentence-embedding model in every similarity worker now
+        await similarity_pool.warm_up()
+        print("Similarity workers ready")
+    yield
+    batch_jobs.cancel_all()
+    similarity_pool.shutdown()
+    security.hash_executor.shutdown(wait=False)
+    await http_client.aclose()
+    await response_cache.aclose()
+    await engine.dispose()
+
 app = FastAPI(
     title="Project Management API",
     description="FastAPI application for project management and AI chat",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
@@ -34,14 +65,6 @@ async def root():
         "docs": "/docs"
     }
 
-# Create tables if they don't exist
-try:
-    models.Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully")
-except Exception as e:
-    print(f"Database table creation warning: {e}")
-
-
 # Include routers
 app.include_router(router)
 
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# Before anything imports app.db: every test runs against a scratch SQLite file
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("SEC_KEY", "test-secret")
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.db import engine, sessionLocal
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """A session on freshly created tables."""
+    async with engine.begin() as connection:
+        await connection.run_sync(models.Base.metadata.drop_all)
+        await connection.run_sync(models.Base.metadata.create_all)
+    async with sessionLocal() as session:
+        yield session
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent by the async engine while the test runs."""
+    sent = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
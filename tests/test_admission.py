@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from app import models, schemas
+from app.db import sessionLocal
+from controllers import similarity_graph
+from controllers.check_similarity import check_similarity_multi_table
+from controllers.similarity_pool import similarity_pool
+
+pytestmark = pytest.mark.anyio
+
+COPIES = 4
+IDEA = ("Smart campus parking", "cameras and sensors detect free parking spaces and guide students to them")
+UNRELATED = ("Clinic appointment queue", "patients book a doctor online and follow the waiting queue live")
+
+
+def academic_year():
+    now = datetime.now()
+    return now.year + 1 if now.month in (10, 11, 12) else now.year
+
+
+async def submit(team_id, title, description):
+    # One session per request, as under uvicorn
+    async with sessionLocal() as db:
+        response = await check_similarity_multi_table(
+            schemas.checkProject(title=title, description=description), team_id, db
+        )
+    return response.status == "pending"
+
+
+@pytest.fixture
+async def teams(db):
+    await db.execute(insert(models.Project), [{
+        "title": "Library loans", "description": "track borrowed books and send reminders before the due date",
+        "tools": "python", "uploader": "admin@example.com", "supervisor": "supervisor", "year": academic_year()
+    }])
+    await db.execute(insert(models.Team), [
+        {"id": i, "name": f"team {i}", "description": "-", "created_by": f"user{i}@example.com"}
+        for i in range(1, COPIES + 2)
+    ])
+    await db.commit()
+    yield list(range(1, COPIES + 2))
+    await asyncio.gather(*similarity_graph._background_tasks)
+    similarity_pool.shutdown()
+
+
+async def test_one_of_several_near_identical_submissions_is_admitted(teams, monkeypatch):
+    run = similarity_pool.run
+    submissions = COPIES + 1
+    scored, everyone_scored = 0, asyncio.Event()
+
+    async def run_together(fn, *args):
+        # Hold every first scoring until all submissions have passed it, so
+        # the copies race into the admission critical section
+        nonlocal scored
+        result = await run(fn, *args)
+        scored += 1
+        if scored >= submissions:
+            everyone_scored.set()
+        await everyone_scored.wait()
+        return result
+
+    monkeypatch.setattr(similarity_pool, "run", run_together)
+    title, description = IDEA
+    admitted = await asyncio.wait_for(asyncio.gather(
+        *[submit(team_id, f"{title} {copy}", description) for copy, team_id in enumerate(teams[:COPIES])],
+        submit(teams[COPIES], *UNRELATED)
+    ), timeout=120)
+
+    assert sum(admitted[:COPIES]) == 1
+    assert admitted[COPIES]
@@ -0,0 +1,37 @@
+from app import cache
+from app.cache import LRUCache
+
+
+def test_lru_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(maxbytes=100, sizeof=len, ttl=60)
+    lru.set("key", "value")
+
+    now[0] += 59
+    assert lru.get("key") == "value"
+    now[0] += 2
+    assert lru.get("key") is None
+    assert lru.bytes == 0 and len(lru) == 0
+
+
+def test_lru_cache_without_ttl_keeps_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(maxbytes=100, sizeof=len)
+    lru.set("key", "value")
+
+    now[0] += 10 ** 6
+    assert lru.get("key") == "value"
+
+
+def test_lru_cache_evicts_by_bytes():
+    lru = LRUCache(maxbytes=10, sizeof=len)
+    lru.set("a", "12345")
+    lru.set("b", "12345")
+    lru.get("a")
+    lru.set("c", "12345")
+
+    assert lru.get("b") is None
+    assert lru.get("a") == "12345" and lru.get("c") == "12345"
+    assert lru.bytes == 10 and lru.evictions == 1
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import func, insert, select
+
+from app import models, routes, schemas
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_users(db, count):
+    await db.execute(insert(models.User), [
+        {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "-",
+         "firstName": "First", "lastName": "Last"}
+        for i in range(count)
+    ])
+    await db.commit()
+    users = (await db.scalars(select(models.User).order_by(models.User.id))).all()
+    return [schemas.UserDB.model_validate(user) for user in users]
+
+
+@pytest.mark.parametrize("members", [0, 1, 5, 20])
+async def test_create_team_query_count_does_not_grow_with_members(db, statements, members):
+    leader, *others = await create_users(db, members + 1)
+    team = schemas.TeamBase(
+        name="Team",
+        description="A team",
+        members=[schemas.TeamMemberBase(email=user.email) for user in others],
+        expec_tools=["python"]
+    )
+
+    statements.clear()
+    response = await routes.create_team(team, leader, db)
+
+    # name check, membership check, team insert, member insert; plus the
+    # user lookup once there are members
+    assert len(statements) == (4 if members == 0 else 5)
+    assert len(response["members"]) == members + 1
+    assert await db.scalar(select(func.count()).select_from(models.TeamMember)) == members + 1
+
+
+async def test_create_team_rejects_unknown_member(db):
+    leader, = await create_users(db, 1)
+    team = schemas.TeamBase(
+        name="Team", description="A team", members=[schemas.TeamMemberBase(email="nobody@example.com")]
+    )
+
+    with pytest.raises(routes.HTTPException) as error:
+        await routes.create_team(team, leader, db)
+    assert error.value.status_code == 404
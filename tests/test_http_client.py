@@ -0,0 +1,174 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app import http_client as http_client_module
+from app.http_client import CircuitOpenError, OutboundClient
+
+pytestmark = pytest.mark.anyio
+
+
+class StubServer(ThreadingHTTPServer):
+    """Answers with the scripted statuses in turn, then 200; records every request."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.statuses = []
+        self.received = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.server.received.append((self.command, self.path, self.client_address[1]))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    monkeypatch.setattr(http_client_module, "HTTP_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(http_client_module, "HTTP_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(http_client_module, "HTTP_BREAKER_COOLDOWN", 30)
+    outbound = OutboundClient()
+    yield outbound
+    await outbound.aclose()
+
+
+def end_cooldown(breaker):
+    """Backdate an open breaker past its cool-down."""
+    breaker.opened_at -= breaker.cooldown + 1
+
+
+async def test_idempotent_request_is_retried_on_503(stub, client):
+    stub.statuses = [503, 503]
+
+    response = await client.get(f"{stub.url}/match", retries=2)
+
+    assert response.status_code == 200
+    assert len(stub.received) == 3
+    assert client.retries == 2 and client.failures == 0
+
+
+async def test_post_is_not_retried_unless_idempotent(stub, client):
+    stub.statuses = [503]
+    response = await client.post(f"{stub.url}/match", json={})
+    assert response.status_code == 503
+    assert len(stub.received) == 1
+
+    stub.statuses = [503]
+    response = await client.post(f"{stub.url}/match", json={}, idempotent=True)
+    assert response.status_code == 200
+    assert len(stub.received) == 3
+
+
+async def test_retries_give_up_and_return_the_last_response(stub, client):
+    stub.statuses = [503, 503, 503]
+
+    response = await client.get(f"{stub.url}/match", retries=2)
+
+    assert response.status_code == 503
+    assert len(stub.received) == 3
+    assert client.failures == 1
+
+
+async def test_transport_errors_are_retried_then_raised(client):
+    # Nothing listens on a port just released by a closed server
+    server = StubServer()
+    url = server.url
+    server.server_close()
+
+    with pytest.raises(httpx.ConnectError):
+        await client.get(f"{url}/match", retries=1)
+    assert client.retries == 1 and client.failures == 1
+
+
+async def test_breaker_opens_after_consecutive_failures(stub, client):
+    stub.statuses = [500, 500]
+    for _ in range(2):
+        assert (await client.get(f"{stub.url}/match", retries=0)).status_code == 500
+
+    with pytest.raises(CircuitOpenError):
+        await client.get(f"{stub.url}/match")
+    # Refused without reaching the upstream
+    assert len(stub.received) == 2
+    assert client.breaker("127.0.0.1").state == "open"
+    assert client.rejected == 1
+
+
+async def test_half_open_trial_success_closes_the_breaker(stub, client):
+    stub.statuses = [500, 500]
+    for _ in range(2):
+        await client.get(f"{stub.url}/match", retries=0)
+    breaker = client.breaker("127.0.0.1")
+    end_cooldown(breaker)
+    assert breaker.state == "half_open"
+
+    assert (await client.get(f"{stub.url}/match")).status_code == 200
+    assert breaker.state == "closed"
+    assert (await client.get(f"{stub.url}/match")).status_code == 200
+
+
+async def test_half_open_trial_failure_reopens_the_breaker(stub, client):
+    stub.statuses = [500, 500, 500]
+    for _ in range(2):
+        await client.get(f"{stub.url}/match", retries=0)
+    breaker = client.breaker("127.0.0.1")
+    end_cooldown(breaker)
+
+    assert (await client.get(f"{stub.url}/match", retries=0)).status_code == 500
+    assert breaker.state == "open" and breaker.times_opened == 2
+    with pytest.raises(CircuitOpenError):
+        await client.get(f"{stub.url}/match")
+
+
+async def test_half_open_lets_one_trial_through(client):
+    breaker = client.breaker("upstream")
+    for _ in range(2):
+        breaker.record_failure()
+    end_cooldown(breaker)
+
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.release()
+    assert breaker.allow() is True
+
+
+async def test_sequential_requests_reuse_one_keep_alive_connection(stub, client):
+    for _ in range(5):
+        response = await client.get(f"{stub.url}/match")
+        await response.aread()
+
+    assert len(stub.received) == 5
+    assert len({port for _, _, port in stub.received}) == 1
+    assert client.pool_stats()["connections"] == 1
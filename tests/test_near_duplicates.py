@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import delete, insert
+
+from app import models
+from app.db import syncSessionLocal
+from controllers import similarity_index, similarity_jobs
+from controllers.near_duplicates import MinHashLSH
+from controllers.similarity_index import get_index
+
+pytestmark = pytest.mark.anyio
+
+FILLER = [
+    ("Library loans", "reminders before borrowed books are due at the library"),
+    ("Clinic queue", "patients book a slot and wait for the clinic to call them"),
+    ("Bus tracker", "live positions of campus buses on a map"),
+    ("Recipe planner", "weekly meals and a shopping list from saved recipes"),
+]
+
+
+@pytest.fixture(autouse=True)
+def year_indexes(monkeypatch):
+    # get_index keeps one index per year for the life of the process
+    monkeypatch.setattr(similarity_index, "_indexes", {})
+
+
+async def add_projects(db, year, rows, first_id):
+    await db.execute(insert(models.Project), [{
+        "id": first_id + i, "title": title, "description": description, "tools": "python",
+        "uploader": "admin@example.com", "supervisor": "supervisor", "year": year
+    } for i, (title, description) in enumerate(rows)])
+    await db.commit()
+
+
+def other_years(lsh, year, title, description):
+    with syncSessionLocal() as session:
+        similarity_jobs.sync_near_duplicate_index(lsh, session)
+        return similarity_jobs.score_other_years(session, lsh, year, title, description)
+
+
+async def test_cross_year_scores_use_the_candidate_years_idf(db):
+    title, description = "Smart parking", "sensors guide drivers to free parking spaces on campus"
+    await add_projects(db, 2023, [(title, description)] + FILLER, first_id=1)
+    await add_projects(db, 2024, [("Parking finder", "drivers see free spaces")], first_id=10)
+
+    scores = other_years(MinHashLSH(), 2024, "Parking sensors", "sensors guide drivers to parking spaces")
+    assert [(source, id) for source, id, _, _ in scores] == [("Project (2023)", 1)]
+
+    # Same scale as a same-year check against 2023
+    same_year = get_index(2023).query("Parking sensors", "sensors guide drivers to parking spaces", with_ids=True)
+    assert scores[0][3] == pytest.approx(next(score for _, id, _, score in same_year if id == 1))
+    assert other_years(MinHashLSH(), 2024, title, description)[0][3] == pytest.approx(1.0)
+
+
+async def test_deleted_rows_leave_the_near_duplicate_index(db):
+    title, description = "Smart parking", "sensors guide drivers to free parking spaces on campus"
+    await add_projects(db, 2023, [(title, description)] + FILLER, first_id=1)
+    lsh = MinHashLSH()
+    assert other_years(lsh, 2024, title, description)
+
+    await db.execute(delete(models.Project).where(models.Project.id == 1))
+    await db.commit()
+    assert other_years(lsh, 2024, title, description) == []
+    assert len(lsh) == len(FILLER)
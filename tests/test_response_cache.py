@@ -0,0 +1,126 @@
+import json
+from email.utils import formatdate, parsedate_to_datetime
+
+import pytest
+from sqlalchemy import insert
+from starlette.requests import Request
+
+from app import models, routes
+from app.response_cache import ResponseCache
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBackend:
+    """The Redis commands ResponseCache uses, on plain dicts."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+
+class DownBackend:
+    async def get(self, key):
+        raise ConnectionError("backend down")
+
+    set = incr = mget = get
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(FakeBackend())
+    monkeypatch.setattr(routes, "response_cache", cache)
+    return cache
+
+
+async def add_project(db, id, title):
+    await db.execute(insert(models.Project), [{
+        "id": id, "title": title, "description": "-", "tools": "python",
+        "uploader": "admin@example.com", "supervisor": "supervisor", "year": 2024
+    }])
+    await db.commit()
+
+
+def get_request(**headers):
+    return Request({
+        "type": "http", "method": "GET", "path": "/v1/archive", "query_string": b"",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+async def get_archive(db, **headers):
+    return await routes.get_projects(get_request(**headers), 50, None, None, None, None, True, True, db)
+
+
+def titles(response):
+    return [project["title"] for project in json.loads(response.body)]
+
+
+async def test_second_request_is_served_from_the_cache(db, statements, cache):
+    await add_project(db, 1, "Smart parking")
+    first = await get_archive(db)
+    statements.clear()
+    second = await get_archive(db)
+
+    assert statements == []
+    assert second.body == first.body
+    assert second.headers["etag"] == first.headers["etag"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_bump_invalidates_the_entry(db, cache):
+    await add_project(db, 1, "Smart parking")
+    assert titles(await get_archive(db)) == ["Smart parking"]
+
+    await add_project(db, 2, "Library loans")
+    assert titles(await get_archive(db)) == ["Smart parking"]
+    await cache.bump("projects")
+    assert sorted(titles(await get_archive(db))) == ["Library loans", "Smart parking"]
+
+
+async def test_if_none_match_is_answered_without_sql(db, statements, cache):
+    await add_project(db, 1, "Smart parking")
+    etag = (await get_archive(db)).headers["etag"]
+    statements.clear()
+    response = await get_archive(db, if_none_match=etag)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert statements == []
+
+
+async def test_if_modified_since_in_the_rendering_second_is_not_a_304(db, cache):
+    await add_project(db, 1, "Smart parking")
+    modified = (await get_archive(db)).headers["last-modified"]
+    assert (await get_archive(db, if_modified_since=modified)).status_code == 200
+
+    later = formatdate(parsedate_to_datetime(modified).timestamp() + 1, usegmt=True)
+    assert (await get_archive(db, if_modified_since=later)).status_code == 304
+
+
+async def test_failing_backend_serves_uncached_responses(db, monkeypatch):
+    cache = ResponseCache(DownBackend())
+    monkeypatch.setattr(routes, "response_cache", cache)
+    await add_project(db, 1, "Smart parking")
+
+    for _ in range(2):
+        response = await get_archive(db)
+        assert response.status_code == 200
+        assert titles(response) == ["Smart parking"]
+    assert cache.misses == 2
+    assert cache.errors == 2
+
+    await cache.bump("projects")
+    assert cache.errors == 3
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from app import models
+from controllers.search_index import SearchIndex, load_corpus
+from controllers.similarity_pool import similarity_pool
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module", autouse=True)
+def shutdown_pool():
+    # Loads are built in the similarity pool's worker processes
+    yield
+    similarity_pool.shutdown()
+
+
+@pytest.fixture
+async def projects(db):
+    await db.execute(insert(models.Project), [
+        {"title": "Smart parking", "description": "Sensors guide drivers to free parking spaces",
+         "tools": "python", "uploader": "admin@example.com", "supervisor": "supervisor", "year": 2024},
+        {"title": "Library loans", "description": "Reminders before borrowed books are due",
+         "tools": "java", "uploader": "admin@example.com", "supervisor": "supervisor", "year": 2024},
+    ])
+    await db.commit()
+    return db
+
+
+async def test_search_is_refused_until_the_first_load_finishes(projects):
+    index = SearchIndex()
+
+    with pytest.raises(HTTPException) as error:
+        await index.search(projects, "parking")
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == str(index.retry_after)
+    # The refused search started the load instead of running it inline
+    assert index.stats()["loading"]
+
+    await index._reload
+    terms, total, page, more = await index.search(projects, "parking")
+    assert total == 1 and not more
+    assert page[0][2] == 1
+
+
+async def test_started_load_serves_searches(projects):
+    index = SearchIndex()
+    index.start()
+    await index._reload
+
+    terms, total, page, more = await index.search(projects, "books")
+    assert total == 1 and page[0][2] == 2
+
+
+async def test_loads_are_built_in_the_similarity_pool(projects, monkeypatch):
+    calls = []
+    run = similarity_pool.run
+
+    async def recording_run(fn, *args):
+        calls.append(fn)
+        return await run(fn, *args)
+
+    monkeypatch.setattr(similarity_pool, "run", recording_run)
+    index = SearchIndex()
+    await index.load()
+
+    assert calls == [load_corpus]
+    assert len(index.corpus) == 2
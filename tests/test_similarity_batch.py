@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import insert
+
+from app import models
+from controllers import similarity_jobs
+from controllers.similarity_batch import BatchJob, pin_corpus
+from controllers.similarity_pool import similarity_pool
+
+pytestmark = pytest.mark.anyio
+
+YEAR = 2024
+
+
+async def add_project(db, title, description):
+    await db.execute(insert(models.Project), [{
+        "title": title, "description": description, "tools": "python",
+        "uploader": "admin@example.com", "supervisor": "supervisor", "year": YEAR
+    }])
+    await db.commit()
+
+
+@pytest.fixture
+async def corpus(db, monkeypatch):
+    await add_project(db, "Smart parking", "sensors detect free parking spaces and guide drivers to them")
+    await add_project(db, "Library loans", "track borrowed books and send reminders before the due date")
+    await db.execute(insert(models.TeamProject), [
+        {"team_id": i, "title": title, "description": description, "year": YEAR,
+         "status": models.TeamProjectStatus.PENDING}
+        for i, (title, description) in enumerate([
+            ("Parking guide", "sensors find free parking spaces and guide drivers"),
+            ("Book reminders", "remind students of borrowed library books before the due date"),
+            ("Clinic queue", "patients book clinic appointments and see the waiting queue"),
+        ], 1)
+    ])
+    await db.commit()
+
+    fits = []
+    fit_year_matrix = similarity_jobs.fit_year_matrix
+
+    def counting_fit(year, until=None):
+        fits.append(until)
+        return fit_year_matrix(year, until=until)
+
+    monkeypatch.setattr(similarity_jobs, "fit_year_matrix", counting_fit)
+    monkeypatch.setattr(similarity_jobs, "_batch_models", similarity_jobs.OrderedDict())
+    return fits
+
+
+def score(job_id, corpus_ids, chunk):
+    return similarity_jobs.score_proposal_batch(job_id, YEAR, corpus_ids, [1, 2, 3], chunk, 0.1, 5)
+
+
+async def test_interleaved_jobs_fit_once_each(db, corpus):
+    corpus_ids = await pin_corpus(db, YEAR)
+
+    for chunk in ([1], [2], [3]):
+        score("first", corpus_ids, chunk)
+        score("second", corpus_ids, chunk)
+
+    assert len(corpus) == 2
+
+
+async def test_job_corpus_is_pinned_at_start(db, corpus):
+    corpus_ids = await pin_corpus(db, YEAR)
+    assert corpus_ids == {"Project": 2, "College Idea": 0, "Team Project": 3}
+    first = score("job", corpus_ids, [1])[0]
+
+    # Inserted while the job runs; a worker that fits the job later must not see it
+    await add_project(db, "Parking sensors", "sensors detect free parking spaces and guide drivers")
+    similarity_jobs._batch_models.clear()
+    again = score("job", corpus_ids, [1])[0]
+
+    assert again == first
+    assert [match["id"] for match in first["similar_projects"]] == [1]
+
+    later = score("later job", await pin_corpus(db, YEAR), [1])[0]
+    assert [match["id"] for match in later["similar_projects"]] == [3, 1]
+
+
+async def test_cancelled_job_ends_its_streams(monkeypatch):
+    started = asyncio.Event()
+
+    async def stuck(*args):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(similarity_pool, "run", stuck)
+    job = BatchJob(YEAR, {}, [1, 2, 3], 0.1, 5)
+    job.task = asyncio.create_task(job.run())
+    lines = []
+
+    async def consume():
+        async for line in job.stream():
+            lines.append(json.loads(line))
+
+    reader = asyncio.create_task(consume())
+    await started.wait()
+    job.task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await job.task
+
+    await asyncio.wait_for(reader, timeout=5)
+    assert job.status == "cancelled"
+    assert job.finished_at is not None
+    assert lines == [{"error": "cancelled"}]
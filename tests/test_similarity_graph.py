@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.db import sessionLocal
+from controllers import similarity_graph
+
+pytestmark = pytest.mark.anyio
+
+A, B, C = ("Project", 1), ("Project", 2), ("Project", 3)
+
+
+async def edges(db):
+    rows = (await db.execute(select(
+        models.SimilarityEdge.source_type, models.SimilarityEdge.source_id,
+        models.SimilarityEdge.target_type, models.SimilarityEdge.target_id
+    ))).all()
+    return sorted(((row[0], row[1]), (row[2], row[3])) for row in rows)
+
+
+@pytest.mark.parametrize("first, second", [(A, B), (B, A)])
+async def test_linking_neighbours_in_either_order(db, first, second):
+    # Each document's scores already include the other, as when the second
+    # upload commits before the first one's background scoring runs
+    await similarity_graph.index_document(2024, first, "t", "d", scores=[(*second, 0.8)])
+    await similarity_graph.index_document(2024, second, "t", "d", scores=[(*first, 0.8)])
+
+    assert await edges(db) == sorted([(A, B), (B, A)])
+
+
+async def test_concurrent_links_of_a_year(db):
+    await asyncio.gather(
+        similarity_graph.index_document(2024, A, "t", "d", scores=[(*B, 0.8), (*C, 0.5)]),
+        similarity_graph.index_document(2024, B, "t", "d", scores=[(*A, 0.8), (*C, 0.6)]),
+        similarity_graph.index_document(2024, C, "t", "d", scores=[(*A, 0.5), (*B, 0.6)]),
+    )
+
+    assert await edges(db) == sorted([(A, B), (A, C), (B, A), (B, C), (C, A), (C, B)])
+
+
+async def test_existing_reverse_edge_does_not_evict(db, monkeypatch):
+    monkeypatch.setattr(similarity_graph, "SIMILARITY_GRAPH_TOP_K", 1)
+    await similarity_graph.index_document(2024, A, "t", "d", scores=[(*B, 0.8)])
+    # B's list is full with its edge to A; relinking A must keep it
+    await similarity_graph.index_document(2024, A, "t", "d", scores=[(*B, 0.8)])
+
+    async with sessionLocal() as session:
+        assert await edges(session) == sorted([(A, B), (B, A)])
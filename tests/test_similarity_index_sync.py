@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from sqlalchemy import delete, insert, update
+
+from app import models
+from app.db import syncSessionLocal
+from controllers import embeddings, similarity_jobs
+from controllers.embeddings import EmbeddingIndex
+from controllers.similarity_index import SimilarityIndex
+
+pytestmark = pytest.mark.anyio
+
+YEAR = 2024
+
+
+async def add_project(db, id, title, description):
+    await db.execute(insert(models.Project), [{
+        "id": id, "title": title, "description": description, "tools": "python",
+        "uploader": "admin@example.com", "supervisor": "supervisor", "year": YEAR
+    }])
+    await db.commit()
+
+
+def synced(index):
+    with syncSessionLocal() as session:
+        similarity_jobs.sync_similarity_index(index, session)
+    return sorted(id for _, id, _ in index.sources)
+
+
+async def test_lower_id_committed_late_is_indexed(db):
+    await add_project(db, 5, "Smart parking", "sensors guide drivers to free parking spaces")
+    index = SimilarityIndex(YEAR)
+    assert synced(index) == [5]
+
+    # Allocated before 5 but committed after it was indexed
+    await add_project(db, 3, "Parking sensors", "sensors find free parking spaces")
+    assert synced(index) == [3, 5]
+    assert index.query("Parking sensors", "sensors find free parking spaces", with_ids=True)
+
+
+async def test_deleted_row_is_dropped(db):
+    await add_project(db, 1, "Smart parking", "sensors guide drivers to free parking spaces")
+    await add_project(db, 2, "Library loans", "reminders before borrowed books are due")
+    index = SimilarityIndex(YEAR)
+    assert synced(index) == [1, 2]
+
+    await db.execute(delete(models.Project).where(models.Project.id == 1))
+    await db.commit()
+    assert synced(index) == [2]
+
+
+async def test_edits_are_picked_up_by_the_periodic_refit(db, monkeypatch):
+    await add_project(db, 1, "Smart parking", "sensors guide drivers to free parking spaces")
+    index = SimilarityIndex(YEAR)
+    synced(index)
+
+    await db.execute(update(models.Project).where(models.Project.id == 1).values(title="Clinic queue"))
+    await db.commit()
+    synced(index)
+    assert index.sources[0][2] == "Smart parking"
+
+    monkeypatch.setattr(similarity_jobs, "SIMILARITY_INDEX_REFRESH", 0)
+    synced(index)
+    assert index.sources[0][2] == "Clinic queue"
+
+
+def fake_encode(texts):
+    # Deterministic unit vectors; the sentence-transformers model is optional
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = np.array([[len(text), sum(map(ord, text)) % 97 + 1] for text in texts], dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def embedded(index):
+    with syncSessionLocal() as session:
+        similarity_jobs.sync_embedding_index(index, session)
+    return sorted((id, title) for _, id, title in index.sources)
+
+
+async def test_embedding_index_drops_deleted_rows_and_reencodes_edits(db, monkeypatch):
+    encoded = []
+    monkeypatch.setattr(embeddings, "encode", lambda texts: encoded.extend(texts) or fake_encode(texts))
+    await add_project(db, 1, "Smart parking", "sensors guide drivers to free parking spaces")
+    await add_project(db, 2, "Library loans", "reminders before borrowed books are due")
+    index = EmbeddingIndex(YEAR)
+    assert embedded(index) == [(1, "Smart parking"), (2, "Library loans")]
+
+    await db.execute(delete(models.Project).where(models.Project.id == 1))
+    await db.commit()
+    assert embedded(index) == [(2, "Library loans")]
+
+    await db.execute(update(models.Project).where(models.Project.id == 2).values(title="Clinic queue"))
+    await db.commit()
+    monkeypatch.setattr(similarity_jobs, "SIMILARITY_INDEX_REFRESH", 0)
+    encoded.clear()
+    assert embedded(index) == [(2, "Clinic queue")]
+    # Only the edited row is encoded again; the rest come from document_embeddings
+    assert len(encoded) == 1
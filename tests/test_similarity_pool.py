@@ -0,0 +1,14 @@
+import pytest
+
+from controllers.similarity_pool import SimilarityPool
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_warm_up_starts_every_worker():
+    pool = SimilarityPool(workers=2, queue_size=4, retry_after=1)
+    try:
+        await pool.warm_up(timeout=60)
+        assert len(pool._executor._processes) == 2
+    finally:
+        pool.shutdown()
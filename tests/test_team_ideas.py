@@ -0,0 +1,55 @@
+import pytest
+from fastapi import Response
+from sqlalchemy import insert
+
+from app import models, routes
+from app.pagination import NEXT_CURSOR_HEADER
+
+pytestmark = pytest.mark.anyio
+
+IDEAS = 60
+
+
+@pytest.fixture
+async def ideas(db):
+    await db.execute(insert(models.Team), [
+        {"id": i, "name": f"team {i}", "description": "-", "created_by": f"user{i}@example.com"}
+        for i in range(1, IDEAS + 1)
+    ])
+    await db.execute(insert(models.TeamProject), [
+        {"team_id": i, "title": f"idea {i}", "description": "-", "year": 2024 + i % 2,
+         "status": models.TeamProjectStatus.PENDING}
+        for i in range(1, IDEAS + 1)
+    ])
+    await db.commit()
+    return db
+
+
+@pytest.mark.parametrize("limit", [1, 2, 50, 500])
+async def test_team_ideas_page_is_one_query(ideas, statements, limit):
+    statements.clear()
+    page = await routes.team_ideas_page(Response(), limit, None, None, None, ideas)
+
+    assert len(statements) == 1
+    assert len(page) == min(limit, IDEAS)
+
+
+async def test_team_ideas_pages_cover_every_idea_once(ideas, statements):
+    seen, cursor = [], None
+    while True:
+        response = Response()
+        statements.clear()
+        page = await routes.team_ideas_page(response, 7, cursor, None, None, ideas)
+        assert len(statements) == 1
+        seen += [idea.team_project_id for idea in page]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert seen == list(range(1, IDEAS + 1))
+
+
+async def test_team_ideas_year_filter(ideas):
+    page = await routes.team_ideas_page(Response(), 500, None, None, 2025, ideas)
+
+    assert [idea.team_project_id for idea in page] == list(range(1, IDEAS + 1, 2))